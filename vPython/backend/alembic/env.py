@@ -7,7 +7,8 @@ from alembic import context
 
 # Importar Base y modelos
 from app.db.base import Base
-from app.models import Gasto, Balance, Deuda
+from app.models import Gasto, Balance, Deuda, GastoRollup, TableVersion, MaterializedViewRefresh
+from app.models.gasto import CONCEPTO_TRGM_INDEX
 from app.core.config import settings
 
 # this is the Alembic Config object, which provides
@@ -21,6 +22,15 @@ if config.config_file_name is not None:
 # Agregar MetaData de los modelos para 'autogenerate'
 target_metadata = Base.metadata
 
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Excluir de autogenerate los índices que las migraciones crean de forma condicional"""
+    if type_ == "index" and reflected and name == CONCEPTO_TRGM_INDEX:
+        return False
+    return True
+
+
 # Sobrescribir sqlalchemy.url con la variable de entorno
 config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
 
@@ -40,6 +50,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -62,7 +73,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,67 @@
+"""add_gastos_filter_indexes
+
+Revision ID: 6a0d927e76ec
+Revises: b3ec69ff5d9c
+Create Date: 2026-10-18 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a0d927e76ec'
+down_revision: Union[str, None] = 'b3ec69ff5d9c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, columnas, condición del índice parcial)
+INDEXES = [
+    # Orden por defecto de /api/gastos y predicado de paginación por cursor
+    ('ix_gastos_fecha_cargo_id', [sa.text('fecha_cargo DESC'), sa.text('id DESC')], None),
+    # Filtros por periodo
+    ('ix_gastos_anio_mes', ['anio', 'mes'], None),
+    # Filtros por catálogo seguidos del orden por fecha
+    ('ix_gastos_tipo_gasto_fecha_cargo', ['tipo_gasto', sa.text('fecha_cargo DESC')], None),
+    ('ix_gastos_categoria_fecha_cargo', ['categoria', sa.text('fecha_cargo DESC')], None),
+    ('ix_gastos_forma_pago_fecha_cargo', ['forma_pago', sa.text('fecha_cargo DESC')], None),
+    ('ix_gastos_tag_fecha_cargo', ['tag', sa.text('fecha_cargo DESC')], None),
+    # Banderas poco frecuentes: sólo se indexan las filas marcadas
+    ('ix_gastos_a_pagos_fecha_cargo', [sa.text('fecha_cargo DESC')], 'a_pagos'),
+    ('ix_gastos_se_divide_fecha_cargo', [sa.text('fecha_cargo DESC')], 'se_divide'),
+    # get_gastos_msi_mci
+    (
+        'ix_gastos_msi_mci_fecha_cargo',
+        [sa.text('fecha_cargo DESC'), sa.text('id DESC')],
+        "tipo_gasto IN ('MSI', 'MCI')",
+    ),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(
+                name,
+                'gastos',
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='gastos',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
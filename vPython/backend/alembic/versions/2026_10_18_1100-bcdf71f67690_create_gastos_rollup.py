@@ -0,0 +1,44 @@
+"""create_gastos_rollup
+
+Revision ID: bcdf71f67690
+Revises: 6a0d927e76ec
+Create Date: 2026-10-18 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bcdf71f67690'
+down_revision: Union[str, None] = '6a0d927e76ec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('gastos_rollup',
+    sa.Column('anio', sa.Integer(), nullable=False),
+    sa.Column('mes', sa.String(), nullable=False),
+    sa.Column('tipo_gasto', sa.String(), nullable=False),
+    sa.Column('categoria', sa.String(), nullable=False),
+    sa.Column('forma_pago', sa.String(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('anio', 'mes', 'tipo_gasto', 'categoria', 'forma_pago')
+    )
+    # Carga inicial a partir de los gastos existentes
+    op.execute(
+        """
+        INSERT INTO gastos_rollup (anio, mes, tipo_gasto, categoria, forma_pago, total, cantidad)
+        SELECT anio, mes, tipo_gasto, categoria, forma_pago, SUM(monto), COUNT(*)
+        FROM gastos
+        GROUP BY anio, mes, tipo_gasto, categoria, forma_pago
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('gastos_rollup')
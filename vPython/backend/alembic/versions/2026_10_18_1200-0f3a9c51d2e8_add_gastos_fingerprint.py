@@ -0,0 +1,121 @@
+"""add_gastos_fingerprint
+
+Revision ID: 0f3a9c51d2e8
+Revises: bcdf71f67690
+Create Date: 2026-10-18 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f3a9c51d2e8'
+down_revision: Union[str, None] = 'bcdf71f67690'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Misma expresión que app.models.gasto.FINGERPRINT_SQL (debe ser IMMUTABLE)
+FINGERPRINT_SQL = (
+    "md5(concepto || '|' || monto::text || '|' || "
+    "(fecha_cargo - DATE '2000-01-01')::text || '|' || forma_pago || '|' || ocurrencia::text)"
+)
+
+# Gastos con la misma huella que se listan en el error
+MAX_GRUPOS_REPORTADOS = 50
+
+HUELLA = "concepto, monto, fecha_cargo, forma_pago"
+
+
+def _numerar_repetidos() -> bool:
+    """alembic -x numerar_repetidos=true upgrade head"""
+    valor = context.get_x_argument(as_dictionary=True).get("numerar_repetidos", "")
+    return valor.lower() in ("1", "true", "si", "yes")
+
+
+def _resolver_repetidos() -> None:
+    """
+    Los gastos existentes con la misma huella impedirían el índice único.
+
+    No se elimina ninguno: por defecto la migración falla con sus ids para que
+    se revisen. Si son compras reales repetidas, -x numerar_repetidos=true les
+    asigna ocurrencia 2, 3... en orden de id y la migración continúa.
+    """
+    if context.is_offline_mode():
+        return
+    bind = op.get_bind()
+    grupos = bind.execute(sa.text(
+        f"SELECT array_agg(id ORDER BY id) FROM gastos "
+        f"GROUP BY {HUELLA} HAVING count(*) > 1 ORDER BY min(id)"
+    )).scalars().all()
+    if not grupos:
+        return
+
+    if _numerar_repetidos():
+        op.execute(
+            f"""
+            UPDATE gastos g SET ocurrencia = r.n
+            FROM (
+                SELECT id, row_number() OVER (PARTITION BY {HUELLA} ORDER BY id) AS n
+                FROM gastos
+            ) r
+            WHERE g.id = r.id AND r.n > 1
+            """
+        )
+        return
+
+    listado = "\n".join(
+        "  ids " + ", ".join(str(gasto_id) for gasto_id in ids)
+        for ids in grupos[:MAX_GRUPOS_REPORTADOS]
+    )
+    if len(grupos) > MAX_GRUPOS_REPORTADOS:
+        listado += f"\n  ... y {len(grupos) - MAX_GRUPOS_REPORTADOS} grupos más"
+    raise RuntimeError(
+        f"{len(grupos)} grupos de gastos tienen el mismo concepto, monto, fecha_cargo y "
+        f"forma_pago:\n{listado}\n"
+        "Elimine los que sean duplicados o, si son compras distintas, ejecute "
+        "'alembic -x numerar_repetidos=true upgrade head' para distinguirlos con ocurrencia."
+    )
+
+
+def upgrade() -> None:
+    op.add_column(
+        'gastos',
+        sa.Column('ocurrencia', sa.Integer(), server_default='1', nullable=False),
+    )
+    _resolver_repetidos()
+    op.add_column(
+        'gastos',
+        sa.Column(
+            'fingerprint',
+            sa.String(length=32),
+            sa.Computed(FINGERPRINT_SQL, persisted=True),
+            nullable=False,
+        ),
+    )
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_gastos_fingerprint',
+            'gastos',
+            ['fingerprint'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ux_gastos_fingerprint',
+            table_name='gastos',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('gastos', 'fingerprint')
+    op.drop_column('gastos', 'ocurrencia')
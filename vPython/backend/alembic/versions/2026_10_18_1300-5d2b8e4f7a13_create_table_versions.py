@@ -0,0 +1,59 @@
+"""create_table_versions
+
+Revision ID: 5d2b8e4f7a13
+Revises: 0f3a9c51d2e8
+Create Date: 2026-10-18 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b8e4f7a13'
+down_revision: Union[str, None] = '0f3a9c51d2e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('gastos', 'balance', 'deudas')
+
+
+def upgrade() -> None:
+    op.create_table('table_versions',
+    sa.Column('tabla', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('tabla')
+    )
+    op.execute(
+        "INSERT INTO table_versions (tabla, version) VALUES "
+        + ", ".join(f"('{table}', 1)" for table in TABLES)
+    )
+
+    # Un incremento por sentencia, en la misma transacción de la escritura
+    op.execute(
+        """
+        CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_versions (tabla, version) VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (tabla) DO UPDATE SET version = table_versions.version + 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_bump_version "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.drop_table('table_versions')
@@ -0,0 +1,60 @@
+"""add_gastos_periodo
+
+Revision ID: 9b6e3d2a41c7
+Revises: 5d2b8e4f7a13
+Create Date: 2026-10-18 14:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b6e3d2a41c7'
+down_revision: Union[str, None] = '5d2b8e4f7a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Misma expresión que app.models.gasto.PERIODO_SQL (debe ser IMMUTABLE)
+PERIODO_SQL = (
+    "anio * 100 + CASE mes "
+    "WHEN 'Enero' THEN 1 WHEN 'Febrero' THEN 2 WHEN 'Marzo' THEN 3 "
+    "WHEN 'Abril' THEN 4 WHEN 'Mayo' THEN 5 WHEN 'Junio' THEN 6 "
+    "WHEN 'Julio' THEN 7 WHEN 'Agosto' THEN 8 WHEN 'Septiembre' THEN 9 "
+    "WHEN 'Octubre' THEN 10 WHEN 'Noviembre' THEN 11 WHEN 'Diciembre' THEN 12 END"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        'gastos',
+        sa.Column('periodo', sa.Integer(), sa.Computed(PERIODO_SQL, persisted=True), nullable=True),
+    )
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_gastos_periodo',
+            'gastos',
+            ['periodo'],
+            postgresql_include=['monto'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+    # Estadísticas de la columna nueva para que el planificador use el índice
+    op.execute("ANALYZE gastos")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_gastos_periodo',
+            table_name='gastos',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('gastos', 'periodo')
@@ -0,0 +1,87 @@
+"""create_materialized_views
+
+Revision ID: c47a1e9f3b25
+Revises: 9b6e3d2a41c7
+Create Date: 2026-10-18 15:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a1e9f3b25'
+down_revision: Union[str, None] = '9b6e3d2a41c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Vista -> consulta; deben coincidir con app.db.materialized_views.MATERIALIZED_VIEWS
+VIEWS = {
+    'mv_gastos_categoria_mes': """
+        SELECT periodo, categoria, tipo_gasto, SUM(monto) AS total, COUNT(*) AS cantidad
+        FROM gastos
+        WHERE periodo IS NOT NULL
+        GROUP BY periodo, categoria, tipo_gasto
+    """,
+    'mv_gastos_top_conceptos': """
+        SELECT anio, categoria, concepto, SUM(monto) AS total, COUNT(*) AS cantidad,
+               MAX(fecha_cargo) AS ultimo_cargo
+        FROM gastos
+        GROUP BY anio, categoria, concepto
+    """,
+    'mv_gastos_forma_pago': """
+        SELECT anio, forma_pago, tipo_gasto, categoria, SUM(monto) AS total, COUNT(*) AS cantidad,
+               MAX(monto) AS maximo
+        FROM gastos
+        GROUP BY anio, forma_pago, tipo_gasto, categoria
+    """,
+}
+
+# REFRESH ... CONCURRENTLY requiere un índice único sobre columnas simples
+UNIQUE_INDEXES = {
+    'mv_gastos_categoria_mes': ['periodo', 'categoria', 'tipo_gasto'],
+    'mv_gastos_top_conceptos': ['anio', 'categoria', 'concepto'],
+    'mv_gastos_forma_pago': ['anio', 'forma_pago', 'tipo_gasto', 'categoria'],
+}
+
+
+def upgrade() -> None:
+    op.create_table('materialized_view_refreshes',
+    sa.Column('vista', sa.String(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('gastos_version', sa.BigInteger(), nullable=False),
+    sa.Column('duracion_ms', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('vista')
+    )
+
+    for view, query in VIEWS.items():
+        op.execute(f"CREATE MATERIALIZED VIEW {view} AS {query} WITH DATA")
+        op.create_index(f'ux_{view}', view, UNIQUE_INDEXES[view], unique=True)
+    op.create_index(
+        'ix_mv_gastos_top_conceptos_anio_total',
+        'mv_gastos_top_conceptos',
+        ['anio', 'categoria', sa.text('total DESC')],
+    )
+
+    # Estado inicial: las vistas reflejan la versión actual de gastos
+    op.execute(
+        "INSERT INTO materialized_view_refreshes (vista, refreshed_at, gastos_version) "
+        "SELECT v.vista, now(), COALESCE((SELECT version FROM table_versions WHERE tabla = 'gastos'), 0) "
+        "FROM (VALUES " + ", ".join(f"('{view}')" for view in VIEWS) + ") AS v (vista)"
+    )
+
+    # Versión para el ETag de los reportes; la incrementa cada refresco
+    op.execute(
+        "INSERT INTO table_versions (tabla, version) VALUES ('gastos_analytics', 1) "
+        "ON CONFLICT (tabla) DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM table_versions WHERE tabla = 'gastos_analytics'")
+    for view in reversed(list(VIEWS)):
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
+    op.drop_table('materialized_view_refreshes')
@@ -0,0 +1,73 @@
+"""add_gastos_concepto_search
+
+Revision ID: e8d24b7c9f51
+Revises: c47a1e9f3b25
+Create Date: 2026-10-18 16:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8d24b7c9f51'
+down_revision: Union[str, None] = 'c47a1e9f3b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Misma expresión que app.models.gasto.CONCEPTO_TSV_SQL (debe ser IMMUTABLE)
+CONCEPTO_TSV_SQL = "to_tsvector('spanish'::regconfig, concepto)"
+
+
+def upgrade() -> None:
+    op.add_column(
+        'gastos',
+        sa.Column('concepto_tsv', postgresql.TSVECTOR(), sa.Computed(CONCEPTO_TSV_SQL, persisted=True), nullable=True),
+    )
+
+    # pg_trgm es opcional: sin ella la búsqueda es sólo por palabras y prefijos
+    trigram = op.get_bind().execute(
+        sa.text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")
+    ).scalar()
+    if trigram:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_gastos_concepto_tsv',
+            'gastos',
+            ['concepto_tsv'],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        if trigram:
+            op.create_index(
+                'ix_gastos_concepto_trgm',
+                'gastos',
+                ['concepto'],
+                postgresql_using='gin',
+                postgresql_ops={'concepto': 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+    # Estadísticas de la columna nueva para estimar la selectividad de @@
+    op.execute("ANALYZE gastos")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index in ('ix_gastos_concepto_trgm', 'ix_gastos_concepto_tsv'):
+            op.drop_index(
+                index,
+                table_name='gastos',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_column('gastos', 'concepto_tsv')
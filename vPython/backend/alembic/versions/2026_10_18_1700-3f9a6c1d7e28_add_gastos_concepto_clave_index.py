@@ -0,0 +1,44 @@
+"""add_gastos_concepto_clave_index
+
+Revision ID: 3f9a6c1d7e28
+Revises: e8d24b7c9f51
+Create Date: 2026-10-18 17:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a6c1d7e28'
+down_revision: Union[str, None] = 'e8d24b7c9f51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Misma expresión que app.models.gasto.concepto_clave
+CONCEPTO_CLAVE_SQL = "translate(lower(concepto), 'áéíóúüñÁÉÍÓÚÜÑ', 'aeiouunaeiouun')"
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_gastos_concepto_clave',
+            'gastos',
+            [sa.text(f"{CONCEPTO_CLAVE_SQL} text_pattern_ops")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_gastos_concepto_clave',
+            table_name='gastos',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
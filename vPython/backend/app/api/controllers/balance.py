@@ -2,34 +2,116 @@
 Controlador de Balance
 """
 from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, func
+from app.core import pagination
 from app.models.balance import Balance
 from app.schemas.balance import BalanceCreate, BalanceUpdate
 
+# Columnas del listado: se devuelven filas en lugar de objetos ORM
+BALANCE_COLUMNS = tuple(Balance.__table__.columns)
+BALANCE_KEYS = tuple(column.key for column in BALANCE_COLUMNS)
 
-def convert_tipo_to_short(tipo: str) -> str:
-    """Convertir tipo de formato largo a corto para almacenamiento"""
-    tipo_mapping = {
-        "Débito": "D",
-        "Inversión": "I",
-        "D": "D",
-        "I": "I"
-    }
-    return tipo_mapping.get(tipo, tipo)
 
+def encode_cursor(balance: Row) -> str:
+    """Codificar la posición (id) de un balance como cursor opaco"""
+    return pagination.encode_cursor({"id": balance.id})
 
-def convert_tipo_to_long(tipo: str) -> str:
-    """Convertir tipo de formato corto a largo para respuesta"""
-    tipo_mapping = {
-        "D": "Débito",
-        "I": "Inversión"
-    }
-    return tipo_mapping.get(tipo, tipo)
 
+def decode_cursor(cursor: str) -> int:
+    """Decodificar un cursor opaco al id del último balance entregado"""
+    payload = pagination.decode_cursor(cursor)
+    try:
+        return int(payload["id"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        ) from exc
 
-def get_all_balance(db: Session) -> List[Balance]:
-    """Obtener todos los balances"""
-    return db.query(Balance).all()
+
+def build_balance_filters(
+    tipo: Optional[List[str]] = None,
+    con_diferencia: Optional[bool] = None
+) -> list:
+    """Construir la lista de condiciones SQL para los filtros de balance"""
+    filters = []
+    
+    if tipo:
+        # TipoBalance acepta tanto 'D' como 'Débito'
+        filters.append(Balance.tipo.in_(tipo))
+    
+    if con_diferencia is not None:
+        diferencia = func.coalesce(Balance.diferencia, 0)
+        filters.append(diferencia != 0 if con_diferencia else diferencia == 0)
+    
+    return filters
+
+
+def get_all_balance(db: Session, **filtros) -> List[Row]:
+    """Obtener todos los balances (filas con las columnas de balance)"""
+    query = db.query(*BALANCE_COLUMNS)
+    filters = build_balance_filters(**filtros)
+    if filters:
+        query = query.filter(and_(*filters))
+    return query.order_by(Balance.id).all()
+
+
+def get_balance_by_filters(
+    db: Session,
+    skip: int = 0,
+    limit: int = 20,
+    include_total: bool = True,
+    **filtros
+) -> tuple[List[tuple], Optional[int]]:
+    """
+    Obtener balances con filtros (paginación por offset).
+    
+    Devuelve tuplas en el orden de BALANCE_COLUMNS; el total se obtiene en la
+    misma consulta con COUNT(*) OVER ().
+    """
+    query = db.query(*BALANCE_COLUMNS)
+    filters = build_balance_filters(**filtros)
+    if filters:
+        query = query.filter(and_(*filters))
+    
+    if not include_total:
+        return query.order_by(Balance.id).offset(skip).limit(limit).all(), None
+    
+    rows = query.add_columns(
+        func.count().over().label("total")
+    ).order_by(Balance.id).offset(skip).limit(limit).all()
+    
+    if rows:
+        return [row[:-1] for row in rows], rows[0].total
+    return [], query.count()
+
+
+def get_balance_by_cursor(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    **filtros
+) -> tuple[List[Row], Optional[str]]:
+    """Obtener balances con filtros (paginación por cursor sobre id)"""
+    query = db.query(*BALANCE_COLUMNS)
+    filters = build_balance_filters(**filtros)
+    if cursor:
+        filters.append(Balance.id > decode_cursor(cursor))
+    if filters:
+        query = query.filter(and_(*filters))
+    
+    # Se pide un registro extra para saber si hay página siguiente
+    balances = query.order_by(Balance.id).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(balances) > limit:
+        balances = balances[:limit]
+        next_cursor = encode_cursor(balances[-1])
+    
+    return balances, next_cursor
 
 
 def get_balance_by_id(db: Session, balance_id: int) -> Optional[Balance]:
@@ -40,8 +122,6 @@ def get_balance_by_id(db: Session, balance_id: int) -> Optional[Balance]:
 def create_balance(db: Session, balance: BalanceCreate) -> Balance:
     """Crear nuevo balance"""
     balance_data = balance.model_dump()
-    # Convertir tipo a formato corto para almacenamiento
-    balance_data['tipo'] = convert_tipo_to_short(balance_data['tipo'])
     # Calcular diferencia automáticamente
     balance_data['diferencia'] = float(balance_data['monto']) - float(balance_data['deben_ser'])
     
@@ -59,11 +139,6 @@ def update_balance(db: Session, balance_id: int, balance: BalanceUpdate) -> Opti
         return None
     
     update_data = balance.model_dump(exclude_unset=True)
-    
-    # Convertir tipo si se está actualizando
-    if 'tipo' in update_data:
-        update_data['tipo'] = convert_tipo_to_short(update_data['tipo'])
-    
     for field, value in update_data.items():
         setattr(db_balance, field, value)
     
@@ -0,0 +1,228 @@
+"""
+Controlador de Dashboard
+"""
+from datetime import date, timedelta
+from typing import List, Literal, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, and_, cast, func, tuple_
+from app.core.constants import MESES
+from app.models.gasto import Gasto
+from app.models.gasto_rollup import GastoRollup
+from app.api.controllers.gastos import build_gasto_filters
+
+# Máscaras de GROUPING(tipo_gasto, categoria, mes): bit en 1 = columna agregada
+_GRUPO_TOTAL = 0b111
+_GRUPO_TIPO = 0b011
+_GRUPO_CATEGORIA = 0b101
+_GRUPO_MES = 0b110
+
+# Filtros que sólo pueden resolverse sobre la tabla gastos
+_FILTROS_SIN_ROLLUP = ("fecha_desde", "fecha_hasta", "a_pagos", "se_divide", "tag")
+
+# Intervalos por defecto y máximo de /api/dashboard/series
+SERIES_DEFAULT = {"mes": 24, "semana": 52}
+SERIES_MAX_BUCKETS = 1000
+
+Granularidad = Literal["mes", "semana"]
+
+
+def _orden_mes(mes: str) -> int:
+    """Posición de un mes en el calendario (los desconocidos al final)"""
+    return MESES.index(mes) if mes in MESES else len(MESES)
+
+
+def _build_rollup_filters(
+    tipo_gasto: Optional[List[str]] = None,
+    categoria: Optional[List[str]] = None,
+    forma_pago: Optional[List[str]] = None,
+    mes: Optional[List[str]] = None,
+    anio: Optional[int] = None,
+    **_sin_rollup
+) -> list:
+    """
+    Construir las condiciones SQL de los filtros sobre gastos_rollup.
+    
+    Los filtros que no forman parte del resumen deben venir vacíos.
+    """
+    filters = []
+    
+    if tipo_gasto:
+        filters.append(GastoRollup.tipo_gasto.in_(tipo_gasto))
+    
+    if categoria:
+        filters.append(GastoRollup.categoria.in_(categoria))
+    
+    if forma_pago:
+        filters.append(GastoRollup.forma_pago.in_(forma_pago))
+    
+    if mes:
+        filters.append(GastoRollup.mes.in_(mes))
+    
+    if anio:
+        filters.append(GastoRollup.anio == anio)
+    
+    return filters
+
+
+def _aggregate(db: Session, source, monto, filters: list) -> dict:
+    """
+    Calcular total y desgloses por tipo, categoría y mes en una sola lectura.
+    
+    GROUPING SETS produce todos los agregados en un único recorrido; GROUPING()
+    indica a qué desglose pertenece cada fila.
+    """
+    grupo = func.grouping(source.tipo_gasto, source.categoria, source.mes).label("grupo")
+    query = db.query(
+        grupo,
+        source.tipo_gasto,
+        source.categoria,
+        source.mes,
+        func.sum(monto).label("total")
+    )
+    
+    if filters:
+        query = query.filter(and_(*filters))
+    
+    rows = query.group_by(
+        func.grouping_sets(
+            tuple_(),
+            tuple_(source.tipo_gasto),
+            tuple_(source.categoria),
+            tuple_(source.mes)
+        )
+    ).all()
+    
+    total_gastos = 0
+    gastos_por_tipo = []
+    gastos_por_categoria = []
+    gastos_por_mes = []
+    for row in rows:
+        if row.grupo == _GRUPO_TOTAL:
+            total_gastos = row.total or 0
+        elif row.grupo == _GRUPO_TIPO:
+            gastos_por_tipo.append({"tipo": row.tipo_gasto, "total": float(row.total)})
+        elif row.grupo == _GRUPO_CATEGORIA:
+            gastos_por_categoria.append({"categoria": row.categoria, "total": float(row.total)})
+        elif row.grupo == _GRUPO_MES:
+            gastos_por_mes.append({"mes": row.mes, "total": float(row.total)})
+    
+    gastos_por_mes.sort(key=lambda item: _orden_mes(item["mes"]))
+    
+    return {
+        "total_gastos": float(total_gastos),
+        "gastos_por_tipo": gastos_por_tipo,
+        "gastos_por_categoria": gastos_por_categoria,
+        "gastos_por_mes": gastos_por_mes
+    }
+
+
+def get_dashboard_data(db: Session, **filtros) -> dict:
+    """
+    Obtener los agregados del dashboard.
+    
+    Se leen de gastos_rollup, cuyo tamaño no depende del número de gastos,
+    salvo que se filtre por fechas, tag, a_pagos o se_divide, que no forman
+    parte del resumen; en ese caso se agrega directamente sobre gastos.
+    """
+    if any(filtros.get(name) is not None for name in _FILTROS_SIN_ROLLUP):
+        return _aggregate(db, Gasto, Gasto.monto, build_gasto_filters(**filtros))
+    
+    return _aggregate(db, GastoRollup, GastoRollup.total, _build_rollup_filters(**filtros))
+
+
+def _indice_mes(fecha: date) -> int:
+    """Meses transcurridos desde el año 0 (para recorrer rangos de meses)"""
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _buckets(granularidad: Granularidad, desde: date, hasta: date) -> List[date]:
+    """Inicio de cada intervalo (mes o semana ISO) entre `desde` y `hasta`"""
+    if granularidad == "mes":
+        return [
+            date(indice // 12, indice % 12 + 1, 1)
+            for indice in range(_indice_mes(desde), _indice_mes(hasta) + 1)
+        ]
+    
+    lunes = desde - timedelta(days=desde.weekday())
+    semanas = (hasta - lunes).days // 7 + 1
+    return [lunes + timedelta(weeks=i) for i in range(semanas)]
+
+
+def _etiqueta(granularidad: Granularidad, inicio: date) -> str:
+    if granularidad == "mes":
+        return inicio.strftime("%Y-%m")
+    
+    anio, semana, _ = inicio.isocalendar()
+    return f"{anio}-W{semana:02d}"
+
+
+def get_dashboard_series(
+    db: Session,
+    granularidad: Granularidad = "mes",
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    tipo_gasto: Optional[List[str]] = None,
+    categoria: Optional[List[str]] = None,
+    forma_pago: Optional[List[str]] = None,
+    tag: Optional[str] = None
+) -> dict:
+    """
+    Serie de totales por mes o por semana entre `desde` y `hasta`.
+    
+    Por mes se agrupa por la columna generada periodo (anio/mes del gasto) con
+    un recorrido de rango sobre ix_gastos_periodo; por semana, por la semana
+    ISO de fecha_cargo. La serie es contigua: los intervalos sin gastos se
+    devuelven en cero. Por defecto termina en la fecha actual y abarca
+    SERIES_DEFAULT intervalos.
+    """
+    hasta = hasta or date.today()
+    if desde is None:
+        if granularidad == "mes":
+            indice = _indice_mes(hasta) - SERIES_DEFAULT["mes"] + 1
+            desde = date(indice // 12, indice % 12 + 1, 1)
+        else:
+            desde = hasta - timedelta(weeks=SERIES_DEFAULT["semana"] - 1)
+    
+    if desde > hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha inicial debe ser anterior a la final"
+        )
+    
+    buckets = _buckets(granularidad, desde, hasta)
+    if len(buckets) > SERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango abarca más de {SERIES_MAX_BUCKETS} intervalos"
+        )
+    
+    filters = build_gasto_filters(tipo_gasto=tipo_gasto, categoria=categoria, forma_pago=forma_pago, tag=tag)
+    if granularidad == "mes":
+        bucket = Gasto.periodo
+        filters.append(Gasto.periodo.between(desde.year * 100 + desde.month, hasta.year * 100 + hasta.month))
+    else:
+        bucket = cast(func.date_trunc("week", Gasto.fecha_cargo), Date)
+        filters.append(Gasto.fecha_cargo.between(buckets[0], buckets[-1] + timedelta(days=6)))
+    
+    rows = db.query(
+        bucket.label("bucket"),
+        func.sum(Gasto.monto).label("total"),
+        func.count().label("cantidad")
+    ).filter(and_(*filters)).group_by(bucket).all()
+    
+    series = {
+        inicio: {"periodo": _etiqueta(granularidad, inicio), "inicio": inicio.isoformat(), "total": 0.0, "cantidad": 0}
+        for inicio in buckets
+    }
+    for row in rows:
+        inicio = date(row.bucket // 100, row.bucket % 100, 1) if granularidad == "mes" else row.bucket
+        series[inicio].update(total=float(row.total), cantidad=row.cantidad)
+    
+    return {
+        "granularidad": granularidad,
+        "desde": buckets[0].isoformat(),
+        "hasta": hasta.isoformat(),
+        "total": sum(item["total"] for item in series.values()),
+        "series": list(series.values())
+    }
@@ -0,0 +1,213 @@
+"""
+Controlador de reportes sobre vistas materializadas
+
+Los reportes leen de las vistas de app.db.materialized_views, que se
+refrescan en segundo plano: cada respuesta incluye stale_as_of (hora del
+último refresco) y `pendiente` (hay escrituras de gastos posteriores que la
+vista aún no refleja).
+"""
+from datetime import date
+from typing import List, Literal, Optional
+from sqlalchemy import Date, Integer, Numeric, String, and_, column, func, select, table, tuple_
+from sqlalchemy.orm import Session
+from app.core.constants import MESES
+from app.models.materialized_view_refresh import MaterializedViewRefresh
+from app.models.table_version import TableVersion
+
+# Vistas de la migración c47a1e9f3b25 (no forman parte de Base.metadata)
+mv_categoria_mes = table(
+    "mv_gastos_categoria_mes",
+    column("periodo", Integer),
+    column("categoria", String),
+    column("tipo_gasto", String),
+    column("total", Numeric),
+    column("cantidad", Integer)
+)
+mv_top_conceptos = table(
+    "mv_gastos_top_conceptos",
+    column("anio", Integer),
+    column("categoria", String),
+    column("concepto", String),
+    column("total", Numeric),
+    column("cantidad", Integer),
+    column("ultimo_cargo", Date)
+)
+mv_forma_pago = table(
+    "mv_gastos_forma_pago",
+    column("anio", Integer),
+    column("forma_pago", String),
+    column("tipo_gasto", String),
+    column("categoria", String),
+    column("total", Numeric),
+    column("cantidad", Integer),
+    column("maximo", Numeric)
+)
+
+Dimension = Literal["categoria", "tipo_gasto"]
+
+# Máscaras de GROUPING(forma_pago, tipo_gasto): bit en 1 = columna agregada
+_GRUPO_FORMA_TIPO = 0b00
+_GRUPO_FORMA = 0b01
+_GRUPO_TOTAL = 0b11
+
+
+def _frescura(db: Session, vista: str) -> dict:
+    """Hora del último refresco de `vista` y si hay escrituras posteriores"""
+    version_actual = (
+        select(TableVersion.version).where(TableVersion.tabla == "gastos").scalar_subquery()
+    )
+    row = db.execute(
+        select(MaterializedViewRefresh.refreshed_at, MaterializedViewRefresh.gastos_version, version_actual)
+        .where(MaterializedViewRefresh.vista == vista)
+    ).first()
+    if row is None:
+        return {"stale_as_of": None, "pendiente": True}
+    return {"stale_as_of": row.refreshed_at.isoformat(), "pendiente": (row[2] or 0) > row.gastos_version}
+
+
+def get_categoria_mes(db: Session, anio: Optional[int] = None, por: Dimension = "categoria") -> dict:
+    """
+    Tabla dinámica de `por` (categoría o tipo de gasto) × mes de un año.
+    
+    Cada fila trae los 12 meses en orden (en cero si no hay gastos), su total
+    y el total por mes de todas las filas.
+    """
+    anio = anio or date.today().year
+    clave = mv_categoria_mes.c[por]
+    rows = db.execute(
+        select(clave.label("clave"), mv_categoria_mes.c.periodo, func.sum(mv_categoria_mes.c.total).label("total"))
+        .where(mv_categoria_mes.c.periodo.between(anio * 100 + 1, anio * 100 + 12))
+        .group_by(clave, mv_categoria_mes.c.periodo)
+    ).all()
+    
+    filas = {}
+    total_por_mes = [0.0] * len(MESES)
+    for row in rows:
+        fila = filas.setdefault(row.clave, {"clave": row.clave, "por_mes": [0.0] * len(MESES), "total": 0.0})
+        indice = row.periodo % 100 - 1
+        fila["por_mes"][indice] = float(row.total)
+        fila["total"] += float(row.total)
+        total_por_mes[indice] += float(row.total)
+    
+    return {
+        "anio": anio,
+        "por": por,
+        "meses": MESES,
+        "filas": sorted(filas.values(), key=lambda fila: -fila["total"]),
+        "total_por_mes": total_por_mes,
+        "total": sum(total_por_mes),
+        **_frescura(db, "mv_gastos_categoria_mes")
+    }
+
+
+def get_top_conceptos(
+    db: Session,
+    anio: Optional[int] = None,
+    categoria: str = "E",
+    limit: int = 10
+) -> dict:
+    """
+    Conceptos con mayor monto de una categoría, en un año o en todos.
+    
+    Con año se lee en orden de ix_mv_gastos_top_conceptos_anio_total; sin año
+    se suman los años de cada concepto.
+    """
+    mv = mv_top_conceptos
+    filters = [mv.c.categoria == categoria]
+    if anio:
+        filters.append(mv.c.anio == anio)
+    
+    total = func.sum(mv.c.total).label("total")
+    rows = db.execute(
+        select(
+            mv.c.concepto,
+            total,
+            func.sum(mv.c.cantidad).label("cantidad"),
+            func.max(mv.c.ultimo_cargo).label("ultimo_cargo")
+        )
+        .where(and_(*filters))
+        .group_by(mv.c.concepto)
+        .order_by(total.desc(), mv.c.concepto)
+        .limit(limit)
+    ).all()
+    
+    return {
+        "anio": anio,
+        "categoria": categoria,
+        "conceptos": [
+            {
+                "concepto": row.concepto,
+                "total": float(row.total),
+                "cantidad": int(row.cantidad),
+                "ultimo_cargo": row.ultimo_cargo.isoformat()
+            }
+            for row in rows
+        ],
+        **_frescura(db, "mv_gastos_top_conceptos")
+    }
+
+
+def get_formas_pago(db: Session, anio: Optional[int] = None, categoria: Optional[List[str]] = None) -> dict:
+    """
+    Total, número de gastos, promedio y máximo por forma de pago, con su
+    desglose por tipo de gasto, en un año o en todos.
+    """
+    mv = mv_forma_pago
+    filters = []
+    if anio:
+        filters.append(mv.c.anio == anio)
+    if categoria:
+        filters.append(mv.c.categoria.in_(categoria))
+    
+    grupo = func.grouping(mv.c.forma_pago, mv.c.tipo_gasto).label("grupo")
+    query = select(
+        grupo,
+        mv.c.forma_pago,
+        mv.c.tipo_gasto,
+        func.sum(mv.c.total).label("total"),
+        func.sum(mv.c.cantidad).label("cantidad"),
+        func.max(mv.c.maximo).label("maximo")
+    )
+    if filters:
+        query = query.where(and_(*filters))
+    rows = db.execute(
+        query.group_by(
+            func.grouping_sets(
+                tuple_(mv.c.forma_pago, mv.c.tipo_gasto),
+                tuple_(mv.c.forma_pago),
+                tuple_()
+            )
+        )
+    ).all()
+    
+    def resumen(row) -> dict:
+        return {
+            "total": float(row.total),
+            "cantidad": int(row.cantidad),
+            "promedio": float(row.total) / int(row.cantidad),
+            "maximo": float(row.maximo)
+        }
+    
+    total = 0.0
+    formas = {}
+    desgloses = []
+    for row in rows:
+        if row.grupo == _GRUPO_TOTAL:
+            total = float(row.total or 0)
+        elif row.grupo == _GRUPO_FORMA:
+            formas[row.forma_pago] = {"forma_pago": row.forma_pago, **resumen(row), "por_tipo": []}
+        elif row.grupo == _GRUPO_FORMA_TIPO:
+            desgloses.append(row)
+    
+    for row in desgloses:
+        formas[row.forma_pago]["por_tipo"].append({"tipo_gasto": row.tipo_gasto, **resumen(row)})
+    for forma in formas.values():
+        forma["porcentaje"] = round(forma["total"] / total * 100, 2) if total else 0.0
+        forma["por_tipo"].sort(key=lambda item: -item["total"])
+    
+    return {
+        "anio": anio,
+        "total": total,
+        "formas_pago": sorted(formas.values(), key=lambda forma: -forma["total"]),
+        **_frescura(db, "mv_gastos_forma_pago")
+    }
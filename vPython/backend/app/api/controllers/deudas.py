@@ -2,14 +2,20 @@
 Controlador de Deudas
 """
 from typing import List, Optional
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from app.models.deuda import Deuda
 from app.schemas.deuda import DeudaCreate, DeudaUpdate
 
 
-def get_all_deudas(db: Session) -> List[Deuda]:
-    """Obtener todas las deudas"""
-    return db.query(Deuda).order_by(Deuda.fecha.desc()).all()
+# Columnas del listado: se devuelven filas en lugar de objetos ORM
+DEUDA_COLUMNS = tuple(Deuda.__table__.columns)
+DEUDA_KEYS = tuple(column.key for column in DEUDA_COLUMNS)
+
+
+def get_all_deudas(db: Session) -> List[Row]:
+    """Obtener todas las deudas (filas con las columnas de deudas)"""
+    return db.query(*DEUDA_COLUMNS).order_by(Deuda.fecha.desc()).all()
 
 
 def get_deuda_by_id(db: Session, deuda_id: int) -> Optional[Deuda]:
@@ -1,16 +1,77 @@
 """
 Controlador de Gastos
 """
-from typing import List, Optional
+from collections import Counter
+from datetime import date
+from itertools import groupby
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence
 from fastapi import HTTPException, status
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.models.gasto import Gasto
-from app.schemas.gasto import GastoCreate, GastoUpdate
+from sqlalchemy import Integer, and_, any_, bindparam, delete, func, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from app.core import pagination
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.materialized_views import mv_refresher
+from app.models.gasto import FINGERPRINT_INDEX, Gasto, TIPOS_A_PAGOS
+from app.schemas.gasto import GastoCreate, GastoUpdate, GastoBulkUpdate
+from app.api.controllers.gastos_search import search_condition, search_rank
+from app.api.controllers.gastos_suggest import clear_suggest_cache
+from app.api.controllers.table_versions import get_table_versions
+from app.api.controllers.gastos_rollup import ROLLUP_KEYS, apply_rollup_delta, apply_rollup_deltas, rollup_key
 
+# Columnas de los listados: se devuelven filas en lugar de objetos ORM
+# (fingerprint, periodo y concepto_tsv son internas: deduplicar, series y búsqueda)
+GASTO_INTERNAL_COLUMNS = ("fingerprint", "periodo", "concepto_tsv")
+GASTO_COLUMNS = tuple(column for column in Gasto.__table__.columns if column.key not in GASTO_INTERNAL_COLUMNS)
+GASTO_KEYS = tuple(column.key for column in GASTO_COLUMNS)
 
-def get_gastos_by_filters(
-    db: Session,
+# Campos de la huella (fingerprint) de un gasto
+HUELLA_FIELDS = ("concepto", "monto", "fecha_cargo", "forma_pago", "ocurrencia")
+
+# Totales por (versión de gastos, conjunto de filtros normalizado)
+_total_cache = TTLCache(maxsize=512, ttl=settings.GASTOS_TOTAL_CACHE_TTL)
+
+# Filas por lote del cursor del servidor en la exportación
+EXPORT_BATCH_SIZE = 1000
+
+
+def invalidate_caches() -> None:
+    """
+    Avisar de una escritura de gastos en este worker: libera los totales y el
+    autocompletado ya guardados y programa el refresco de las vistas
+    materializadas.
+    
+    Las cachés se indexan por la versión de table_versions, así que las
+    escrituras de otros workers o fuera de la API también se reflejan; esto
+    sólo adelanta la liberación de memoria y el refresco.
+    """
+    _total_cache.clear()
+    clear_suggest_cache()
+    mv_refresher.notify()
+
+
+def encode_cursor(gasto: Row) -> str:
+    """Codificar la posición (fecha_cargo, id) de un gasto como cursor opaco"""
+    return pagination.encode_cursor({"f": gasto.fecha_cargo.isoformat(), "id": gasto.id})
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    """Decodificar un cursor opaco a (fecha_cargo, id)"""
+    payload = pagination.decode_cursor(cursor)
+    try:
+        return date.fromisoformat(payload["f"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        ) from exc
+
+
+def build_gasto_filters(
     tipo_gasto: Optional[List[str]] = None,
     categoria: Optional[List[str]] = None,
     forma_pago: Optional[List[str]] = None,
@@ -21,13 +82,9 @@ def get_gastos_by_filters(
     a_pagos: Optional[bool] = None,
     se_divide: Optional[bool] = None,
     tag: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 20
-) -> tuple[List[Gasto], int]:
-    """Obtener gastos con filtros"""
-    query = db.query(Gasto)
-    
-    # Aplicar filtros
+    q: Optional[str] = None
+) -> list:
+    """Construir la lista de condiciones SQL para los filtros de gastos"""
     filters = []
     
     if tipo_gasto:
@@ -60,60 +117,437 @@ def get_gastos_by_filters(
     if tag:
         filters.append(Gasto.tag == tag)
     
+    if q and q.strip():
+        filters.append(search_condition(q))
+    
+    return filters
+
+
+def _normalize_filtros(filtros: dict) -> tuple:
+    """Clave hashable e independiente del orden para un conjunto de filtros"""
+    normalized = []
+    for key, value in sorted(filtros.items()):
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, list):
+            value = tuple(sorted(value))
+        normalized.append((key, value))
+    return tuple(normalized)
+
+
+def estimate_total_gastos(db: Session) -> Optional[int]:
+    """
+    Total aproximado de gastos según las estadísticas del planificador.
+    
+    Devuelve None si la tabla aún no ha sido analizada.
+    """
+    reltuples = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:tabla AS regclass)"),
+        {"tabla": Gasto.__tablename__}
+    ).scalar()
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
+
+
+def get_gastos_by_filters(
+    db: Session,
+    skip: int = 0,
+    limit: int = 20,
+    include_total: bool = True,
+    gastos_version: Optional[int] = None,
+    **filtros
+) -> tuple[List[tuple], Optional[int]]:
+    """
+    Obtener gastos con filtros (paginación por offset).
+    
+    Devuelve tuplas en el orden de GASTO_COLUMNS (no objetos ORM).
+    
+    El total se calcula en la misma consulta con COUNT(*) OVER () y se guarda
+    unos segundos por conjunto de filtros y versión de gastos, de modo que al
+    cambiar de página no se vuelve a contar. `gastos_version` es la versión ya
+    leída por conditional_get; si no se pasa, se consulta. Con
+    include_total=False no se calcula (total=None).
+    
+    Con búsqueda (q) los gastos se ordenan por relevancia y después por fecha.
+    """
+    query = db.query(*GASTO_COLUMNS)
+    
+    # Aplicar filtros
+    filters = build_gasto_filters(**filtros)
     if filters:
         query = query.filter(and_(*filters))
     
-    # Obtener total
-    total = query.count()
+    order = (Gasto.fecha_cargo.desc(), Gasto.id.desc())
+    if filtros.get("q") and filtros["q"].strip():
+        order = (search_rank(filtros["q"]).desc(), *order)
     
-    # Aplicar paginación y ordenar
-    gastos = query.order_by(Gasto.fecha_cargo.desc()).offset(skip).limit(limit).all()
+    if not include_total:
+        return query.order_by(*order).offset(skip).limit(limit).all(), None
     
+    if gastos_version is None:
+        gastos_version = get_table_versions(db, ("gastos",))["gastos"]
+    cache_key = (gastos_version, _normalize_filtros(filtros))
+    total = _total_cache.get(cache_key)
+    if total is not None:
+        return query.order_by(*order).offset(skip).limit(limit).all(), total
+    
+    # Obtener página y total en un solo viaje a la base de datos
+    rows = query.add_columns(
+        func.count().over().label("total")
+    ).order_by(*order).offset(skip).limit(limit).all()
+    
+    if rows:
+        gastos = [row[:-1] for row in rows]
+        total = rows[0].total
+    else:
+        # Página fuera de rango: la ventana no devuelve filas, se cuenta aparte
+        gastos = []
+        total = query.order_by(None).count()
+    
+    _total_cache.set(cache_key, total)
     return gastos, total
 
 
+def get_gastos_by_cursor(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    **filtros
+) -> tuple[List[Row], Optional[str]]:
+    """
+    Obtener gastos con filtros (paginación por cursor / keyset).
+    
+    En lugar de OFFSET se usa el predicado (fecha_cargo, id) < cursor, de modo
+    que cada página cuesta lo mismo sin importar su profundidad.
+    """
+    query = db.query(*GASTO_COLUMNS)
+    
+    filters = build_gasto_filters(**filtros)
+    if cursor:
+        fecha_cargo, gasto_id = decode_cursor(cursor)
+        filters.append(tuple_(Gasto.fecha_cargo, Gasto.id) < tuple_(fecha_cargo, gasto_id))
+    if filters:
+        query = query.filter(and_(*filters))
+    
+    # Se pide un registro extra para saber si hay página siguiente
+    gastos = query.order_by(
+        Gasto.fecha_cargo.desc(), Gasto.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(gastos) > limit:
+        gastos = gastos[:limit]
+        next_cursor = encode_cursor(gastos[-1])
+    
+    return gastos, next_cursor
+
+
 def get_gasto_by_id(db: Session, gasto_id: int) -> Optional[Gasto]:
     """Obtener gasto por ID"""
     return db.query(Gasto).filter(Gasto.id == gasto_id).first()
 
 
+def _get_gasto_for_update(db: Session, gasto_id: int) -> Optional[Gasto]:
+    """Obtener gasto por ID bloqueando la fila hasta el commit"""
+    return db.query(Gasto).filter(Gasto.id == gasto_id).with_for_update().first()
+
+
+def _huella(gasto) -> dict:
+    """Campos que forman la huella (FINGERPRINT_SQL) de un gasto"""
+    return {field: getattr(gasto, field) for field in HUELLA_FIELDS}
+
+
+def _get_gasto_id_by_fingerprint(db: Session, huella: dict) -> Optional[int]:
+    """Id del gasto existente con la huella dada"""
+    return db.query(Gasto.id).filter_by(**huella).scalar()
+
+
+def _es_conflicto_fingerprint(exc: IntegrityError) -> bool:
+    """True si el error es la violación del índice único de la huella"""
+    orig = exc.orig
+    # psycopg2 expone el índice en diag; asyncpg en la excepción original
+    diag = getattr(orig, "diag", None)
+    indice = getattr(diag, "constraint_name", None) or getattr(orig.__cause__, "constraint_name", None)
+    return getattr(orig, "pgcode", None) == "23505" and indice == FINGERPRINT_INDEX
+
+
+def _conflicto_fingerprint(existente_id: Optional[int] = None) -> HTTPException:
+    """Error para una escritura que duplicaría la huella de otro gasto"""
+    gasto = f"un gasto (ID {existente_id})" if existente_id is not None else "un gasto"
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=(
+            f"Ya existe {gasto} con el mismo concepto, monto, fecha de cargo, forma de pago "
+            "y ocurrencia; para registrar la misma compra repetida use otra ocurrencia"
+        )
+    )
+
+
 def create_gasto(db: Session, gasto: GastoCreate) -> Gasto:
-    """Crear nuevo gasto"""
-    db_gasto = Gasto(**gasto.model_dump())
-    db.add(db_gasto)
+    """
+    Crear nuevo gasto.
+    
+    Usa INSERT ... ON CONFLICT (fingerprint) DO NOTHING: si ya existe un gasto
+    con la misma huella no se inserta nada y se lanza 409 con el id del
+    existente (un reintento no duplica el gasto).
+    """
+    db_gasto = db.scalars(
+        pg_insert(Gasto)
+        .values(**gasto.model_dump())
+        .on_conflict_do_nothing(index_elements=[Gasto.fingerprint])
+        .returning(Gasto)
+    ).first()
+    if db_gasto is None:
+        existente_id = _get_gasto_id_by_fingerprint(db, _huella(gasto))
+        db.rollback()
+        raise _conflicto_fingerprint(existente_id)
+    
+    apply_rollup_delta(db, rollup_key(db_gasto), 1)
     db.commit()
+    invalidate_caches()
     db.refresh(db_gasto)
     return db_gasto
 
 
 def update_gasto(db: Session, gasto_id: int, gasto: GastoUpdate) -> Optional[Gasto]:
-    """Actualizar gasto"""
-    db_gasto = get_gasto_by_id(db, gasto_id)
+    """
+    Actualizar gasto.
+    
+    Si los nuevos valores duplican la huella de otro gasto se lanza 409 con el
+    id de ese gasto y no se aplica ningún cambio.
+    """
+    db_gasto = _get_gasto_for_update(db, gasto_id)
     if not db_gasto:
         return None
     
+    anterior = rollup_key(db_gasto)
+    
     update_data = gasto.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_gasto, field, value)
+    huella = _huella(db_gasto)
+    
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
+        if not _es_conflicto_fingerprint(exc):
+            raise
+        raise _conflicto_fingerprint(_get_gasto_id_by_fingerprint(db, huella))
+    
+    # Quitar la versión anterior del resumen y sumar la nueva
+    apply_rollup_deltas(db, [(anterior, -1), (rollup_key(db_gasto), 1)])
     
     db.commit()
+    invalidate_caches()
     db.refresh(db_gasto)
     return db_gasto
 
 
 def delete_gasto(db: Session, gasto_id: int) -> bool:
     """Eliminar gasto"""
-    db_gasto = get_gasto_by_id(db, gasto_id)
+    db_gasto = _get_gasto_for_update(db, gasto_id)
     if not db_gasto:
         return False
     
+    apply_rollup_delta(db, rollup_key(db_gasto), -1)
     db.delete(db_gasto)
     db.commit()
+    invalidate_caches()
     return True
 
 
-def get_gastos_msi_mci(db: Session) -> List[Gasto]:
-    """Obtener gastos MSI/MCI"""
-    return db.query(Gasto).filter(
-        or_(Gasto.tipo_gasto == 'MSI', Gasto.tipo_gasto == 'MCI')
-    ).order_by(Gasto.fecha_cargo.desc()).all()
+def _export_query(**filtros):
+    """Consulta de exportación: todas las columnas, orden estable por (fecha_cargo, id)"""
+    return (
+        select(*GASTO_COLUMNS)
+        .where(*build_gasto_filters(**filtros))
+        .order_by(Gasto.fecha_cargo.desc(), Gasto.id.desc())
+    )
+
+
+def iter_gastos_export(db: Session, **filtros) -> Iterator[Sequence[Row]]:
+    """
+    Recorrer los gastos filtrados en lotes desde un cursor del servidor.
+    
+    yield_per activa stream_results: sólo hay un lote en memoria a la vez.
+    """
+    result = db.execute(_export_query(**filtros), execution_options={"yield_per": EXPORT_BATCH_SIZE})
+    yield from result.partitions()
+
+
+async def aiter_gastos_export(db: AsyncSession, **filtros) -> AsyncIterator[Sequence[Row]]:
+    """Versión asíncrona de iter_gastos_export (AsyncSession.stream)"""
+    result = await db.stream(_export_query(**filtros), execution_options={"yield_per": EXPORT_BATCH_SIZE})
+    async for partition in result.partitions():
+        yield partition
+
+
+def _ids_param(ids: List[int]):
+    """Parámetro único de tipo INTEGER[] para filtrar con id = ANY(:ids)"""
+    return any_(bindparam("ids", list(ids), type_=ARRAY(Integer)))
+
+
+def bulk_create_gastos(
+    db: Session,
+    gastos: List[GastoCreate],
+    todo_o_nada: bool = False
+) -> tuple[List[Row], List[int]]:
+    """
+    Crear varios gastos en una sola transacción (INSERT multi-fila ... RETURNING).
+    
+    Los gastos cuya huella ya existe se omiten (ON CONFLICT DO NOTHING).
+    Devuelve (filas insertadas, posiciones en `gastos` de los duplicados). Con
+    todo_o_nada no se crea ninguno si hay algún duplicado.
+    """
+    if not gastos:
+        return [], []
+    
+    rows = db.execute(
+        pg_insert(Gasto)
+        .on_conflict_do_nothing(index_elements=[Gasto.fingerprint])
+        .returning(*GASTO_COLUMNS),
+        [gasto.model_dump() for gasto in gastos]
+    ).all()
+    
+    # Las filas insertadas se emparejan con los gastos por huella, en orden
+    insertados = Counter(tuple(_huella(row).values()) for row in rows)
+    duplicados = []
+    for posicion, gasto in enumerate(gastos):
+        huella = tuple(_huella(gasto).values())
+        if insertados[huella]:
+            insertados[huella] -= 1
+        else:
+            duplicados.append(posicion)
+    if duplicados and todo_o_nada:
+        db.rollback()
+        return [], duplicados
+    
+    apply_rollup_deltas(db, [(rollup_key(row), 1) for row in rows])
+    
+    db.commit()
+    invalidate_caches()
+    return rows, duplicados
+
+
+def _update_en_savepoint(db: Session, params: List[dict]) -> bool:
+    """UPDATE por id dentro de un SAVEPOINT; False (y nada aplicado) si duplica una huella"""
+    try:
+        with db.begin_nested():
+            db.execute(update(Gasto), params)
+    except IntegrityError as exc:
+        if not _es_conflicto_fingerprint(exc):
+            raise
+        return False
+    return True
+
+
+def bulk_update_gastos(
+    db: Session,
+    cambios: List[GastoBulkUpdate],
+    todo_o_nada: bool = False
+) -> tuple[List[Row], List[int], Dict[int, Optional[int]]]:
+    """
+    Actualizar varios gastos en una sola transacción.
+    
+    Devuelve (gastos actualizados, ids no encontrados, duplicados). Los
+    duplicados son los ids cuyos nuevos valores repiten la huella de otro
+    gasto, con el id de ese gasto; no se modifican. Con todo_o_nada no se
+    aplica ningún cambio si falta alguno de los ids o hay duplicados.
+    """
+    ids = list(dict.fromkeys(cambio.id for cambio in cambios))
+    if not ids:
+        return [], [], {}
+    
+    anteriores = {
+        row.id: row
+        for row in db.query(*GASTO_COLUMNS).filter(Gasto.id == _ids_param(ids)).with_for_update()
+    }
+    faltantes = [gasto_id for gasto_id in ids if gasto_id not in anteriores]
+    if faltantes and todo_o_nada:
+        db.rollback()
+        return [], faltantes, {}
+    
+    # Un solo conjunto de cambios por id (el último gana)
+    valores: dict[int, dict] = {}
+    for cambio in cambios:
+        if cambio.id in anteriores:
+            valores.setdefault(cambio.id, {}).update(cambio.model_dump(exclude_unset=True, exclude={"id"}))
+    
+    # Agrupar por columnas modificadas: cada grupo es un executemany en su
+    # SAVEPOINT. Si un grupo choca con una huella se repite elemento por
+    # elemento para aplicar el resto y saber cuáles son los duplicados.
+    params = sorted(
+        ({"id": gasto_id, **data} for gasto_id, data in valores.items() if data),
+        key=lambda item: tuple(sorted(item))
+    )
+    duplicados: Dict[int, Optional[int]] = {}
+    for _, grupo in groupby(params, key=lambda item: tuple(sorted(item))):
+        grupo = list(grupo)
+        if _update_en_savepoint(db, grupo):
+            continue
+        for item in grupo:
+            if not _update_en_savepoint(db, [item]):
+                huella = {**_huella(anteriores[item["id"]]), **{k: v for k, v in item.items() if k in HUELLA_FIELDS}}
+                duplicados[item["id"]] = _get_gasto_id_by_fingerprint(db, huella)
+    if duplicados and todo_o_nada:
+        db.rollback()
+        return [], faltantes, duplicados
+    
+    actualizados = {
+        row.id: row
+        for row in db.query(*GASTO_COLUMNS).filter(
+            Gasto.id == _ids_param([gasto_id for gasto_id in anteriores if gasto_id not in duplicados])
+        )
+    }
+    apply_rollup_deltas(
+        db,
+        [(rollup_key(anteriores[gasto_id]), -1) for gasto_id in actualizados]
+        + [(rollup_key(row), 1) for row in actualizados.values()]
+    )
+    
+    db.commit()
+    invalidate_caches()
+    return [actualizados[gasto_id] for gasto_id in ids if gasto_id in actualizados], faltantes, duplicados
+
+
+def bulk_delete_gastos(
+    db: Session,
+    ids: List[int],
+    todo_o_nada: bool = False
+) -> tuple[List[int], List[int]]:
+    """
+    Eliminar varios gastos con DELETE ... WHERE id = ANY(...).
+    
+    Devuelve (ids eliminados, ids no encontrados). Con todo_o_nada no se
+    elimina nada si falta alguno de los ids.
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return [], []
+    
+    rows = db.execute(
+        delete(Gasto)
+        .where(Gasto.id == _ids_param(ids))
+        .returning(Gasto.id, *[getattr(Gasto, k) for k in ROLLUP_KEYS], Gasto.monto)
+        .execution_options(synchronize_session=False)
+    ).all()
+    eliminados = {row.id for row in rows}
+    faltantes = [gasto_id for gasto_id in ids if gasto_id not in eliminados]
+    if faltantes and todo_o_nada:
+        db.rollback()
+        return [], faltantes
+    
+    apply_rollup_deltas(db, [(rollup_key(row), -1) for row in rows])
+    
+    db.commit()
+    invalidate_caches()
+    return [gasto_id for gasto_id in ids if gasto_id in eliminados], faltantes
+
+
+def get_gastos_msi_mci(db: Session) -> List[Row]:
+    """Obtener gastos MSI/MCI (filas con las columnas de gastos)"""
+    return db.query(*GASTO_COLUMNS).filter(
+        Gasto.tipo_gasto.in_(TIPOS_A_PAGOS)
+    ).order_by(Gasto.fecha_cargo.desc(), Gasto.id.desc()).all()
@@ -0,0 +1,379 @@
+"""
+Importación masiva de Gastos desde CSV o desde el libro de Excel heredado
+
+Las filas se leen en streaming, se validan contra GastoImport (GastoCreate con
+montos negativos o con más decimales, fecha_pago opcional y formas de pago
+heredadas) y los catálogos de app.core.constants, y las válidas se cargan por lotes con COPY a una tabla
+temporal de staging. Al final se insertan en gastos con un solo INSERT ...
+SELECT ... ON CONFLICT DO NOTHING (los gastos con una huella ya registrada se
+omiten, así que reimportar un archivo es idempotente) y se actualiza
+gastos_rollup en la misma transacción.
+
+Las compras repetidas dentro de un mismo archivo (mismo concepto, monto, fecha
+de cargo y forma de pago) son compras distintas: reciben ocurrencia 1, 2, 3...
+en el orden del archivo, así que no se descartan y una reimportación del
+mismo archivo vuelve a producir las mismas huellas.
+"""
+import codecs
+import csv
+import io
+import time
+import unicodedata
+from collections import Counter
+from datetime import date, datetime
+from itertools import chain, islice
+from typing import IO, Any, Iterable, Iterator, Optional
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.constants import CATEGORIAS, FORMAS_PAGO, GASTO_X_MES, MESES, TAGS, TIPOS_GASTO
+from app.middleware.error_handler import format_validation_errors
+from app.models.gasto import Gasto
+from app.schemas.gasto import GastoImport
+from app.api.controllers.gastos import invalidate_caches
+from app.api.controllers.gastos_rollup import ROLLUP_KEYS, rollup_upsert_from_select
+
+# Columnas que se cargan (las de GastoImport, en su orden)
+IMPORT_FIELDS = tuple(GastoImport.model_fields)
+
+# Filas validadas que se envían en cada COPY
+IMPORT_CHUNK_SIZE = 5000
+
+# Caracteres del inicio del CSV con los que se detecta el delimitador
+CSV_SAMPLE_SIZE = 8192
+
+# Máximo de rechazos detallados en el reporte (el conteo siempre es completo)
+MAX_RECHAZOS = 1000
+
+# Hoja del libro heredado (vTS/Dashboard gastos_v1.0.xlsx) con los gastos
+HOJA_GASTOS = "unificado_v4"
+
+# Encabezados alternativos (ya normalizados) -> campo de GastoImport
+HEADER_ALIASES = {
+    "ano": "anio",
+    "fecha": "fecha_cargo",
+    "descripcion": "concepto",
+    "importe": "monto",
+}
+
+# Catálogos que deben respetar los valores importados
+CATALOGOS = {
+    "tipo_gasto": TIPOS_GASTO,
+    "categoria": CATEGORIAS,
+    "forma_pago": FORMAS_PAGO,
+    "mes": MESES,
+    "tag": TAGS,
+    "gasto_x_mes": GASTO_X_MES,
+}
+
+# Valores booleanos del libro de Excel ("Sí"/"No")
+BOOLEANOS = {"si": True, "no": False}
+
+STAGING_TABLE = "gastos_import_staging"
+staging = table(STAGING_TABLE, *[column(field) for field in IMPORT_FIELDS])
+
+
+def _sin_acentos(value: str) -> str:
+    """Quitar acentos y diacríticos ("año" -> "ano")"""
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", value) if not unicodedata.combining(c)
+    )
+
+
+def normalize_header(value: Any) -> str:
+    """Normalizar un encabezado a nombre de campo"""
+    name = _sin_acentos(str(value or "")).strip().lower().replace(" ", "_")
+    return HEADER_ALIASES.get(name, name)
+
+
+def _clean_value(field: str, value: Any) -> Any:
+    """Adaptar un valor crudo de CSV/Excel al formato que espera GastoImport"""
+    if isinstance(value, datetime):
+        return value.date()
+    if not isinstance(value, str):
+        return value
+    
+    value = value.strip()
+    if field in ("a_pagos", "se_divide"):
+        return BOOLEANOS.get(_sin_acentos(value).lower(), value)
+    if field == "monto":
+        return value.replace("$", "").replace(",", "").replace(" ", "")
+    if field in ("fecha_cargo", "fecha_pago") and "/" in value:
+        try:
+            return datetime.strptime(value, "%d/%m/%Y").date()
+        except ValueError:
+            return value
+    return value
+
+
+def validate_row(datos: dict) -> tuple[Optional[GastoImport], list]:
+    """
+    Validar una fila cruda. Devuelve (gasto, []) o (None, errores).
+    
+    Los campos vacíos se omiten para que apliquen los valores por defecto.
+    """
+    valores = {
+        field: _clean_value(field, value)
+        for field, value in datos.items()
+        if field in IMPORT_FIELDS and value is not None and value != ""
+    }
+    # Postgres no admite el carácter NUL en texto (COPY fallaría)
+    con_nul = [
+        {"field": field, "message": "El valor contiene el carácter NUL", "type": "nul"}
+        for field, value in valores.items()
+        if isinstance(value, str) and "\x00" in value
+    ]
+    if con_nul:
+        return None, con_nul
+    
+    try:
+        gasto = GastoImport.model_validate(valores)
+    except ValidationError as exc:
+        return None, format_validation_errors(exc.errors())
+    
+    errores = [
+        {
+            "field": field,
+            "message": f"Valor '{getattr(gasto, field)}' fuera del catálogo",
+            "type": "catalog"
+        }
+        for field, catalogo in CATALOGOS.items()
+        if getattr(gasto, field) not in catalogo
+    ]
+    return (None, errores) if errores else (gasto, [])
+
+
+def decode_lines(archivo: IO[bytes], encoding: str) -> Iterator[str]:
+    """
+    Decodificar un archivo de texto línea por línea.
+    
+    Un byte inválido en la codificación se reporta (400) con el número de
+    línea del archivo, que coincide con el de fila salvo campos multilínea.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    numero = 0
+    try:
+        for numero, linea in enumerate(archivo, start=1):
+            yield decoder.decode(linea)
+        resto = decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"La fila {max(numero, 1)} no es texto {encoding} válido ({exc.reason}); "
+                "indique la codificación del archivo con encoding (p. ej. latin-1 o cp1252)"
+            )
+        )
+    if resto:
+        yield resto
+
+
+def iter_csv_rows(lineas: Iterable[str]) -> Iterator[tuple[int, dict]]:
+    """
+    Leer un CSV fila por fila como (número de fila, {campo: valor}).
+    
+    El delimitador se detecta con las primeras líneas del archivo (los estados
+    de cuenta bancarios suelen usar ';'). Un CSV mal formado se reporta (400)
+    con el número de fila.
+    """
+    lineas = iter(lineas)
+    muestra = []
+    for linea in lineas:
+        muestra.append(linea)
+        if sum(map(len, muestra)) >= CSV_SAMPLE_SIZE:
+            break
+    try:
+        dialect = csv.Sniffer().sniff("".join(muestra), delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    
+    reader = csv.reader(chain(muestra, lineas), dialect)
+    try:
+        header = [normalize_header(value) for value in next(reader, [])]
+        if "concepto" not in header or "monto" not in header:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El CSV no tiene encabezados de gastos (se requieren al menos concepto y monto)"
+            )
+    
+        for numero, valores in enumerate(reader, start=2):
+            if any(value.strip() for value in valores):
+                yield numero, dict(zip(header, valores))
+    except csv.Error as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV inválido en la fila {reader.line_num}: {exc}"
+        )
+
+
+def iter_xlsx_rows(archivo: Any, hoja: Optional[str] = None) -> Iterator[tuple[int, dict]]:
+    """
+    Leer una hoja de Excel fila por fila como (número de fila, {campo: valor}).
+    
+    Se usa el modo read_only de openpyxl, que no carga el libro completo. El
+    encabezado se busca en las primeras filas (el libro heredado deja filas y
+    columnas vacías antes de la tabla).
+    """
+    try:
+        import openpyxl
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La importación de Excel requiere el paquete openpyxl"
+        )
+    
+    libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        nombre = hoja or (HOJA_GASTOS if HOJA_GASTOS in libro.sheetnames else libro.sheetnames[0])
+        if nombre not in libro.sheetnames:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"La hoja '{nombre}' no existe en el archivo"
+            )
+    
+        filas = enumerate(libro[nombre].iter_rows(values_only=True), start=1)
+        header = None
+        for _, valores in islice(filas, 20):
+            candidato = [normalize_header(value) for value in valores]
+            if "concepto" in candidato and "monto" in candidato:
+                header = candidato
+                break
+        if header is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No se encontraron encabezados de gastos en la hoja '{nombre}'"
+            )
+    
+        for numero, valores in filas:
+            if any(value not in (None, "") for value in valores):
+                yield numero, dict(zip(header, valores))
+    finally:
+        libro.close()
+
+
+def iter_file_rows(
+    archivo: IO[bytes],
+    nombre: str,
+    hoja: Optional[str] = None,
+    encoding: str = "utf-8-sig"
+) -> Iterator[tuple[int, dict]]:
+    """Elegir el lector según la extensión del archivo (.csv o .xlsx)"""
+    extension = nombre.rsplit(".", 1)[-1].lower() if "." in nombre else ""
+    if extension in ("xlsx", "xlsm"):
+        return iter_xlsx_rows(archivo, hoja)
+    if extension in ("csv", "txt"):
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Codificación desconocida: {encoding}"
+            )
+        return iter_csv_rows(decode_lines(archivo, encoding))
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Formato no soportado: se aceptan archivos .csv y .xlsx"
+    )
+
+
+def _copy_value(value: Any) -> Any:
+    """Valor para el CSV de COPY"""
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _copy_chunk(db: Session, gastos: list) -> None:
+    """Enviar un lote de gastos validados a la tabla de staging con COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for gasto in gastos:
+        writer.writerow([_copy_value(getattr(gasto, field)) for field in IMPORT_FIELDS])
+    buffer.seek(0)
+    
+    # COPY necesita el cursor de psycopg2 de la conexión de la transacción
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(IMPORT_FIELDS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def import_gastos(
+    db: Session,
+    filas: Iterable[tuple[int, dict]],
+    chunk_size: int = IMPORT_CHUNK_SIZE
+) -> dict:
+    """
+    Importar gastos en una sola transacción.
+    
+    Las filas rechazadas no detienen la importación: se reportan con su número
+    de fila y sus errores. Devuelve el reporte con conteos y filas por segundo.
+    """
+    inicio = time.perf_counter()
+    columnas = ", ".join(IMPORT_FIELDS)
+    db.execute(text(
+        f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS "
+        f"SELECT {columnas} FROM {Gasto.__tablename__} WITH NO DATA"
+    ))
+    
+    leidas = 0
+    validas = 0
+    total_rechazadas = 0
+    rechazos = []
+    lote = []
+    ocurrencias = Counter()
+    for numero, datos in filas:
+        leidas += 1
+        gasto, errores = validate_row(datos)
+        if errores:
+            total_rechazadas += 1
+            if len(rechazos) < MAX_RECHAZOS:
+                rechazos.append({"fila": numero, "errors": errores})
+            continue
+    
+        validas += 1
+        if "ocurrencia" not in gasto.model_fields_set:
+            huella = (gasto.concepto, gasto.monto, gasto.fecha_cargo, gasto.forma_pago)
+            ocurrencias[huella] += 1
+            gasto.ocurrencia = ocurrencias[huella]
+        lote.append(gasto)
+        if len(lote) >= chunk_size:
+            _copy_chunk(db, lote)
+            lote = []
+    if lote:
+        _copy_chunk(db, lote)
+    
+    # Un solo statement: insertar lo que no esté duplicado (por huella) y sumar
+    # al resumen sólo las filas realmente insertadas
+    insertados = (
+        insert(Gasto)
+        .from_select(IMPORT_FIELDS, select(*[staging.c[field] for field in IMPORT_FIELDS]))
+        .on_conflict_do_nothing(index_elements=[Gasto.fingerprint])
+        .returning(*[getattr(Gasto, key) for key in ROLLUP_KEYS], Gasto.monto)
+        .cte("insertados")
+    )
+    total_insertados = db.execute(
+        select(func.count())
+        .select_from(insertados)
+        .add_cte(rollup_upsert_from_select(insertados).cte("rollup"))
+    ).scalar()
+    
+    db.commit()
+    invalidate_caches()
+    
+    segundos = time.perf_counter() - inicio
+    return {
+        "filas_leidas": leidas,
+        "insertados": total_insertados,
+        "duplicados": validas - total_insertados,
+        "rechazados": total_rechazadas,
+        "segundos": round(segundos, 3),
+        "filas_por_segundo": round(leidas / segundos) if segundos else None,
+        "rechazos": rechazos,
+    }
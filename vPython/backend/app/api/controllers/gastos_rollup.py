@@ -0,0 +1,118 @@
+"""
+Mantenimiento del resumen mensual de Gastos (gastos_rollup)
+"""
+from decimal import Decimal
+from typing import Iterable
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import Insert, insert
+from app.models.gasto import Gasto
+from app.models.gasto_rollup import GastoRollup
+from app.api.controllers.table_versions import bump_table_version
+
+# Columnas que forman la llave del resumen
+ROLLUP_KEYS = ("anio", "mes", "tipo_gasto", "categoria", "forma_pago")
+
+
+def rollup_key(gasto: Gasto) -> dict:
+    """Extraer la llave del resumen y el monto de un gasto"""
+    values = {key: getattr(gasto, key) for key in ROLLUP_KEYS}
+    values["monto"] = gasto.monto
+    return values
+
+
+def apply_rollup_delta(db: Session, values: dict, signo: int) -> None:
+    """
+    Sumar (signo=1) o restar (signo=-1) un gasto en su fila del resumen.
+    
+    No hace commit: se ejecuta dentro de la transacción de la escritura del
+    gasto para que ambas tablas queden consistentes.
+    """
+    apply_rollup_deltas(db, [(values, signo)])
+
+
+def apply_rollup_deltas(db: Session, cambios: Iterable[tuple[dict, int]]) -> None:
+    """
+    Aplicar varios (valores, signo) al resumen con un solo upsert multi-fila.
+    
+    Los cambios se agregan primero por llave, de modo que cada fila del resumen
+    se toca una sola vez sin importar cuántos gastos la afecten.
+    """
+    deltas: dict[tuple, list] = {}
+    for values, signo in cambios:
+        key = tuple(values[k] for k in ROLLUP_KEYS)
+        delta = deltas.setdefault(key, [Decimal(0), 0])
+        delta[0] += Decimal(values["monto"]) * signo
+        delta[1] += signo
+    
+    deltas = {key: delta for key, delta in deltas.items() if delta != [0, 0]}
+    if not deltas:
+        return
+    
+    stmt = insert(GastoRollup).values([
+        {**dict(zip(ROLLUP_KEYS, key)), "total": total, "cantidad": cantidad}
+        for key, (total, cantidad) in deltas.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEYS),
+        set_={
+            "total": GastoRollup.total + stmt.excluded.total,
+            "cantidad": GastoRollup.cantidad + stmt.excluded.cantidad
+        }
+    )
+    db.execute(stmt)
+    
+    # Quitar las filas que se quedaron sin gastos
+    disminuidas = [key for key, (_, cantidad) in deltas.items() if cantidad < 0]
+    if disminuidas:
+        db.execute(
+            delete(GastoRollup).where(
+                tuple_(*[getattr(GastoRollup, k) for k in ROLLUP_KEYS]).in_(disminuidas),
+                GastoRollup.cantidad <= 0
+            )
+        )
+
+
+def rollup_upsert_from_select(source) -> Insert:
+    """
+    Construir el upsert que suma al resumen los gastos de una tabla o subconsulta.
+    
+    `source` debe exponer las columnas de ROLLUP_KEYS y monto (por ejemplo la
+    tabla de staging de una importación o un CTE con RETURNING). Se agrega en
+    SQL y se aplica con un solo INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+    """
+    columns = [source.c[k] for k in ROLLUP_KEYS]
+    stmt = insert(GastoRollup).from_select(
+        [*ROLLUP_KEYS, "total", "cantidad"],
+        select(*columns, func.sum(source.c.monto), func.count()).group_by(*columns)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEYS),
+        set_={
+            "total": GastoRollup.total + stmt.excluded.total,
+            "cantidad": GastoRollup.cantidad + stmt.excluded.cantidad
+        }
+    )
+
+
+def rebuild_rollup(db: Session) -> int:
+    """
+    Reconstruir el resumen completo a partir de la tabla gastos.
+    
+    Bloquea las escrituras sobre gastos mientras se reconstruye (las lecturas
+    siguen permitidas) e incrementa la versión de gastos, porque el dashboard
+    puede cambiar. Devuelve el número de filas del resumen.
+    """
+    db.execute(text(f"LOCK TABLE {Gasto.__tablename__} IN SHARE MODE"))
+    db.execute(delete(GastoRollup))
+    
+    columns = [getattr(Gasto, k) for k in ROLLUP_KEYS]
+    db.execute(
+        insert(GastoRollup).from_select(
+            [*ROLLUP_KEYS, "total", "cantidad"],
+            select(*columns, func.sum(Gasto.monto), func.count()).group_by(*columns)
+        )
+    )
+    bump_table_version(db, Gasto.__tablename__)
+    db.commit()
+    return db.query(func.count()).select_from(GastoRollup).scalar()
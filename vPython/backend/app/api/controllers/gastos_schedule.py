@@ -0,0 +1,157 @@
+"""
+Calendario de pagos de gastos MSI/MCI
+
+Cada gasto MSI/MCI es la mensualidad `no_mens` de un plan de `total_meses`,
+por `monto` y pagada en `fecha_pago`. Un plan se registra con una fila por
+mensualidad o sólo con la última; en ambos casos se toma la mensualidad más
+avanzada de cada plan (misma compra: concepto, forma de pago, monto, plazo y
+mes de inicio) y se expande con generate_series en sus mensualidades
+restantes, una por mes a partir de su fecha_pago.
+
+Todo se resuelve en una sola consulta: DISTINCT ON para los planes, un
+generate_series lateral para las mensualidades y GROUPING SETS para los
+totales por mes, por forma de pago y por ambos.
+"""
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import Date, and_, cast, distinct, func, literal_column, select, true, tuple_
+from sqlalchemy.orm import Session
+from app.models.gasto import Gasto, TIPOS_A_PAGOS
+
+UN_MES = literal_column("interval '1 month'")
+
+# Máscaras de GROUPING(mes, forma_pago): bit en 1 = columna agregada
+_GRUPO_MES_FORMA = 0b00
+_GRUPO_MES = 0b01
+_GRUPO_FORMA = 0b10
+_GRUPO_TOTAL = 0b11
+
+
+def _inicio_de_mes(fecha: date) -> date:
+    return fecha.replace(day=1)
+
+
+def _sumar_meses(fecha: date, meses: int) -> date:
+    """Primer día del mes `meses` después de `fecha`"""
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _planes(forma_pago: Optional[List[str]] = None):
+    """CTE con la mensualidad más avanzada de cada plan con pagos pendientes"""
+    base = func.greatest(Gasto.no_mens, 1)
+    inicio = func.date_trunc("month", Gasto.fecha_pago - (base - 1) * UN_MES)
+    plan = (Gasto.concepto, Gasto.forma_pago, Gasto.monto, Gasto.total_meses, inicio)
+    
+    filters = [Gasto.tipo_gasto.in_(TIPOS_A_PAGOS), Gasto.total_meses > 0, Gasto.no_mens <= Gasto.total_meses]
+    if forma_pago:
+        filters.append(Gasto.forma_pago.in_(forma_pago))
+    
+    return (
+        select(
+            Gasto.id,
+            Gasto.forma_pago,
+            Gasto.monto,
+            Gasto.fecha_pago,
+            base.label("base"),
+            Gasto.total_meses
+        )
+        .where(and_(*filters))
+        .distinct(*plan)
+        .order_by(*plan, Gasto.no_mens.desc(), Gasto.id.desc())
+        .cte("planes")
+    )
+
+
+def get_msi_mci_schedule(
+    db: Session,
+    months: int = 24,
+    desde: Optional[date] = None,
+    forma_pago: Optional[List[str]] = None
+) -> dict:
+    """
+    Proyectar las mensualidades de `months` meses a partir de `desde`.
+    
+    `desde` es por defecto el mes actual. Devuelve los totales por mes (todos
+    los meses del rango, incluso en cero), por forma de pago y por mes y forma
+    de pago, además del total y el número de planes con pagos en el rango.
+    """
+    inicio = _inicio_de_mes(desde or date.today())
+    fin = _sumar_meses(inicio, months)
+    
+    planes = _planes(forma_pago)
+    mensualidad = func.generate_series(planes.c.base, planes.c.total_meses).table_valued("n").render_derived()
+    fecha = cast(planes.c.fecha_pago + (mensualidad.c.n - planes.c.base) * UN_MES, Date)
+    pagos = (
+        select(
+            planes.c.id,
+            planes.c.forma_pago,
+            planes.c.monto,
+            cast(func.date_trunc("month", fecha), Date).label("mes")
+        )
+        .select_from(planes)
+        .join(mensualidad, true())
+        .where(fecha >= inicio, fecha < fin)
+        .subquery("pagos")
+    )
+    
+    grupo = func.grouping(pagos.c.mes, pagos.c.forma_pago).label("grupo")
+    rows = db.execute(
+        select(
+            grupo,
+            pagos.c.mes,
+            pagos.c.forma_pago,
+            func.sum(pagos.c.monto).label("total"),
+            func.count().label("pagos"),
+            func.count(distinct(pagos.c.id)).label("planes")
+        ).group_by(
+            func.grouping_sets(
+                tuple_(pagos.c.mes, pagos.c.forma_pago),
+                tuple_(pagos.c.mes),
+                tuple_(pagos.c.forma_pago),
+                tuple_()
+            )
+        )
+    ).all()
+    
+    por_mes = {
+        _sumar_meses(inicio, i): {"mes": _sumar_meses(inicio, i).strftime("%Y-%m"), "total": 0.0, "pagos": 0}
+        for i in range(months)
+    }
+    por_forma_pago = []
+    por_mes_forma_pago = []
+    total = 0.0
+    activos = 0
+    for row in rows:
+        if row.grupo == _GRUPO_TOTAL:
+            total = float(row.total or 0)
+            activos = row.planes
+        elif row.grupo == _GRUPO_MES:
+            por_mes[row.mes].update(total=float(row.total), pagos=row.pagos)
+        elif row.grupo == _GRUPO_FORMA:
+            por_forma_pago.append({
+                "forma_pago": row.forma_pago,
+                "total": float(row.total),
+                "pagos": row.pagos,
+                "planes": row.planes
+            })
+        elif row.grupo == _GRUPO_MES_FORMA:
+            por_mes_forma_pago.append({
+                "mes": row.mes.strftime("%Y-%m"),
+                "forma_pago": row.forma_pago,
+                "total": float(row.total),
+                "pagos": row.pagos
+            })
+    
+    por_forma_pago.sort(key=lambda item: -item["total"])
+    por_mes_forma_pago.sort(key=lambda item: (item["mes"], item["forma_pago"]))
+    
+    return {
+        "desde": inicio.isoformat(),
+        "meses": months,
+        "total": total,
+        "planes_activos": activos,
+        "por_mes": list(por_mes.values()),
+        "por_forma_pago": por_forma_pago,
+        "por_mes_forma_pago": por_mes_forma_pago
+    }
@@ -0,0 +1,123 @@
+"""
+Búsqueda de gastos por concepto (parámetro q de /api/gastos)
+
+Se combinan dos mecanismos con OR, ambos con índice GIN:
+
+- concepto_tsv, columna generada to_tsvector('spanish', concepto): palabras
+  con stemming en español y por prefijo ("netfl" encuentra "Netflix").
+- pg_trgm, si la extensión está instalada (la migración e8d24b7c9f51 crea
+  ix_gastos_concepto_trgm sólo en ese caso): subcadenas ("uber" dentro de
+  "Uber Eats") y errores de escritura ("netflx") con word_similarity.
+
+Sin pg_trgm la búsqueda sigue funcionando, sólo por palabras y prefijos.
+Los resultados se ordenan por relevancia (similitud de trigramas o
+ts_rank) y después por fecha.
+"""
+import re
+from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, literal, literal_column, or_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.elements import ColumnElement
+from app.core.logger import logger
+from app.db.base import async_engine, engine
+from app.models.gasto import Gasto, SEARCH_CONFIG
+
+# Longitud máxima de q
+MAX_QUERY_CHARS = 100
+
+_trigram: Optional[bool] = None
+
+
+def detect_trigram(conn: Connection) -> bool:
+    """Consultar si pg_trgm está instalada y recordarlo en este proceso"""
+    global _trigram
+    _trigram = bool(conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+    ).scalar())
+    return _trigram
+
+
+def _detect_trigram_sync() -> bool:
+    """detect_trigram con una conexión del engine síncrono"""
+    with engine.connect() as conn:
+        return detect_trigram(conn)
+
+
+async def init_trigram() -> None:
+    """
+    Detectar pg_trgm al arrancar el worker (lifespan de app.main).
+    
+    Usa el engine de las rutas: con DB_ASYNC, asyncpg sin bloquear el event
+    loop ni ocupar el pool síncrono. Si la base no responde se detecta en la
+    primera búsqueda.
+    """
+    try:
+        if async_engine is not None:
+            async with async_engine.connect() as conn:
+                await conn.run_sync(detect_trigram)
+        else:
+            await run_in_threadpool(_detect_trigram_sync)
+    except DBAPIError:
+        logger.exception("No se pudo detectar pg_trgm al arrancar")
+
+
+def trigram_available() -> bool:
+    """
+    Si pg_trgm está instalada.
+    
+    La API lo detecta al arrancar (init_trigram); los comandos y benchmarks,
+    que no pasan por el lifespan, lo consultan la primera vez con el engine
+    síncrono.
+    """
+    if _trigram is None:
+        _detect_trigram_sync()
+    return _trigram
+
+
+def _terms(q: str) -> List[str]:
+    """Palabras de la búsqueda (sólo caracteres de palabra: no hay sintaxis de tsquery)"""
+    return re.findall(r"\w+", q.lower())
+
+
+def _tsquery(q: str) -> Optional[ColumnElement]:
+    """tsquery con todas las palabras como prefijo ("uber eats" -> uber:* & eats:*)"""
+    terms = _terms(q)
+    if not terms:
+        return None
+    return func.to_tsquery(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"),
+        " & ".join(f"{term}:*" for term in terms)
+    )
+
+
+def search_condition(q: str) -> ColumnElement:
+    """Condición de búsqueda de `q` sobre el concepto"""
+    q = q.strip()
+    conditions = []
+    
+    tsquery = _tsquery(q)
+    if tsquery is not None:
+        conditions.append(Gasto.concepto_tsv.bool_op("@@")(tsquery))
+    
+    if trigram_available():
+        conditions.append(Gasto.concepto.icontains(q, autoescape=True))
+        conditions.append(literal(q).bool_op("<%")(Gasto.concepto))
+    elif tsquery is None:
+        # Sin palabras ni trigramas sólo queda la subcadena (sin índice)
+        conditions.append(Gasto.concepto.icontains(q, autoescape=True))
+    
+    return or_(*conditions)
+
+
+def search_rank(q: str) -> ColumnElement:
+    """Relevancia de cada gasto para `q` (mayor es mejor)"""
+    q = q.strip()
+    if trigram_available():
+        return func.word_similarity(q, Gasto.concepto)
+    
+    tsquery = _tsquery(q)
+    if tsquery is None:
+        return literal(0)
+    return func.ts_rank(Gasto.concepto_tsv, tsquery)
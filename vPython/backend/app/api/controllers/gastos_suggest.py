@@ -0,0 +1,145 @@
+"""
+Autocompletado de conceptos de gastos (/api/gastos/suggest)
+
+Cada worker guarda en memoria los conceptos distintos con su frecuencia y
+su combinación más usada de tipo_gasto, forma_pago y categoría, ordenados por
+clave normalizada (minúsculas, sin acentos). Un prefijo se resuelve con dos
+búsquedas binarias sobre ese arreglo y se eligen los más frecuentes del
+rango, sin tocar la base de datos.
+
+El índice se descarta en cada escritura de este worker (invalidate_caches) y
+se reconstruye cuando cambia la versión de gastos (table_versions), que se
+consulta como máximo cada SUGGEST_VERSION_CHECK_SECONDS: las escrituras de
+otros workers se reflejan con ese retraso. Si hay más de
+SUGGEST_MAX_COMBINACIONES combinaciones distintas no se guarda en memoria y
+cada consulta usa el índice ix_gastos_concepto_clave (LIKE 'prefijo%').
+"""
+import heapq
+import time
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.gasto import Gasto, concepto_clave, normalize_concepto
+from app.api.controllers.table_versions import get_table_versions
+
+# Combinaciones distintas de (concepto, tipo_gasto, forma_pago, categoría) a
+# partir de las cuales no se usa el índice en memoria
+SUGGEST_MAX_COMBINACIONES = 200_000
+
+# Intervalo entre lecturas de la versión de gastos (escrituras de otros workers)
+SUGGEST_VERSION_CHECK_SECONDS = 1.0
+
+
+class Sugerencia(NamedTuple):
+    clave: str
+    concepto: str
+    frecuencia: int
+    tipo_gasto: str
+    forma_pago: str
+    categoria: str
+    
+    def as_dict(self) -> dict:
+        return {
+            "concepto": self.concepto,
+            "frecuencia": self.frecuencia,
+            "tipo_gasto": self.tipo_gasto,
+            "forma_pago": self.forma_pago,
+            "categoria": self.categoria
+        }
+
+
+class ConceptoIndex:
+    """Conceptos ordenados por clave para búsquedas por prefijo"""
+    
+    def __init__(self, version: int, sugerencias: Optional[List[Sugerencia]]):
+        self.version = version
+        self.checked_at = time.monotonic()
+        # None: demasiados conceptos, se consulta la base de datos
+        self.sugerencias = sorted(sugerencias) if sugerencias is not None else None
+        self.claves = [s.clave for s in self.sugerencias] if self.sugerencias is not None else None
+    
+    def search(self, prefijo: str, limit: int) -> List[Sugerencia]:
+        """Los `limit` conceptos más frecuentes cuya clave empieza con `prefijo`"""
+        inicio = bisect_left(self.claves, prefijo)
+        fin = bisect_left(self.claves, prefijo + "\U0010ffff", inicio)
+        return heapq.nlargest(limit, self.sugerencias[inicio:fin], key=lambda s: (s.frecuencia, s.concepto))
+
+
+_index: Optional[ConceptoIndex] = None
+
+
+def _combinaciones_query():
+    """
+    Gastos por (concepto, tipo_gasto, forma_pago, categoría).
+    
+    Un solo HashAggregate: es bastante más barato que calcular mode() de
+    cada columna, y la combinación más usada es coherente (se usó junta).
+    """
+    columns = (Gasto.concepto, Gasto.tipo_gasto, Gasto.forma_pago, Gasto.categoria)
+    return select(*columns, func.count().label("frecuencia")).group_by(*columns)
+
+
+def _sugerencias(rows) -> List[Sugerencia]:
+    """Una sugerencia por concepto: frecuencia total y combinación más usada"""
+    conceptos = {}
+    for row in rows:
+        actual = conceptos.get(row.concepto)
+        if actual is None:
+            conceptos[row.concepto] = [row.frecuencia, row]
+            continue
+        actual[0] += row.frecuencia
+        if row.frecuencia > actual[1].frecuencia:
+            actual[1] = row
+    return [
+        Sugerencia(normalize_concepto(concepto), concepto, frecuencia, row.tipo_gasto, row.forma_pago, row.categoria)
+        for concepto, (frecuencia, row) in conceptos.items()
+    ]
+
+
+def _build_index(db: Session, version: int) -> ConceptoIndex:
+    rows = db.execute(_combinaciones_query().limit(SUGGEST_MAX_COMBINACIONES + 1)).all()
+    if len(rows) > SUGGEST_MAX_COMBINACIONES:
+        return ConceptoIndex(version, None)
+    return ConceptoIndex(version, _sugerencias(rows))
+
+
+def _search_db(db: Session, prefijo: str, limit: int) -> List[Sugerencia]:
+    """Búsqueda por prefijo con el índice ix_gastos_concepto_clave"""
+    patron = prefijo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    rows = db.execute(
+        _combinaciones_query().where(concepto_clave(Gasto.concepto).like(patron, escape="\\"))
+    ).all()
+    return heapq.nlargest(limit, _sugerencias(rows), key=lambda s: (s.frecuencia, s.concepto))
+
+
+def suggest_conceptos(db: Session, prefijo: str, limit: int = 10) -> List[dict]:
+    """
+    Conceptos ya usados que empiezan con `prefijo` (sin distinguir mayúsculas
+    ni acentos), de más a menos frecuente, con la combinación de tipo de
+    gasto, forma de pago y categoría que más se usa con cada uno.
+    """
+    global _index
+    prefijo = normalize_concepto(prefijo.strip())
+    if not prefijo:
+        return []
+    
+    index = _index
+    if index is None or time.monotonic() - index.checked_at >= SUGGEST_VERSION_CHECK_SECONDS:
+        version = get_table_versions(db, ("gastos",))["gastos"]
+        # Con demasiadas combinaciones no se vuelve a intentar hasta reiniciar
+        if index is None or (index.sugerencias is not None and index.version != version):
+            index = _index = _build_index(db, version)
+        else:
+            index.checked_at = time.monotonic()
+    
+    if index.sugerencias is None:
+        return [s.as_dict() for s in _search_db(db, prefijo, limit)]
+    return [s.as_dict() for s in index.search(prefijo, limit)]
+
+
+def clear_suggest_cache() -> None:
+    """Descartar el índice en memoria (se reconstruye en la siguiente consulta)"""
+    global _index
+    if _index is not None and _index.sugerencias is not None:
+        _index = None
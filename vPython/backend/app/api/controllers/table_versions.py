@@ -0,0 +1,29 @@
+"""
+Controlador de versiones de tabla (ETag)
+"""
+from typing import Dict, Sequence
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.table_version import TableVersion
+
+
+def get_table_versions(db: Session, tablas: Sequence[str]) -> Dict[str, int]:
+    """Versión actual de cada tabla (0 si aún no tiene registro)"""
+    rows = db.query(TableVersion.tabla, TableVersion.version).filter(TableVersion.tabla.in_(tablas)).all()
+    versions = dict.fromkeys(tablas, 0)
+    versions.update(rows)
+    return versions
+
+
+def bump_table_version(db: Session, tabla: str) -> None:
+    """
+    Incrementar la versión de `tabla` en la transacción actual.
+    
+    Para cambios que no pasan por los triggers de la tabla pero alteran lo
+    que devuelven sus lecturas (p. ej. reconstruir gastos_rollup).
+    """
+    stmt = insert(TableVersion).values(tabla=tabla, version=1)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[TableVersion.tabla],
+        set_={"version": TableVersion.version + 1}
+    ))
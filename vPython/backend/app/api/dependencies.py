@@ -0,0 +1,30 @@
+"""
+Dependencias compartidas por las rutas
+"""
+from typing import Callable
+from fastapi import Depends, HTTPException, Request, status
+from app.core.etag import etag_matches, make_etag
+from app.db.base import DbSession, get_db_session, run_db
+from app.api.controllers.table_versions import get_table_versions
+
+
+def conditional_get(*tablas: str) -> Callable:
+    """
+    Dependencia de GET condicional para lecturas de `tablas`.
+    
+    Lee las versiones de las tablas (una consulta por llave primaria) y, si
+    el cliente ya tiene esa representación (If-None-Match), responde 304 sin
+    ejecutar la ruta. En otro caso deja el ETag en request.state para que el
+    middleware lo agregue a la respuesta, y las versiones para las cachés
+    (cached_json, totales de gastos).
+    """
+    async def dependency(request: Request, db: DbSession = Depends(get_db_session)) -> str:
+        versions = await run_db(db, get_table_versions, tablas)
+        etag = make_etag(request, versions)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        request.state.etag = etag
+        request.state.table_versions = versions
+        return etag
+    
+    return dependency
@@ -1,71 +1,122 @@
 """
 Rutas de Balance
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.base import get_db
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from app.core.serialization import FastJSONResponse, rows_to_dicts
+from app.db.base import DbSession, get_db_session, run_db
 from app.schemas.balance import BalanceCreate, BalanceUpdate, BalanceResponse
+from app.api.dependencies import conditional_get
 from app.api.controllers import balance as controller
 
 router = APIRouter(prefix="/balance", tags=["balance"])
 
 
-@router.get("/")
-def get_balance(db: Session = Depends(get_db)):
-    """Obtener todos los balances"""
-    balances = controller.get_all_balance(db)
-    balances_response = []
-    for balance in balances:
-        balance_dict = balance.__dict__.copy()
-        balance_dict['tipo'] = controller.convert_tipo_to_long(balance.tipo)
-        balances_response.append(BalanceResponse.model_validate(balance_dict))
-    return {"success": True, "data": balances_response}
+@router.get("/", dependencies=[Depends(conditional_get("balance"))])
+async def get_balance(
+    tipo: Optional[List[str]] = Query(None),
+    con_diferencia: Optional[bool] = Query(None),
+    page: int = Query(1, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    paginacion: Optional[Literal["page", "cursor"]] = Query(None),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
+    db: DbSession = Depends(get_db_session)
+):
+    """
+    Obtener balances con filtros.
+    
+    Sin limit ni paginacion devuelve todos los balances. Con limit pagina por
+    page/limit; con paginacion=cursor (o enviando un cursor) usa paginación
+    por cursor y la respuesta incluye next_cursor.
+    """
+    filtros = dict(tipo=tipo, con_diferencia=con_diferencia)
+    
+    if paginacion == "cursor" or cursor:
+        limit = limit or 20
+        balances, next_cursor = await run_db(
+            db,
+            controller.get_balance_by_cursor,
+            cursor=cursor,
+            limit=limit,
+            **filtros
+        )
+        return FastJSONResponse({
+            "success": True,
+            "data": rows_to_dicts(balances, controller.BALANCE_KEYS),
+            "pagination": {
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
+            }
+        })
+    
+    if paginacion is None and limit is None:
+        balances = await run_db(db, controller.get_all_balance, **filtros)
+        return FastJSONResponse({
+            "success": True,
+            "data": rows_to_dicts(balances, controller.BALANCE_KEYS)
+        })
+    
+    limit = limit or 20
+    balances, total = await run_db(
+        db,
+        controller.get_balance_by_filters,
+        skip=(page - 1) * limit,
+        limit=limit,
+        include_total=include_total,
+        **filtros
+    )
+    return FastJSONResponse({
+        "success": True,
+        "data": rows_to_dicts(balances, controller.BALANCE_KEYS),
+        "pagination": {
+            "page": page,
+            "limit": limit,
+            "total": total,
+            "pages": (total + limit - 1) // limit if total is not None else None
+        }
+    })
 
 
-@router.get("/{balance_id}")
-def get_balance_by_id(balance_id: int, db: Session = Depends(get_db)):
+@router.get("/{balance_id}", dependencies=[Depends(conditional_get("balance"))])
+async def get_balance_by_id(balance_id: int, db: DbSession = Depends(get_db_session)):
     """Obtener balance por ID"""
-    balance = controller.get_balance_by_id(db, balance_id)
+    balance = await run_db(db, controller.get_balance_by_id, balance_id)
     if not balance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Balance con ID {balance_id} no encontrado"
         )
-    balance_dict = balance.__dict__.copy()
-    balance_dict['tipo'] = controller.convert_tipo_to_long(balance.tipo)
-    balance_response = BalanceResponse.model_validate(balance_dict)
+    balance_response = BalanceResponse.model_validate(balance)
     return {"success": True, "data": balance_response}
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_balance(balance: BalanceCreate, db: Session = Depends(get_db)):
+async def create_balance(balance: BalanceCreate, db: DbSession = Depends(get_db_session)):
     """Crear nuevo balance"""
-    new_balance = controller.create_balance(db, balance)
-    balance_dict = new_balance.__dict__.copy()
-    balance_dict['tipo'] = controller.convert_tipo_to_long(new_balance.tipo)
-    balance_response = BalanceResponse.model_validate(balance_dict)
+    new_balance = await run_db(db, controller.create_balance, balance)
+    balance_response = BalanceResponse.model_validate(new_balance)
     return {"success": True, "data": balance_response, "message": "Balance creado exitosamente"}
 
 
 @router.put("/{balance_id}")
-def update_balance(balance_id: int, balance: BalanceUpdate, db: Session = Depends(get_db)):
+async def update_balance(balance_id: int, balance: BalanceUpdate, db: DbSession = Depends(get_db_session)):
     """Actualizar balance"""
-    updated_balance = controller.update_balance(db, balance_id, balance)
+    updated_balance = await run_db(db, controller.update_balance, balance_id, balance)
     if not updated_balance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Balance con ID {balance_id} no encontrado"
         )
-    balance_dict = updated_balance.__dict__.copy()
-    balance_dict['tipo'] = controller.convert_tipo_to_long(updated_balance.tipo)
-    balance_response = BalanceResponse.model_validate(balance_dict)
+    balance_response = BalanceResponse.model_validate(updated_balance)
     return {"success": True, "data": balance_response, "message": "Balance actualizado exitosamente"}
 
 
 @router.delete("/{balance_id}")
-def delete_balance(balance_id: int, db: Session = Depends(get_db)):
+async def delete_balance(balance_id: int, db: DbSession = Depends(get_db_session)):
     """Eliminar balance"""
-    deleted = controller.delete_balance(db, balance_id)
+    deleted = await run_db(db, controller.delete_balance, balance_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,16 +1,20 @@
 """
 Rutas de Catálogos
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from app.core.response_cache import cached_json
 from app.core.constants import TIPOS_GASTO, CATEGORIAS, FORMAS_PAGO, MESES, TAGS, TAG_LABELS, GASTO_X_MES
 
 router = APIRouter(prefix="/catalogos", tags=["catalogos"])
 
+# Los catálogos sólo cambian con un despliegue
+CATALOGOS_CACHE_CONTROL = "public, max-age=3600"
+
 
 @router.get("/", response_model=dict)
-def get_catalogos():
+async def get_catalogos(request: Request):
     """Obtener todos los catálogos"""
-    return {
+    return await cached_json(request, lambda: {
         "success": True,
         "data": {
             "tipos_gasto": TIPOS_GASTO,
@@ -21,34 +25,54 @@ def get_catalogos():
             "tag_labels": TAG_LABELS,
             "gasto_x_mes": GASTO_X_MES
         }
-    }
+    }, cache_control=CATALOGOS_CACHE_CONTROL)
 
 
 @router.get("/tipos-gasto", response_model=dict)
-def get_tipos_gasto():
+async def get_tipos_gasto(request: Request):
     """Obtener catálogo de tipos de gasto"""
-    return {"success": True, "data": TIPOS_GASTO}
+    return await cached_json(
+        request,
+        lambda: {"success": True, "data": TIPOS_GASTO},
+        cache_control=CATALOGOS_CACHE_CONTROL
+    )
 
 
 @router.get("/categorias", response_model=dict)
-def get_categorias():
+async def get_categorias(request: Request):
     """Obtener catálogo de categorías"""
-    return {"success": True, "data": CATEGORIAS}
+    return await cached_json(
+        request,
+        lambda: {"success": True, "data": CATEGORIAS},
+        cache_control=CATALOGOS_CACHE_CONTROL
+    )
 
 
 @router.get("/formas-pago", response_model=dict)
-def get_formas_pago():
+async def get_formas_pago(request: Request):
     """Obtener catálogo de formas de pago"""
-    return {"success": True, "data": FORMAS_PAGO}
+    return await cached_json(
+        request,
+        lambda: {"success": True, "data": FORMAS_PAGO},
+        cache_control=CATALOGOS_CACHE_CONTROL
+    )
 
 
 @router.get("/meses", response_model=dict)
-def get_meses():
+async def get_meses(request: Request):
     """Obtener catálogo de meses"""
-    return {"success": True, "data": MESES}
+    return await cached_json(
+        request,
+        lambda: {"success": True, "data": MESES},
+        cache_control=CATALOGOS_CACHE_CONTROL
+    )
 
 
 @router.get("/tags", response_model=dict)
-def get_tags():
+async def get_tags(request: Request):
     """Obtener catálogo de tags"""
-    return {"success": True, "data": TAGS, "labels": TAG_LABELS}
+    return await cached_json(
+        request,
+        lambda: {"success": True, "data": TAGS, "labels": TAG_LABELS},
+        cache_control=CATALOGOS_CACHE_CONTROL
+    )
@@ -1,55 +1,128 @@
 """
 Rutas de Dashboard
 """
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.base import get_db
-from app.models.gasto import Gasto
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from app.core.response_cache import cached_json
+from app.core.serialization import FastJSONResponse
+from app.db.base import DbSession, get_db_session, run_db
+from app.api.dependencies import conditional_get
+from app.api.controllers import dashboard as controller
+from app.api.controllers import dashboard_analytics as analytics_controller
+from app.db.materialized_views import ANALYTICS_VERSION_KEY
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+# Los reportes dependen de las vistas (refrescos) y de gastos (campo pendiente)
+analytics_conditional_get = conditional_get("gastos", ANALYTICS_VERSION_KEY)
 
-@router.get("/", response_model=dict)
-def get_dashboard_data(db: Session = Depends(get_db)):
-    """Obtener datos del dashboard"""
-    
-    # Total de gastos
-    total_gastos = db.query(func.sum(Gasto.monto)).scalar() or 0
+
+@router.get("/", response_model=dict, dependencies=[Depends(conditional_get("gastos"))])
+async def get_dashboard_data(
+    request: Request,
+    tipo_gasto: Optional[List[str]] = Query(None),
+    categoria: Optional[List[str]] = Query(None),
+    forma_pago: Optional[List[str]] = Query(None),
+    mes: Optional[List[str]] = Query(None),
+    anio: Optional[int] = Query(None),
+    fecha_desde: Optional[str] = Query(None),
+    fecha_hasta: Optional[str] = Query(None),
+    a_pagos: Optional[bool] = Query(None),
+    se_divide: Optional[bool] = Query(None),
+    tag: Optional[str] = Query(None),
+    db: DbSession = Depends(get_db_session)
+):
+    """
+    Obtener datos del dashboard (acepta los mismos filtros que /api/gastos).
     
-    # Gastos por tipo
-    gastos_por_tipo = db.query(
-        Gasto.tipo_gasto,
-        func.sum(Gasto.monto).label('total')
-    ).group_by(Gasto.tipo_gasto).all()
+    La respuesta se guarda en la caché de respuestas hasta la siguiente
+    escritura de gastos (la única tabla que lee).
+    """
+    async def build():
+        data = await run_db(
+            db,
+            controller.get_dashboard_data,
+            tipo_gasto=tipo_gasto,
+            categoria=categoria,
+            forma_pago=forma_pago,
+            mes=mes,
+            anio=anio,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            a_pagos=a_pagos,
+            se_divide=se_divide,
+            tag=tag
+        )
+        return {"success": True, "data": data}
     
-    # Gastos por categoría
-    gastos_por_categoria = db.query(
-        Gasto.categoria,
-        func.sum(Gasto.monto).label('total')
-    ).group_by(Gasto.categoria).all()
+    return await cached_json(request, build)
+
+
+@router.get("/series", response_model=dict, dependencies=[Depends(conditional_get("gastos"))])
+async def get_dashboard_series(
+    request: Request,
+    granularidad: controller.Granularidad = Query("mes"),
+    desde: Optional[date] = Query(None, description="Por defecto, 24 meses o 52 semanas antes de `hasta`"),
+    hasta: Optional[date] = Query(None, description="Por defecto, la fecha actual"),
+    tipo_gasto: Optional[List[str]] = Query(None),
+    categoria: Optional[List[str]] = Query(None),
+    forma_pago: Optional[List[str]] = Query(None),
+    tag: Optional[str] = Query(None),
+    db: DbSession = Depends(get_db_session)
+):
+    """
+    Obtener los totales por mes o por semana en un rango de fechas.
     
-    # Gastos por mes
-    gastos_por_mes = db.query(
-        Gasto.mes,
-        func.sum(Gasto.monto).label('total')
-    ).group_by(Gasto.mes).all()
+    La serie es contigua (los intervalos sin gastos vienen en cero), lista
+    para graficar historiales de varios años.
+    """
+    async def build():
+        data = await run_db(
+            db,
+            controller.get_dashboard_series,
+            granularidad=granularidad,
+            desde=desde,
+            hasta=hasta,
+            tipo_gasto=tipo_gasto,
+            categoria=categoria,
+            forma_pago=forma_pago,
+            tag=tag
+        )
+        return {"success": True, "data": data}
     
-    return {
-        "success": True,
-        "data": {
-            "total_gastos": float(total_gastos),
-            "gastos_por_tipo": [
-                {"tipo": item[0], "total": float(item[1])}
-                for item in gastos_por_tipo
-            ],
-            "gastos_por_categoria": [
-                {"categoria": item[0], "total": float(item[1])}
-                for item in gastos_por_categoria
-            ],
-            "gastos_por_mes": [
-                {"mes": item[0], "total": float(item[1])}
-                for item in gastos_por_mes
-            ]
-        }
-    }
+    return await cached_json(request, build)
+
+
+@router.get("/categorias-mes", dependencies=[Depends(analytics_conditional_get)])
+async def get_categorias_mes(
+    anio: Optional[int] = Query(None, description="Por defecto, el año actual"),
+    por: analytics_controller.Dimension = Query("categoria"),
+    db: DbSession = Depends(get_db_session)
+):
+    """Tabla dinámica de categoría (o tipo de gasto) × mes de un año"""
+    data = await run_db(db, analytics_controller.get_categoria_mes, anio=anio, por=por)
+    return FastJSONResponse({"success": True, "data": data})
+
+
+@router.get("/top-conceptos", dependencies=[Depends(analytics_conditional_get)])
+async def get_top_conceptos(
+    anio: Optional[int] = Query(None, description="Por defecto, todos los años"),
+    categoria: str = Query("E"),
+    limit: int = Query(10, ge=1, le=100),
+    db: DbSession = Depends(get_db_session)
+):
+    """Conceptos con mayor monto de una categoría"""
+    data = await run_db(db, analytics_controller.get_top_conceptos, anio=anio, categoria=categoria, limit=limit)
+    return FastJSONResponse({"success": True, "data": data})
+
+
+@router.get("/formas-pago", dependencies=[Depends(analytics_conditional_get)])
+async def get_formas_pago(
+    anio: Optional[int] = Query(None, description="Por defecto, todos los años"),
+    categoria: Optional[List[str]] = Query(None),
+    db: DbSession = Depends(get_db_session)
+):
+    """Totales, promedio y máximo por forma de pago con desglose por tipo de gasto"""
+    data = await run_db(db, analytics_controller.get_formas_pago, anio=anio, categoria=categoria)
+    return FastJSONResponse({"success": True, "data": data})
@@ -2,26 +2,26 @@
 Rutas de Deudas
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.base import get_db
+from app.core.serialization import FastJSONResponse, rows_to_dicts
+from app.db.base import DbSession, get_db_session, run_db
 from app.schemas.deuda import DeudaCreate, DeudaUpdate, DeudaResponse
+from app.api.dependencies import conditional_get
 from app.api.controllers import deudas as controller
 
 router = APIRouter(prefix="/deudas", tags=["deudas"])
 
 
-@router.get("/")
-def get_deudas(db: Session = Depends(get_db)):
+@router.get("/", dependencies=[Depends(conditional_get("deudas"))])
+async def get_deudas(db: DbSession = Depends(get_db_session)):
     """Obtener todas las deudas"""
-    deudas = controller.get_all_deudas(db)
-    deudas_response = [DeudaResponse.model_validate(deuda) for deuda in deudas]
-    return {"success": True, "data": deudas_response}
+    deudas = await run_db(db, controller.get_all_deudas)
+    return FastJSONResponse({"success": True, "data": rows_to_dicts(deudas, controller.DEUDA_KEYS)})
 
 
-@router.get("/{deuda_id}")
-def get_deuda(deuda_id: int, db: Session = Depends(get_db)):
+@router.get("/{deuda_id}", dependencies=[Depends(conditional_get("deudas"))])
+async def get_deuda(deuda_id: int, db: DbSession = Depends(get_db_session)):
     """Obtener deuda por ID"""
-    deuda = controller.get_deuda_by_id(db, deuda_id)
+    deuda = await run_db(db, controller.get_deuda_by_id, deuda_id)
     if not deuda:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -32,17 +32,17 @@ def get_deuda(deuda_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_deuda(deuda: DeudaCreate, db: Session = Depends(get_db)):
+async def create_deuda(deuda: DeudaCreate, db: DbSession = Depends(get_db_session)):
     """Crear nueva deuda"""
-    new_deuda = controller.create_deuda(db, deuda)
+    new_deuda = await run_db(db, controller.create_deuda, deuda)
     deuda_response = DeudaResponse.model_validate(new_deuda)
     return {"success": True, "data": deuda_response, "message": "Deuda creada exitosamente"}
 
 
 @router.put("/{deuda_id}")
-def update_deuda(deuda_id: int, deuda: DeudaUpdate, db: Session = Depends(get_db)):
+async def update_deuda(deuda_id: int, deuda: DeudaUpdate, db: DbSession = Depends(get_db_session)):
     """Actualizar deuda"""
-    updated_deuda = controller.update_deuda(db, deuda_id, deuda)
+    updated_deuda = await run_db(db, controller.update_deuda, deuda_id, deuda)
     if not updated_deuda:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -53,9 +53,9 @@ def update_deuda(deuda_id: int, deuda: DeudaUpdate, db: Session = Depends(get_db
 
 
 @router.delete("/{deuda_id}")
-def delete_deuda(deuda_id: int, db: Session = Depends(get_db)):
+async def delete_deuda(deuda_id: int, db: DbSession = Depends(get_db_session)):
     """Eliminar deuda"""
-    deleted = controller.delete_deuda(db, deuda_id)
+    deleted = await run_db(db, controller.delete_deuda, deuda_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,18 +1,35 @@
 """
 Rutas de Gastos
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from app.db.base import get_db
-from app.schemas.gasto import GastoCreate, GastoUpdate, GastoResponse
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Tuple, Type
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Request, status, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from app.core.config import settings
+from app.core.serialization import FastJSONResponse, rows_to_csv, rows_to_dicts, rows_to_ndjson
+from app.db.base import AsyncSessionLocal, DbSession, SessionLocal, get_db_session, run_db
+from app.middleware.error_handler import format_validation_errors
+from app.schemas.gasto import GastoCreate, GastoUpdate, GastoBulkUpdate, GastoResponse
+from app.api.dependencies import conditional_get
 from app.api.controllers import gastos as controller
+from app.api.controllers import gastos_import as import_controller
+from app.api.controllers import gastos_schedule as schedule_controller
+from app.api.controllers import gastos_search as search_controller
+from app.api.controllers import gastos_suggest as suggest_controller
 
 router = APIRouter(prefix="/gastos", tags=["gastos"])
 
+# Máximo de elementos por operación masiva
+BULK_MAX_ITEMS = 1000
 
-@router.get("/")
-def get_gastos(
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+@router.get("/", dependencies=[Depends(conditional_get("gastos"))])
+async def get_gastos(
+    request: Request,
     tipo_gasto: Optional[List[str]] = Query(None),
     categoria: Optional[List[str]] = Query(None),
     forma_pago: Optional[List[str]] = Query(None),
@@ -23,15 +40,30 @@ def get_gastos(
     a_pagos: Optional[bool] = Query(None),
     se_divide: Optional[bool] = Query(None),
     tag: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, max_length=search_controller.MAX_QUERY_CHARS, description="Buscar en el concepto"),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    paginacion: Literal["page", "cursor"] = Query("page"),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
+    total_estimado: bool = Query(False),
+    db: DbSession = Depends(get_db_session)
 ):
-    """Obtener gastos con filtros y paginación"""
-    skip = (page - 1) * limit
+    """
+    Obtener gastos con filtros y paginación.
+    
+    Por defecto pagina con page/limit. Con paginacion=cursor (o enviando un
+    cursor) se usa paginación por cursor: la respuesta incluye next_cursor,
+    que se envía en la siguiente petición para obtener la página siguiente.
     
-    gastos, total = controller.get_gastos_by_filters(
-        db=db,
+    En modo page, include_total=false omite el conteo y total_estimado=true
+    usa la estimación del planificador cuando no hay filtros.
+    
+    q busca en el concepto por palabras, prefijos, subcadenas y con
+    tolerancia a errores de escritura (ver gastos_search); en modo page los
+    resultados se ordenan por relevancia, en modo cursor por fecha.
+    """
+    filtros = dict(
         tipo_gasto=tipo_gasto,
         categoria=categoria,
         forma_pago=forma_pago,
@@ -42,37 +74,382 @@ def get_gastos(
         a_pagos=a_pagos,
         se_divide=se_divide,
         tag=tag,
-        skip=skip,
-        limit=limit
+        q=q
     )
     
-    # Convertir Models a Schemas
-    gastos_response = [GastoResponse.model_validate(gasto) for gasto in gastos]
+    if paginacion == "cursor" or cursor:
+        gastos, next_cursor = await run_db(
+            db,
+            controller.get_gastos_by_cursor,
+            cursor=cursor,
+            limit=limit,
+            **filtros
+        )
+        return FastJSONResponse({
+            "success": True,
+            "data": rows_to_dicts(gastos, controller.GASTO_KEYS),
+            "pagination": {
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
+            }
+        })
     
-    return {
+    skip = (page - 1) * limit
+    
+    estimado = (
+        include_total
+        and total_estimado
+        and not controller.build_gasto_filters(**filtros)
+    )
+    total = await run_db(db, controller.estimate_total_gastos) if estimado else None
+    estimado = total is not None
+    
+    gastos, exact_total = await run_db(
+        db,
+        controller.get_gastos_by_filters,
+        skip=skip,
+        limit=limit,
+        include_total=include_total and not estimado,
+        gastos_version=request.state.table_versions["gastos"],
+        **filtros
+    )
+    if not estimado:
+        total = exact_total
+    
+    return FastJSONResponse({
         "success": True,
-        "data": gastos_response,
+        "data": rows_to_dicts(gastos, controller.GASTO_KEYS),
         "pagination": {
             "page": page,
             "limit": limit,
             "total": total,
-            "pages": (total + limit - 1) // limit
+            "pages": (total + limit - 1) // limit if total is not None else None,
+            "total_estimado": estimado
         }
-    }
+    })
 
 
-@router.get("/msi-mci")
-def get_gastos_msi_mci(db: Session = Depends(get_db)):
+@router.get("/msi-mci", dependencies=[Depends(conditional_get("gastos"))])
+async def get_gastos_msi_mci(db: DbSession = Depends(get_db_session)):
     """Obtener gastos MSI/MCI"""
-    gastos = controller.get_gastos_msi_mci(db)
-    gastos_response = [GastoResponse.model_validate(gasto) for gasto in gastos]
-    return {"success": True, "data": gastos_response}
+    gastos = await run_db(db, controller.get_gastos_msi_mci)
+    return FastJSONResponse({"success": True, "data": rows_to_dicts(gastos, controller.GASTO_KEYS)})
+
+
+@router.get("/msi-mci/schedule", dependencies=[Depends(conditional_get("gastos"))])
+async def get_msi_mci_schedule(
+    months: int = Query(24, ge=1, le=120),
+    desde: Optional[date] = Query(None),
+    forma_pago: Optional[List[str]] = Query(None),
+    db: DbSession = Depends(get_db_session)
+):
+    """
+    Proyección de mensualidades MSI/MCI por mes y por forma de pago.
+    
+    Cubre `months` meses a partir del mes de `desde` (por defecto el actual).
+    """
+    data = await run_db(
+        db,
+        schedule_controller.get_msi_mci_schedule,
+        months=months,
+        desde=desde,
+        forma_pago=forma_pago
+    )
+    return FastJSONResponse({"success": True, "data": data})
+
+
+@router.get("/suggest")
+async def suggest_conceptos(
+    prefix: str = Query(..., min_length=1, max_length=search_controller.MAX_QUERY_CHARS),
+    limit: int = Query(10, ge=1, le=50),
+    db: DbSession = Depends(get_db_session)
+):
+    """
+    Autocompletar el concepto de un gasto.
+    
+    Devuelve los conceptos ya usados que empiezan con `prefix` (sin distinguir
+    mayúsculas ni acentos), de más a menos frecuente, con su tipo de gasto,
+    forma de pago y categoría más comunes.
+    
+    Pensado para llamarse en cada tecla: se resuelve en memoria y no usa ETag
+    (evita la consulta de versiones de cada petición).
+    """
+    data = await run_db(db, suggest_controller.suggest_conceptos, prefijo=prefix, limit=limit)
+    return FastJSONResponse({"success": True, "data": data})
+
+
+def _encode_export(formato: str, lote) -> bytes:
+    """Serializar un lote de filas en el formato de exportación"""
+    if formato == "csv":
+        return rows_to_csv(lote).encode()
+    return rows_to_ndjson(lote, controller.GASTO_KEYS)
+
+
+def _export_sync(formato: str, filtros: dict) -> Iterator[bytes]:
+    """Exportar con una sesión propia: vive lo que dure la respuesta"""
+    with SessionLocal() as db:
+        if formato == "csv":
+            yield rows_to_csv([controller.GASTO_KEYS]).encode()
+        for lote in controller.iter_gastos_export(db, **filtros):
+            yield _encode_export(formato, lote)
+
+
+async def _export_async(formato: str, filtros: dict) -> AsyncIterator[bytes]:
+    """Versión asíncrona de _export_sync"""
+    async with AsyncSessionLocal() as db:
+        if formato == "csv":
+            yield rows_to_csv([controller.GASTO_KEYS]).encode()
+        async for lote in controller.aiter_gastos_export(db, **filtros):
+            yield _encode_export(formato, lote)
+
+
+@router.get("/export")
+async def export_gastos(
+    formato: Literal["csv", "ndjson"] = Query("csv"),
+    tipo_gasto: Optional[List[str]] = Query(None),
+    categoria: Optional[List[str]] = Query(None),
+    forma_pago: Optional[List[str]] = Query(None),
+    mes: Optional[List[str]] = Query(None),
+    anio: Optional[int] = Query(None),
+    fecha_desde: Optional[str] = Query(None),
+    fecha_hasta: Optional[str] = Query(None),
+    a_pagos: Optional[bool] = Query(None),
+    se_divide: Optional[bool] = Query(None),
+    tag: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, max_length=search_controller.MAX_QUERY_CHARS, description="Buscar en el concepto")
+):
+    """
+    Exportar los gastos filtrados como CSV o NDJSON.
+    
+    Acepta los mismos filtros que el listado. Las filas se leen en lotes de un
+    cursor del servidor y se envían a medida que llegan, así que la memoria no
+    crece con el tamaño del histórico.
+    """
+    filtros = {
+        "tipo_gasto": tipo_gasto,
+        "categoria": categoria,
+        "forma_pago": forma_pago,
+        "mes": mes,
+        "anio": anio,
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "a_pagos": a_pagos,
+        "se_divide": se_divide,
+        "tag": tag,
+        "q": q
+    }
+    
+    stream = _export_async(formato, filtros) if settings.DB_ASYNC else _export_sync(formato, filtros)
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="gastos.{formato}"'}
+    )
 
 
-@router.get("/{gasto_id}")
-def get_gasto(gasto_id: int, db: Session = Depends(get_db)):
+def _importar(archivo: UploadFile, hoja: Optional[str], encoding: str) -> dict:
+    """Importar con una sesión síncrona propia: COPY usa el cursor de psycopg2"""
+    with SessionLocal() as db:
+        filas = import_controller.iter_file_rows(archivo.file, archivo.filename or "", hoja, encoding)
+        return import_controller.import_gastos(db, filas)
+
+
+@router.post("/import")
+async def import_gastos(
+    archivo: UploadFile = File(...),
+    hoja: Optional[str] = Query(None),
+    encoding: str = Query("utf-8-sig", description="Codificación del CSV (p. ej. latin-1 o cp1252)")
+):
+    """
+    Importar gastos desde un archivo CSV o Excel (.xlsx).
+    
+    Las filas válidas se cargan con COPY y un solo INSERT ... SELECT; las
+    inválidas se reportan con su número de fila. En Excel se usa la hoja
+    `hoja` o, por defecto, la del libro heredado (unificado_v4). El CSV se lee
+    como UTF-8 salvo que se indique otra codificación con `encoding` (los
+    estados de cuenta bancarios suelen venir en latin-1 o cp1252); un archivo
+    que no corresponde a esa codificación responde 400 con la fila.
+    """
+    reporte = await run_in_threadpool(_importar, archivo, hoja, encoding)
+    return {
+        "success": reporte["rechazados"] == 0,
+        "data": reporte,
+        "message": (
+            f"{reporte['insertados']} gastos importados, {reporte['duplicados']} duplicados omitidos, "
+            f"{reporte['rechazados']} filas rechazadas"
+        )
+    }
+
+
+def _validar_items(items: List[Dict[str, Any]], schema: Type[BaseModel]) -> Tuple[list, list]:
+    """Validar cada elemento de una operación masiva; devuelve (válidos, errores por índice)"""
+    validos, errores = [], []
+    for index, item in enumerate(items):
+        try:
+            validos.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            errores.append({"index": index, "errors": format_validation_errors(exc.errors())})
+    return validos, errores
+
+
+def _errores_no_encontrados(indices: Dict[int, int], faltantes: List[int]) -> list:
+    """Errores por elemento para los ids que no existen"""
+    return [
+        {
+            "index": indices[gasto_id],
+            "id": gasto_id,
+            "errors": [{"field": "id", "message": f"Gasto con ID {gasto_id} no encontrado", "type": "not_found"}]
+        }
+        for gasto_id in faltantes
+    ]
+
+
+def _errores_duplicados(indices: List[int]) -> list:
+    """Errores para los elementos que no se insertaron por tener una huella ya registrada"""
+    return [
+        {
+            "index": index,
+            "errors": [{"field": "fingerprint", "message": "El gasto ya estaba registrado", "type": "duplicate"}]
+        }
+        for index in indices
+    ]
+
+
+def _errores_huella_repetida(indices: Dict[int, int], duplicados: Dict[int, Optional[int]]) -> list:
+    """Errores para los ids cuyos nuevos valores repiten la huella de otro gasto"""
+    return [
+        {
+            "index": indices[gasto_id],
+            "id": gasto_id,
+            "errors": [{
+                "field": "fingerprint",
+                "message": (
+                    f"Repite la huella del gasto con ID {existente_id}" if existente_id is not None
+                    else "Repite la huella de otro gasto"
+                ),
+                "type": "duplicate"
+            }]
+        }
+        for gasto_id, existente_id in duplicados.items()
+    ]
+
+
+def _bulk_response(status_code: int, data, errores: list, message: str) -> FastJSONResponse:
+    """Respuesta común de las operaciones masivas"""
+    return FastJSONResponse(
+        {"success": not errores, "data": data, "errors": errores, "message": message},
+        status_code=status_code
+    )
+
+
+def _bulk_rechazado(errores: list) -> FastJSONResponse:
+    """Respuesta 422 cuando todo_o_nada impide aplicar la operación"""
+    return _bulk_response(
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+        [],
+        errores,
+        "No se aplicó ningún cambio: hay elementos con errores"
+    )
+
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+async def bulk_create_gastos(
+    items: List[Dict[str, Any]] = Body(..., max_length=BULK_MAX_ITEMS),
+    todo_o_nada: bool = Query(False),
+    db: DbSession = Depends(get_db_session)
+):
+    """
+    Crear varios gastos en una sola petición.
+    
+    Cada elemento se valida por separado y los errores se reportan por índice,
+    incluidos los gastos ya registrados (misma huella). Por defecto se crean
+    los elementos válidos; con todo_o_nada=true cualquier error, también un
+    duplicado, hace que no se cree ninguno (422).
+    """
+    validos, errores = _validar_items(items, GastoCreate)
+    if errores and todo_o_nada:
+        return _bulk_rechazado(errores)
+    
+    rows, duplicados = await run_db(db, controller.bulk_create_gastos, [gasto for _, gasto in validos], todo_o_nada)
+    errores += _errores_duplicados([validos[posicion][0] for posicion in duplicados])
+    if duplicados and todo_o_nada:
+        return _bulk_rechazado(sorted(errores, key=lambda error: error["index"]))
+    
+    return _bulk_response(
+        status.HTTP_201_CREATED,
+        rows_to_dicts(rows, controller.GASTO_KEYS),
+        sorted(errores, key=lambda error: error["index"]),
+        f"{len(rows)} gastos creados"
+    )
+
+
+@router.put("/bulk")
+async def bulk_update_gastos(
+    items: List[Dict[str, Any]] = Body(..., max_length=BULK_MAX_ITEMS),
+    todo_o_nada: bool = Query(False),
+    db: DbSession = Depends(get_db_session)
+):
+    """
+    Actualizar varios gastos en una sola petición.
+    
+    Cada elemento debe incluir su id y solo los campos a modificar. Los ids
+    inexistentes y los cambios que repetirían la huella de otro gasto se
+    reportan como errores por índice y no se aplican; el resto sí. Con
+    todo_o_nada=true no se aplica ningún cambio si hay errores (422).
+    """
+    validos, errores = _validar_items(items, GastoBulkUpdate)
+    if errores and todo_o_nada:
+        return _bulk_rechazado(errores)
+    
+    cambios = [cambio for _, cambio in validos]
+    rows, faltantes, duplicados = await run_db(db, controller.bulk_update_gastos, cambios, todo_o_nada)
+    indices = {cambio.id: index for index, cambio in reversed(validos)}
+    errores += _errores_no_encontrados(indices, faltantes) + _errores_huella_repetida(indices, duplicados)
+    errores.sort(key=lambda error: error["index"])
+    if (faltantes or duplicados) and todo_o_nada:
+        return _bulk_rechazado(errores)
+    
+    return _bulk_response(
+        status.HTTP_200_OK,
+        rows_to_dicts(rows, controller.GASTO_KEYS),
+        errores,
+        f"{len(rows)} gastos actualizados"
+    )
+
+
+@router.delete("/bulk")
+async def bulk_delete_gastos(
+    ids: List[int] = Body(..., max_length=BULK_MAX_ITEMS),
+    todo_o_nada: bool = Query(False),
+    db: DbSession = Depends(get_db_session)
+):
+    """
+    Eliminar varios gastos por id en una sola petición.
+    
+    Los ids inexistentes se reportan como errores; con todo_o_nada=true no se
+    elimina ninguno si falta alguno (422).
+    """
+    eliminados, faltantes = await run_db(db, controller.bulk_delete_gastos, ids, todo_o_nada)
+    errores = _errores_no_encontrados(
+        {gasto_id: index for index, gasto_id in reversed(list(enumerate(ids)))},
+        faltantes
+    )
+    if faltantes and todo_o_nada:
+        return _bulk_rechazado(errores)
+    
+    return _bulk_response(
+        status.HTTP_200_OK,
+        eliminados,
+        errores,
+        f"{len(eliminados)} gastos eliminados"
+    )
+
+
+@router.get("/{gasto_id}", dependencies=[Depends(conditional_get("gastos"))])
+async def get_gasto(gasto_id: int, db: DbSession = Depends(get_db_session)):
     """Obtener gasto por ID"""
-    gasto = controller.get_gasto_by_id(db, gasto_id)
+    gasto = await run_db(db, controller.get_gasto_by_id, gasto_id)
     if not gasto:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -83,17 +460,29 @@ def get_gasto(gasto_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_gasto(gasto: GastoCreate, db: Session = Depends(get_db)):
-    """Crear nuevo gasto"""
-    new_gasto = controller.create_gasto(db, gasto)
+async def create_gasto(gasto: GastoCreate, db: DbSession = Depends(get_db_session)):
+    """
+    Crear nuevo gasto.
+    
+    Si ya existe un gasto con la misma huella (concepto, monto, fecha de
+    cargo, forma de pago y ocurrencia) responde 409 con el id del existente y
+    no crea nada, así que un reintento no duplica el gasto. Para registrar la
+    misma compra repetida se envía ocurrencia 2, 3...
+    """
+    new_gasto = await run_db(db, controller.create_gasto, gasto)
     gasto_response = GastoResponse.model_validate(new_gasto)
     return {"success": True, "data": gasto_response, "message": "Gasto creado exitosamente"}
 
 
 @router.put("/{gasto_id}")
-def update_gasto(gasto_id: int, gasto: GastoUpdate, db: Session = Depends(get_db)):
-    """Actualizar gasto"""
-    updated_gasto = controller.update_gasto(db, gasto_id, gasto)
+async def update_gasto(gasto_id: int, gasto: GastoUpdate, db: DbSession = Depends(get_db_session)):
+    """
+    Actualizar gasto.
+    
+    Igual que al crear: si los nuevos valores duplican la huella de otro
+    gasto responde 409 con el id de ese gasto y no aplica ningún cambio.
+    """
+    updated_gasto = await run_db(db, controller.update_gasto, gasto_id, gasto)
     if not updated_gasto:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -104,9 +493,9 @@ def update_gasto(gasto_id: int, gasto: GastoUpdate, db: Session = Depends(get_db
 
 
 @router.delete("/{gasto_id}")
-def delete_gasto(gasto_id: int, db: Session = Depends(get_db)):
+async def delete_gasto(gasto_id: int, db: DbSession = Depends(get_db_session)):
     """Eliminar gasto"""
-    deleted = controller.delete_gasto(db, gasto_id)
+    deleted = await run_db(db, controller.delete_gasto, gasto_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,3 @@
+"""
+Comandos de mantenimiento (python -m app.commands.<comando>)
+"""
@@ -0,0 +1,44 @@
+"""
+Importar gastos desde un CSV o desde el libro de Excel heredado
+
+Uso:
+    python -m app.commands.import_gastos archivo.csv
+    python -m app.commands.import_gastos "Dashboard gastos_v1.0.xlsx" [--hoja unificado_v4]
+"""
+import argparse
+from fastapi import HTTPException
+from app.db.base import SessionLocal
+from app.api.controllers.gastos_import import import_gastos, iter_file_rows
+
+
+def main() -> None:
+    """Punto de entrada del comando"""
+    parser = argparse.ArgumentParser(description="Importar gastos desde CSV o Excel")
+    parser.add_argument("archivo", help="Ruta del archivo .csv o .xlsx")
+    parser.add_argument("--hoja", default=None, help="Hoja de Excel a importar")
+    parser.add_argument("--encoding", default="utf-8-sig", help="Codificación del CSV")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.archivo, "rb") as archivo:
+            filas = iter_file_rows(archivo, args.archivo, args.hoja, args.encoding)
+            reporte = import_gastos(db, filas)
+    except HTTPException as exc:
+        raise SystemExit(f"Error: {exc.detail}")
+    finally:
+        db.close()
+
+    print(
+        f"Filas leídas: {reporte['filas_leidas']} | insertadas: {reporte['insertados']} | "
+        f"duplicadas: {reporte['duplicados']} | "
+        f"rechazadas: {reporte['rechazados']} | {reporte['segundos']} s "
+        f"({reporte['filas_por_segundo']} filas/s)"
+    )
+    for rechazo in reporte["rechazos"]:
+        errores = "; ".join(f"{e['field']}: {e['message']}" for e in rechazo["errors"])
+        print(f"  fila {rechazo['fila']}: {errores}")
+
+
+if __name__ == "__main__":
+    main()
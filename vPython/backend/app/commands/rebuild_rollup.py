@@ -0,0 +1,22 @@
+"""
+Reconstruir gastos_rollup desde cero a partir de la tabla gastos
+
+Uso:
+    python -m app.commands.rebuild_rollup
+"""
+from app.db.base import SessionLocal
+from app.api.controllers.gastos_rollup import rebuild_rollup
+
+
+def main() -> None:
+    """Punto de entrada del comando"""
+    db = SessionLocal()
+    try:
+        filas = rebuild_rollup(db)
+        print(f"gastos_rollup reconstruido: {filas} filas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
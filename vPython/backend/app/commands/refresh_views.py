@@ -0,0 +1,33 @@
+"""
+Refrescar las vistas materializadas de reportes
+
+Uso:
+    python -m app.commands.refresh_views [--blocking]
+
+--blocking usa REFRESH sin CONCURRENTLY: más rápido, pero bloquea las
+lecturas de los reportes mientras dura (útil tras cargas masivas).
+"""
+import argparse
+from app.db.base import SessionLocal
+from app.db.materialized_views import MATERIALIZED_VIEWS, refresh_materialized_views
+
+
+def main() -> None:
+    """Punto de entrada del comando"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocking", action="store_true", help="REFRESH sin CONCURRENTLY")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        duracion_ms = refresh_materialized_views(db, concurrently=not args.blocking)
+        if duracion_ms is None:
+            print("Otro proceso está refrescando las vistas; no se hizo nada")
+        else:
+            print(f"{len(MATERIALIZED_VIEWS)} vistas refrescadas en {duracion_ms:.0f} ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
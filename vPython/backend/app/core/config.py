@@ -1,7 +1,7 @@
 """
 Configuración de la aplicación
 """
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import validator
 import json
@@ -18,9 +18,48 @@ class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 3001
+    WORKERS: int = 1  # Procesos de uvicorn fuera de desarrollo
     
     # Database
     DATABASE_URL: str
+    DB_ASYNC: bool = False  # Usar engine asíncrono (asyncpg) en las rutas
+    ASYNC_DATABASE_URL: Optional[str] = None  # Por defecto DATABASE_URL con driver asyncpg
+    
+    # Pool de conexiones (por worker; ver app/db/pool.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # segundos
+    DB_POOL_TIMEOUT: int = 30  # segundos esperando una conexión libre
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 = sin límite
+    DB_MAX_CONNECTIONS: int = 90  # Presupuesto total de conexiones de la API en Postgres
+    DB_SYNC_MAX_CONNECTIONS: int = 2  # Con DB_ASYNC: parte de cada worker para el engine síncrono
+    
+    # Caché de totales de /api/gastos (segundos)
+    GASTOS_TOTAL_CACHE_TTL: int = 30
+    
+    # Caché de respuestas de catálogos y dashboard (ver app/core/response_cache.py)
+    RESPONSE_CACHE_TTL: int = 60  # segundos
+    RESPONSE_CACHE_SIZE: int = 256  # respuestas por worker
+    
+    # Compresión de respuestas (ver app/middleware/compression.py)
+    COMPRESSION_MIN_SIZE: int = 1000  # bytes; respuestas menores van sin comprimir
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1-9
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11
+    
+    # Logging (ver app/core/logger.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_REQUESTS_PER_SECOND: int = 100  # líneas de petición por worker; 0 = sin límite
+    
+    # Sentencias lentas y perfil SQL por petición (ver app/core/profiling.py)
+    SLOW_QUERY_MS: int = 500  # 0 = no registrar sentencias lentas
+    SQL_PROFILING: bool = False  # Perfilar todas las peticiones
+    SQL_PROFILING_HEADER: bool = False  # Permitir perfilar con la cabecera X-SQL-Profile: 1
+    
+    # Refresco de las vistas materializadas de reportes (ver app/db/materialized_views.py)
+    MV_REFRESH_ENABLED: bool = True
+    MV_REFRESH_DEBOUNCE_SECONDS: float = 5  # espera sin escrituras antes de refrescar
+    MV_REFRESH_MAX_DELAY_SECONDS: float = 60  # máximo retraso con escrituras continuas
+    MV_REFRESH_INTERVAL_SECONDS: float = 900  # refresco periódico; 0 = sólo tras escrituras
     
     # JWT
     SECRET_KEY: str
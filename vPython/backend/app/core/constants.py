@@ -36,6 +36,15 @@ FormaPago = Literal[
     'TDC NU'
 ]
 
+# Formas de pago del libro heredado y del sistema anterior (vTS) -> catálogo
+FORMAS_PAGO_HEREDADAS = {
+    'Nu': 'TDD NU',
+    'Nu débito': 'TDD NU',
+    'BBVA': 'BBVA Oro',
+    'Klar': 'Klar Platino',
+    'MP': 'Mercado Pago'
+}
+
 # Meses
 MESES = [
     'Enero',
@@ -98,3 +107,9 @@ GASTO_X_MES = [
     'NA'
 ]
 GastoXMes = Literal['ENE', 'FEB', 'MAR', 'ABR', 'MAY', 'JUN', 'JUL', 'AGO', 'SEP', 'OCT', 'NOV', 'DIC', 'NA']
+
+# Tipos de balance: clave almacenada en BD -> etiqueta expuesta por la API
+TIPOS_BALANCE = {
+    'D': 'Débito',
+    'I': 'Inversión'
+}
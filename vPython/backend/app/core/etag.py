@@ -0,0 +1,35 @@
+"""
+ETag y peticiones condicionales (If-None-Match)
+
+El ETag de una lectura se deriva de la ruta, la query normalizada, la
+versión de la app y las versiones de las tablas que consulta. Así se puede
+responder 304 antes de ejecutar la consulta principal y de serializar.
+"""
+import hashlib
+from typing import Mapping, Optional
+from fastapi import Request
+from app.core.config import settings
+
+
+def make_etag(request: Request, versions: Mapping[str, int]) -> str:
+    """ETag fuerte de la representación pedida con las versiones dadas"""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    tablas = ",".join(f"{tabla}:{version}" for tabla, version in sorted(versions.items()))
+    raw = f"{settings.APP_VERSION}|{request.url.path}?{query}|{tablas}"
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()[:24]}"'
+
+
+def body_etag(body: bytes) -> str:
+    """ETag fuerte a partir del contenido ya serializado"""
+    return f'"{hashlib.sha1(body).hexdigest()[:24]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparar If-None-Match con el ETag actual (comparación débil, RFC 9110)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -0,0 +1,140 @@
+"""
+Logging estructurado y no bloqueante
+
+Los registros se encolan con un QueueHandler y un hilo (QueueListener) los
+formatea como JSON (una línea por registro) y los escribe en stderr. El
+event loop sólo paga el costo de encolar: el formateo de trazas y la
+escritura ocurren en el hilo del listener.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from app.core.config import settings
+
+logger = logging.getLogger("money_monitor")
+request_logger = logging.getLogger("money_monitor.requests")
+sql_logger = logging.getLogger("money_monitor.sql")
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatear un registro como una línea JSON"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que registra.
+    
+    QueueHandler.prepare formatea el mensaje y la traza antes de encolar; aquí
+    sólo se resuelve el mensaje y la traza se formatea en el listener.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RequestLogSampler:
+    """
+    Limitar las líneas de log de peticiones a `max_per_second` por worker.
+    
+    Con tráfico bajo se registran todas; por encima del límite se descartan
+    y la siguiente línea registrada indica cuántas se omitieron. 0 = sin límite.
+    """
+    
+    def __init__(self, max_per_second: int):
+        self.max_per_second = max_per_second
+        self._lock = threading.Lock()
+        self._second = 0
+        self._count = 0
+        self._dropped = 0
+    
+    def allow(self) -> tuple[bool, int]:
+        """(registrar, omitidas desde la última línea registrada)"""
+        if self.max_per_second <= 0:
+            return True, 0
+        now = int(time.monotonic())
+        with self._lock:
+            if now != self._second:
+                self._second = now
+                self._count = 0
+            if self._count >= self.max_per_second:
+                self._dropped += 1
+                return False, 0
+            self._count += 1
+            dropped, self._dropped = self._dropped, 0
+            return True, dropped
+
+
+request_sampler = RequestLogSampler(settings.LOG_REQUESTS_PER_SECOND)
+
+
+def setup_logging() -> None:
+    """Configurar el logger de la app con la cola y el listener (idempotente)"""
+    global _listener
+    if _listener is not None:
+        return
+    
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JSONFormatter())
+    
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    
+    logger.handlers = [_NonBlockingQueueHandler(log_queue)]
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.propagate = False
+
+
+def shutdown_logging() -> None:
+    """Vaciar la cola y detener el listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_request(method: str, path: str, route: str, status_code: int, seconds: float) -> None:
+    """
+    Registrar una petición (sujeto al muestreo).
+    
+    Los errores 5xx se registran siempre.
+    """
+    permitido, omitidas = request_sampler.allow()
+    if not permitido and status_code < 500:
+        return
+    
+    fields = {
+        "method": method,
+        "path": path,
+        "route": route,
+        "status": status_code,
+        "duration_ms": round(seconds * 1000, 3),
+    }
+    if omitidas:
+        fields["omitidas"] = omitidas
+    level = logging.ERROR if status_code >= 500 else logging.INFO
+    request_logger.log(level, "%s %s %s", method, path, status_code, extra={"fields": fields})
@@ -0,0 +1,160 @@
+"""
+Histogramas de latencia por ruta y por tipo de sentencia SQL
+
+Cada petición se registra con time.perf_counter en el histograma de su ruta
+(método + plantilla de la ruta, p. ej. GET /api/gastos/{gasto_id}), con
+límites de cubeta desde 0.25 ms. Las sentencias SQL se registran igual, por
+tipo (SELECT, INSERT, ...), desde los eventos del engine (app/db/instrumentation.py).
+Los datos son por worker.
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+# Límites superiores de las cubetas, en segundos (la última es +Inf)
+LATENCY_BUCKETS = (
+    0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class LatencyHistogram:
+    """Histograma acumulativo de duraciones con conteo, suma y máximo"""
+    
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def quantile(self, q: float) -> float:
+        """Cuantil aproximado (límite superior de su cubeta, acotado por el máximo)"""
+        if not self.count:
+            return 0.0
+        objetivo = q * self.count
+        acumulado = 0
+        for index, count in enumerate(self.counts):
+            acumulado += count
+            if acumulado >= objetivo:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+    
+    def copy(self) -> "LatencyHistogram":
+        histogram = LatencyHistogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        histogram.max = self.max
+        return histogram
+    
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum * 1000, 3),
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else None,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": {
+                ("+Inf" if index == len(self.buckets) else str(self.buckets[index])): count
+                for index, count in enumerate(self.counts)
+            },
+        }
+
+
+class RequestMetrics:
+    """Histogramas de latencia y conteo por código de estado, por ruta"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._status: Dict[Tuple[str, str], Dict[int, int]] = {}
+    
+    def observe(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        key = (method, route)
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = LatencyHistogram()
+                self._status[key] = {}
+            histogram.observe(seconds)
+            self._status[key][status_code] = self._status[key].get(status_code, 0) + 1
+    
+    def snapshot(self) -> list:
+        with self._lock:
+            return [
+                {
+                    "method": method,
+                    "route": route,
+                    "status": dict(self._status[(method, route)]),
+                    **histogram.snapshot(),
+                }
+                for (method, route), histogram in sorted(self._latency.items())
+            ]
+    
+    def items(self) -> list:
+        """Copia de [(método, ruta, {status: conteo}, histograma)]"""
+        with self._lock:
+            return [
+                (method, route, dict(self._status[(method, route)]), histogram.copy())
+                for (method, route), histogram in sorted(self._latency.items())
+            ]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._status.clear()
+
+
+class StatementMetrics:
+    """Histogramas de duración y conteo de errores por tipo de sentencia SQL"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._errors: Dict[str, int] = {}
+    
+    def observe(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._latency.get(kind)
+            if histogram is None:
+                histogram = self._latency[kind] = LatencyHistogram()
+            histogram.observe(seconds)
+    
+    def observe_error(self, kind: str) -> None:
+        with self._lock:
+            self._errors[kind] = self._errors.get(kind, 0) + 1
+    
+    def snapshot(self) -> list:
+        with self._lock:
+            return [
+                {"kind": kind, "errors": self._errors.get(kind, 0), **histogram.snapshot()}
+                for kind, histogram in sorted(self._latency.items())
+            ]
+    
+    def items(self) -> list:
+        """Copia de [(tipo, errores, histograma)]"""
+        with self._lock:
+            kinds = sorted(set(self._latency) | set(self._errors))
+            return [
+                (kind, self._errors.get(kind, 0), (self._latency.get(kind) or LatencyHistogram()).copy())
+                for kind in kinds
+            ]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._errors.clear()
+
+
+request_metrics = RequestMetrics()
+statement_metrics = StatementMetrics()
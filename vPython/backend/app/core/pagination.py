@@ -0,0 +1,27 @@
+"""
+Cursores opacos para paginación por keyset
+"""
+import base64
+import json
+from fastapi import HTTPException, status
+
+
+def encode_cursor(payload: dict) -> str:
+    """Codificar la posición de un registro como cursor opaco (base64 url-safe)"""
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decodificar un cursor opaco; responde 400 si está mal formado"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict):
+            raise ValueError("payload")
+        return payload
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        ) from exc
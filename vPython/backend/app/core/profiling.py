@@ -0,0 +1,88 @@
+"""
+Perfil SQL por petición (modo opt-in)
+
+Con SQL_PROFILING=true, o con SQL_PROFILING_HEADER=true y la cabecera
+`X-SQL-Profile: 1`, la petición se perfila: los eventos del engine
+(app/db/instrumentation.py) registran cada sentencia con sus parámetros y
+duración, las sentencias lentas se registran con su plan de
+EXPLAIN (ANALYZE, BUFFERS) y la respuesta incluye Server-Timing con el
+desglose db / serialize / app / total.
+
+El perfil vive en una ContextVar: el threadpool y AsyncSession.run_sync
+copian el contexto, así que el controlador ve el mismo objeto que el
+middleware.
+"""
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+# Caracteres máximos de sentencia y parámetros que se guardan por sentencia
+MAX_STATEMENT_CHARS = 2000
+MAX_PARAMS_CHARS = 500
+
+# Sentencias máximas guardadas por petición (el conteo y el tiempo son completos)
+MAX_STATEMENTS = 200
+
+PROFILE_HEADER = "x-sql-profile"
+
+_current_profile: ContextVar[Optional["SqlProfile"]] = ContextVar("sql_profile", default=None)
+
+
+def truncate(value: Any, limit: int) -> str:
+    """Representación de texto acotada a `limit` caracteres"""
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class SqlProfile:
+    """Sentencias, tiempo en base de datos y en serialización de una petición"""
+    
+    def __init__(self, explain: bool = True):
+        self.explain = explain
+        self.start = time.perf_counter()
+        self.statements = []
+        self.count = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+    
+    def add_statement(self, statement: str, parameters: Any, seconds: float, plan: Optional[str] = None) -> None:
+        self.count += 1
+        self.db_seconds += seconds
+        if len(self.statements) < MAX_STATEMENTS:
+            entry = {
+                "sql": truncate(statement, MAX_STATEMENT_CHARS),
+                "params": truncate(parameters, MAX_PARAMS_CHARS),
+                "ms": round(seconds * 1000, 3),
+            }
+            if plan is not None:
+                entry["plan"] = plan
+            self.statements.append(entry)
+    
+    def server_timing(self, total_seconds: float) -> str:
+        """Valor de la cabecera Server-Timing (duraciones en ms)"""
+        app_seconds = max(0.0, total_seconds - self.db_seconds - self.serialize_seconds)
+        return ", ".join((
+            f'db;dur={self.db_seconds * 1000:.3f};desc="{self.count} sentencias"',
+            f"serialize;dur={self.serialize_seconds * 1000:.3f}",
+            f"app;dur={app_seconds * 1000:.3f}",
+            f"total;dur={total_seconds * 1000:.3f}",
+        ))
+
+
+def current_profile() -> Optional[SqlProfile]:
+    """Perfil de la petición en curso, o None si no se está perfilando"""
+    return _current_profile.get()
+
+
+def start_profile(explain: bool = True) -> SqlProfile:
+    """Empezar a perfilar el contexto actual"""
+    profile = SqlProfile(explain=explain)
+    _current_profile.set(profile)
+    return profile
+
+
+def record_serialization(seconds: float) -> None:
+    """Sumar tiempo de serialización al perfil en curso (si hay uno)"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.serialize_seconds += seconds
@@ -0,0 +1,169 @@
+"""
+Exposición de métricas en el formato de texto de Prometheus
+
+Reúne las métricas que ya lleva cada worker (histogramas por ruta y por
+sentencia SQL, pools de conexiones, caché de respuestas) y las del proceso
+(memoria, CPU, descriptores). Sólo se leen contadores en memoria, así que
+generar la respuesta no toca la base de datos.
+
+Los datos son por worker: con varios workers cada scrape ve el worker que
+atendió la petición (etiqueta `pid` en app_info).
+"""
+import os
+import time
+from typing import Iterable, Optional
+from app.core.config import settings
+from app.core.metrics import LatencyHistogram, request_metrics, statement_metrics
+from app.core.response_cache import response_cache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_START_TIME = time.time()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float):
+        return repr(round(value, 9))
+    return str(value)
+
+
+class _Writer:
+    """Acumula líneas agrupadas por métrica con su HELP y TYPE"""
+    
+    def __init__(self):
+        self.lines = []
+    
+    def header(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+    
+    def sample(self, name: str, value: float, labels: Optional[dict] = None) -> None:
+        self.lines.append(f"{name}{_labels(labels or {})} {_number(value)}")
+    
+    def metric(self, name: str, kind: str, help_text: str, samples: Iterable[tuple[dict, float]]) -> None:
+        self.header(name, kind, help_text)
+        for labels, value in samples:
+            self.sample(name, value, labels)
+    
+    def histogram(self, name: str, labels: dict, histogram: LatencyHistogram) -> None:
+        acumulado = 0
+        for limite, count in zip(histogram.buckets, histogram.counts):
+            acumulado += count
+            self.sample(f"{name}_bucket", acumulado, {**labels, "le": repr(limite)})
+        self.sample(f"{name}_bucket", histogram.count, {**labels, "le": "+Inf"})
+        self.sample(f"{name}_sum", histogram.sum, labels)
+        self.sample(f"{name}_count", histogram.count, labels)
+    
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def process_stats() -> dict:
+    """Memoria, CPU y descriptores abiertos del proceso (sin dependencias externas)"""
+    stats = {"cpu_seconds": sum(os.times()[:2]), "start_time": _START_TIME}
+    try:
+        with open("/proc/self/statm") as statm:
+            virtual, resident = (int(value) for value in statm.read().split()[:2])
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        stats["resident_bytes"] = resident * page_size
+        stats["virtual_bytes"] = virtual * page_size
+        stats["open_fds"] = len(os.listdir("/proc/self/fd"))
+    except (OSError, ValueError):
+        # Fuera de Linux: sólo el pico de memoria residente
+        try:
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            stats["resident_bytes"] = maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+        except (ImportError, AttributeError):
+            pass
+    return stats
+
+
+def render_metrics(pools: dict, views: Optional[dict] = None) -> str:
+    """
+    Todas las métricas del worker en formato de texto de Prometheus.
+    
+    `views` son las estadísticas del refresco de vistas materializadas
+    (MaterializedViewRefresher.stats), si está activo.
+    """
+    out = _Writer()
+    
+    out.metric("app_info", "gauge", "Versión de la aplicación y pid del worker", [
+        ({"version": settings.APP_VERSION, "environment": settings.ENVIRONMENT, "pid": os.getpid()}, 1)
+    ])
+    
+    # Peticiones HTTP por plantilla de ruta
+    requests = request_metrics.items()
+    out.metric("http_requests_total", "counter", "Peticiones atendidas por ruta y código de estado", [
+        ({"method": method, "route": route, "status": code}, count)
+        for method, route, statuses, _ in requests
+        for code, count in sorted(statuses.items())
+    ])
+    out.header("http_request_duration_seconds", "histogram", "Duración de las peticiones por ruta")
+    for method, route, _, histogram in requests:
+        out.histogram("http_request_duration_seconds", {"method": method, "route": route}, histogram)
+    
+    # Sentencias SQL por tipo
+    statements = statement_metrics.items()
+    out.metric("db_statement_errors_total", "counter", "Sentencias SQL que fallaron por tipo", [
+        ({"kind": kind}, errors) for kind, errors, _ in statements
+    ])
+    out.header("db_statement_duration_seconds", "histogram", "Duración de las sentencias SQL por tipo")
+    for kind, _, histogram in statements:
+        out.histogram("db_statement_duration_seconds", {"kind": kind}, histogram)
+    
+    # Pools de conexiones
+    for name, kind, key, help_text, scale in (
+        ("db_pool_size", "gauge", "size", "Conexiones permanentes del pool", 1),
+        ("db_pool_max_overflow", "gauge", "max_overflow", "Conexiones extra permitidas sobre size", 1),
+        ("db_pool_checked_out", "gauge", "checked_out", "Conexiones en uso", 1),
+        ("db_pool_checked_in", "gauge", "checked_in", "Conexiones libres en el pool", 1),
+        ("db_pool_overflow", "gauge", "overflow", "Conexiones de overflow abiertas", 1),
+        ("db_pool_checkouts_total", "counter", "checkouts", "Conexiones obtenidas del pool", 1),
+        ("db_pool_timeouts_total", "counter", "timeouts", "Esperas de conexión que excedieron DB_POOL_TIMEOUT", 1),
+        ("db_pool_wait_seconds_total", "counter", "wait_total_ms", "Tiempo total esperando una conexión", 0.001),
+    ):
+        out.metric(name, kind, help_text, [
+            ({"pool": pool}, status[key] * scale) for pool, status in pools.items() if key in status
+        ])
+    
+    # Caché de respuestas
+    cache = response_cache.stats()
+    out.metric("response_cache_hits_total", "counter", "Respuestas servidas desde la caché", [({}, cache["hits"])])
+    out.metric("response_cache_misses_total", "counter", "Respuestas construidas por fallo de caché", [({}, cache["misses"])])
+    out.metric("response_cache_entries", "gauge", "Respuestas guardadas en la caché", [({}, cache["entries"])])
+    
+    # Refresco de vistas materializadas
+    if views is not None:
+        out.metric("mv_refresh_total", "counter", "Refrescos de vistas materializadas", [({}, views["refreshes"])])
+        out.metric("mv_refresh_skipped_total", "counter", "Refrescos omitidos: otro worker refrescaba o ya refrescó en el intervalo", [({}, views["skipped"])])
+        out.metric("mv_refresh_errors_total", "counter", "Refrescos fallidos", [({}, views["errors"])])
+        out.metric("mv_refresh_pending", "gauge", "Escrituras aún no reflejadas en las vistas (1 = sí)", [({}, int(views["pending"]))])
+        if views["last_duration_ms"] is not None:
+            out.metric("mv_refresh_last_duration_seconds", "gauge", "Duración del último refresco", [
+                ({}, views["last_duration_ms"] / 1000)
+            ])
+    
+    # Proceso
+    process = process_stats()
+    out.metric("process_cpu_seconds_total", "counter", "Tiempo de CPU de usuario y sistema", [({}, process["cpu_seconds"])])
+    out.metric("process_start_time_seconds", "gauge", "Inicio del proceso (epoch)", [({}, process["start_time"])])
+    for name, key, help_text in (
+        ("process_resident_memory_bytes", "resident_bytes", "Memoria residente"),
+        ("process_virtual_memory_bytes", "virtual_bytes", "Memoria virtual"),
+        ("process_open_fds", "open_fds", "Descriptores de archivo abiertos"),
+    ):
+        if key in process:
+            out.metric(name, "gauge", help_text, [({}, process[key])])
+    
+    return out.render()
@@ -0,0 +1,112 @@
+"""
+Caché de respuestas ya serializadas (catálogos y dashboard)
+
+Las respuestas se guardan como bytes JSON en una TTLCache, con llave
+(ruta, query normalizada, versiones de tabla). Las versiones son las de
+table_versions que leyó conditional_get para el ETag, así que cualquier
+escritura (de este u otro worker, un COPY o SQL manual) cambia la llave: las
+entradas anteriores dejan de ser alcanzables y salen por LRU o TTL. Las rutas
+sin conditional_get (catálogos) sólo cambian con un despliegue.
+"""
+import inspect
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional, Union
+import pydantic_core
+from fastapi import Request
+from fastapi.responses import Response
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.etag import body_etag, etag_matches
+from app.core.profiling import record_serialization
+
+
+class ResponseCache:
+    """Caché LRU con TTL de cuerpos de respuesta, por versión de tabla"""
+    
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def key_for(self, request: Request) -> Hashable:
+        """Llave de la petición: ruta + query normalizada + versiones de tabla"""
+        query = tuple(sorted(request.query_params.multi_items()))
+        versions = getattr(request.state, "table_versions", None) or {}
+        return (request.url.path, query, tuple(sorted(versions.items())))
+    
+    def get(self, key: Hashable) -> Optional[tuple[bytes, str]]:
+        """Obtener (cuerpo, etag) guardado, contando aciertos y fallos"""
+        value = self._cache.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: tuple[bytes, str]) -> None:
+        """Guardar un cuerpo ya serializado junto con su ETag"""
+        self._cache.set(key, value)
+    
+    def clear(self) -> None:
+        """Vaciar la caché y reiniciar los contadores"""
+        self._cache.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> dict:
+        """Aciertos, fallos y entradas"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "entries": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "ttl": self._cache.ttl
+        }
+
+
+response_cache = ResponseCache(maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL)
+
+
+async def cached_json(
+    request: Request,
+    build: Callable[[], Union[Any, Awaitable[Any]]],
+    cache_control: Optional[str] = None
+) -> Response:
+    """
+    Responder desde la caché o construir, serializar y guardar la respuesta.
+    
+    `build` devuelve el contenido de la respuesta (puede ser async). Las
+    versiones se leen antes de construir: si hay una escritura mientras tanto,
+    el resultado queda bajo las versiones anteriores y no se vuelve a servir.
+    
+    El ETag es el de conditional_get si la ruta lo usa; si no, se deriva del
+    contenido y se responde 304 cuando coincide con If-None-Match.
+    """
+    key = response_cache.key_for(request)
+    cached = response_cache.get(key)
+    estado = "HIT"
+    if cached is None:
+        estado = "MISS"
+        content = build()
+        if inspect.isawaitable(content):
+            content = await content
+        start = time.perf_counter()
+        body = pydantic_core.to_json(content)
+        record_serialization(time.perf_counter() - start)
+        cached = (body, body_etag(body))
+        response_cache.set(key, cached)
+    
+    body, etag = cached
+    etag = getattr(request.state, "etag", None) or etag
+    headers = {"X-Cache": estado, "ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
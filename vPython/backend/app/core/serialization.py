@@ -0,0 +1,43 @@
+"""
+Serialización rápida de respuestas JSON
+
+Los listados seleccionan columnas (filas, no objetos ORM) y se serializan con
+el serializador compilado de pydantic-core, sin pasar por model_validate ni
+jsonable_encoder. El formato es el mismo que producen los schemas de
+respuesta: Decimal como cadena y fechas en ISO 8601.
+"""
+from typing import Any, Iterable, List, Sequence
+import csv
+import io
+import time
+import pydantic_core
+from fastapi.responses import Response
+from app.core.profiling import record_serialization
+
+
+class FastJSONResponse(Response):
+    """Respuesta JSON serializada con pydantic_core.to_json"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = pydantic_core.to_json(content)
+        record_serialization(time.perf_counter() - start)
+        return body
+
+
+def rows_to_dicts(rows: Iterable[Sequence], keys: Sequence[str]) -> List[dict]:
+    """Convertir filas (tuplas en el orden de `keys`) a diccionarios"""
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def rows_to_ndjson(rows: Iterable[Sequence], keys: Sequence[str]) -> bytes:
+    """Serializar filas como NDJSON (un objeto JSON por línea)"""
+    return b"".join(pydantic_core.to_json(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+def rows_to_csv(rows: Iterable[Sequence]) -> str:
+    """Serializar filas como líneas CSV (sin encabezado)"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
@@ -1,29 +1,93 @@
 """
 Configuración de la base de datos
 """
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar, Union
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.db.instrumentation import instrument_engine
+from app.db.pool import engine_options, get_pool_status
+
+T = TypeVar("T")
+
+# Sesión síncrona o asíncrona según settings.DB_ASYNC
+DbSession = Union[Session, AsyncSession]
 
 # Crear engine de SQLAlchemy
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.ENVIRONMENT == "development"
-)
+engine = create_engine(settings.DATABASE_URL, **engine_options())
+instrument_engine(engine)
 
 # SessionLocal para crear sesiones de base de datos
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url() -> str:
+    """URL de la base de datos con el driver asyncpg"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+# Engine asíncrono (asyncpg); sólo se crea si está habilitado
+async_engine = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(get_async_database_url(), **engine_options(asyncpg=True))
+    instrument_engine(async_engine.sync_engine)
+    # expire_on_commit=False: los objetos se serializan fuera de la sesión
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+def get_pools_status() -> dict:
+    """Métricas de los pools de conexiones de este proceso"""
+    status = {"sync": get_pool_status(engine.pool)}
+    if async_engine is not None:
+        status["async"] = get_pool_status(async_engine.sync_engine.pool)
+    return status
+
+
 # Base class para modelos
 Base = declarative_base()
 
 
-def get_db():
+def get_db() -> Iterator[Session]:
     """Dependency para obtener sesión de base de datos"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency para obtener sesión asíncrona de base de datos"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency usada por las rutas: asíncrona si DB_ASYNC está habilitado
+get_db_session = get_async_db if settings.DB_ASYNC else get_db
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Ejecutar una función de controlador con la sesión de la petición.
+    
+    Con AsyncSession se usa run_sync: el controlador corre sobre la sesión
+    síncrona subyacente mientras asyncpg hace la E/S sin bloquear el event
+    loop. Con Session síncrona se ejecuta en el threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+    return await run_in_threadpool(fn, db, *args, **kwargs)
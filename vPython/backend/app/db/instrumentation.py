@@ -0,0 +1,112 @@
+"""
+Instrumentación del engine: conteo y duración de sentencias SQL
+
+Se usan los eventos before/after_cursor_execute del engine síncrono (con
+DB_ASYNC también el sync_engine del engine asíncrono), que corren en el
+mismo hilo que ejecuta la sentencia. El costo por sentencia es un
+perf_counter y una entrada en el histograma de su tipo.
+
+Las sentencias que tardan al menos SLOW_QUERY_MS se registran con sus
+parámetros. Si la petición se está perfilando (app/core/profiling.py), cada
+sentencia se agrega al perfil y las SELECT lentas se registran además con su
+plan de EXPLAIN (ANALYZE, BUFFERS).
+"""
+import time
+from typing import Any, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+from app.core.logger import sql_logger
+from app.core.metrics import statement_metrics
+from app.core.profiling import MAX_PARAMS_CHARS, MAX_STATEMENT_CHARS, current_profile, truncate
+
+# Tipos de sentencia con serie propia; el resto se agrupa en OTHER
+STATEMENT_KINDS = frozenset({
+    "SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY", "CREATE", "DROP", "ALTER",
+})
+
+_START_KEY = "statement_start"
+
+
+def statement_kind(statement: str) -> str:
+    """Tipo de sentencia según su primera palabra (SELECT, INSERT, ... u OTHER)"""
+    palabra = statement.lstrip(" \t\r\n(").split(None, 1)[0].upper() if statement.strip() else ""
+    return palabra if palabra in STATEMENT_KINDS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def explain_analyze(conn: Connection, statement: str, parameters: Any) -> Optional[str]:
+    """
+    Plan de EXPLAIN (ANALYZE, BUFFERS) de una sentencia ya ejecutada.
+    
+    ANALYZE vuelve a ejecutar la sentencia, por eso sólo se usa con SELECT. Se
+    ejecuta en un cursor aparte (sin pasar por los eventos del engine) dentro
+    de un SAVEPOINT, para que un error no aborte la transacción de la petición.
+    """
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT explain_plan")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT explain_plan")
+            raise
+        cursor.execute("RELEASE SAVEPOINT explain_plan")
+        return plan
+    except Exception as exc:
+        sql_logger.warning("No se pudo obtener el plan", extra={"fields": {"error": str(exc)}})
+        return None
+    finally:
+        cursor.close()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    kind = statement_kind(statement)
+    statement_metrics.observe(kind, elapsed)
+    
+    profile = current_profile()
+    slow = settings.SLOW_QUERY_MS > 0 and elapsed * 1000 >= settings.SLOW_QUERY_MS
+    if profile is None and not slow:
+        return
+    
+    plan = None
+    if slow:
+        if profile is not None and profile.explain and kind == "SELECT" and not executemany:
+            plan = explain_analyze(conn, statement, parameters)
+        fields = {
+            "kind": kind,
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql": truncate(statement, MAX_STATEMENT_CHARS),
+            "params": truncate(parameters, MAX_PARAMS_CHARS),
+        }
+        if plan is not None:
+            fields["plan"] = plan
+        sql_logger.warning("Sentencia lenta", extra={"fields": fields})
+    if profile is not None:
+        profile.add_statement(statement, parameters, elapsed, plan)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute no se dispara si la sentencia falla
+    conn = exception_context.connection
+    starts = conn.info.get(_START_KEY) if conn is not None else None
+    if starts:
+        starts.pop()
+    statement_metrics.observe_error(statement_kind(exception_context.statement or ""))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registrar los eventos de métricas en un engine síncrono"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,225 @@
+"""
+Vistas materializadas de reportes y su refresco en segundo plano
+
+Las vistas (migración c47a1e9f3b25) precalculan reportes caros sobre gastos:
+categoría × mes, conceptos principales por año y desglose por forma de pago.
+Se refrescan con REFRESH MATERIALIZED VIEW CONCURRENTLY, que no bloquea las
+lecturas, en un hilo de cada worker:
+
+- tras escrituras de gastos (invalidate_caches llama a notify), cuando pasan
+  MV_REFRESH_DEBOUNCE_SECONDS sin escrituras o, con escrituras continuas, a
+  más tardar MV_REFRESH_MAX_DELAY_SECONDS después de la primera;
+- cada MV_REFRESH_INTERVAL_SECONDS, para cubrir escrituras de otros workers
+  o hechas fuera de la API.
+
+Un advisory lock de transacción (pg_try_advisory_xact_lock) evita que dos
+workers refresquen a la vez, y el refresco periódico se omite si otro worker
+ya refrescó dentro del intervalo: con N workers sigue habiendo un refresco
+periódico por intervalo, no N.
+Cada refresco registra su hora y la versión de gastos que refleja en
+materialized_view_refreshes (stale_as_of de los reportes) e incrementa la
+versión "gastos_analytics" de table_versions (ETag de los reportes).
+"""
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.logger import logger
+from app.db.base import SessionLocal
+from app.models.materialized_view_refresh import MaterializedViewRefresh
+from app.models.table_version import TableVersion
+
+# Vistas en el orden en que se refrescan
+MATERIALIZED_VIEWS = ("mv_gastos_categoria_mes", "mv_gastos_top_conceptos", "mv_gastos_forma_pago")
+
+# Llave de table_versions para el ETag de los reportes
+ANALYTICS_VERSION_KEY = "gastos_analytics"
+
+# pg_try_advisory_xact_lock: un solo refresco a la vez entre workers
+REFRESH_LOCK_ID = 0x6D765F72  # "mv_r"
+
+
+def refresh_materialized_views(
+    db: Session,
+    concurrently: bool = True,
+    max_age: Optional[float] = None
+) -> Optional[float]:
+    """
+    Refrescar todas las vistas en una transacción y registrar el refresco.
+    
+    Con concurrently=False se usa el REFRESH normal, más rápido pero que
+    bloquea las lecturas (para cargas masivas). Con max_age (segundos) no se
+    refresca si el último refresco registrado es más reciente. Devuelve la
+    duración en ms, o None si no se refrescó (otro proceso está refrescando o
+    el último refresco es más reciente que max_age).
+    """
+    if not db.execute(select(func.pg_try_advisory_xact_lock(REFRESH_LOCK_ID))).scalar():
+        db.rollback()
+        return None
+    
+    if max_age is not None:
+        # Con el lock tomado: un refresco de otro worker ya está registrado
+        reciente = db.execute(
+            select(func.min(MaterializedViewRefresh.refreshed_at) > func.now() - timedelta(seconds=max_age))
+        ).scalar()
+        if reciente:
+            db.rollback()
+            return None
+    
+    inicio = time.perf_counter()
+    # Se lee antes de refrescar: una escritura concurrente queda como pendiente
+    version = db.execute(
+        select(TableVersion.version).where(TableVersion.tabla == "gastos")
+    ).scalar() or 0
+    
+    modo = "CONCURRENTLY " if concurrently else ""
+    for vista in MATERIALIZED_VIEWS:
+        db.execute(text(f"REFRESH MATERIALIZED VIEW {modo}{vista}"))
+    duracion_ms = (time.perf_counter() - inicio) * 1000
+    
+    stmt = insert(MaterializedViewRefresh).values([
+        {"vista": vista, "refreshed_at": func.now(), "gastos_version": version, "duracion_ms": round(duracion_ms)}
+        for vista in MATERIALIZED_VIEWS
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[MaterializedViewRefresh.vista],
+        set_={
+            "refreshed_at": stmt.excluded.refreshed_at,
+            "gastos_version": stmt.excluded.gastos_version,
+            "duracion_ms": stmt.excluded.duracion_ms
+        }
+    ))
+    
+    version_stmt = insert(TableVersion).values(tabla=ANALYTICS_VERSION_KEY, version=1)
+    db.execute(version_stmt.on_conflict_do_update(
+        index_elements=[TableVersion.tabla],
+        set_={"version": TableVersion.version + 1}
+    ))
+    db.commit()
+    return duracion_ms
+
+
+class MaterializedViewRefresher:
+    """
+    Hilo que refresca las vistas tras escrituras (con espera) o periódicamente.
+    
+    notify() sólo toma un lock y marca las vistas como pendientes, así que
+    puede llamarse desde cualquier escritura sin costo apreciable.
+    """
+    
+    def __init__(self, debounce: float, max_delay: float, interval: float):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dirty_since: Optional[float] = None
+        self._last_write = 0.0
+        self._last_refresh = time.monotonic()
+        self.refreshes = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_duration_ms: Optional[float] = None
+    
+    def notify(self) -> None:
+        """Registrar una escritura de gastos"""
+        with self._lock:
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._last_write = now
+        self._wakeup.set()
+    
+    def _due(self) -> Optional[float]:
+        """Momento (monotonic) del siguiente refresco, o None si no hay ninguno"""
+        with self._lock:
+            if self._dirty_since is not None:
+                return min(self._last_write + self.debounce, self._dirty_since + self.max_delay)
+            if self.interval > 0:
+                return self._last_refresh + self.interval
+            return None
+    
+    def refresh(self) -> None:
+        """Refrescar ahora y actualizar el estado (usado por el hilo)"""
+        with self._lock:
+            # Sin escrituras pendientes es el refresco periódico
+            periodico = self._dirty_since is None
+            self._dirty_since = None
+        db = SessionLocal()
+        try:
+            duracion_ms = refresh_materialized_views(db, max_age=self.interval if periodico else None)
+        except Exception:
+            db.rollback()
+            self.errors += 1
+            # Se reintenta con la siguiente escritura o el siguiente periodo
+            logger.exception("Error al refrescar las vistas materializadas")
+            return
+        finally:
+            db.close()
+            with self._lock:
+                self._last_refresh = time.monotonic()
+    
+        if duracion_ms is None:
+            self.skipped += 1
+            if not periodico:
+                # Otro worker está refrescando; puede no incluir las últimas escrituras
+                self.notify()
+            return
+        self.refreshes += 1
+        self.last_duration_ms = duracion_ms
+        logger.info(
+            "Vistas materializadas refrescadas",
+            extra={"fields": {"duration_ms": round(duracion_ms, 3), "vistas": len(MATERIALIZED_VIEWS)}}
+        )
+    
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            due = self._due()
+            timeout = None if due is None else due - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                self.refresh()
+                continue
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+    
+    def start(self) -> None:
+        """Iniciar el hilo (idempotente)"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="mv-refresher", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detener el hilo; un refresco en curso termina antes"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def stats(self) -> dict:
+        with self._lock:
+            pendiente = self._dirty_since is not None
+        return {
+            "running": self._thread is not None,
+            "pending": pendiente,
+            "refreshes": self.refreshes,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "last_duration_ms": self.last_duration_ms,
+        }
+
+
+mv_refresher = MaterializedViewRefresher(
+    debounce=settings.MV_REFRESH_DEBOUNCE_SECONDS,
+    max_delay=settings.MV_REFRESH_MAX_DELAY_SECONDS,
+    interval=settings.MV_REFRESH_INTERVAL_SECONDS
+)
@@ -0,0 +1,142 @@
+"""
+Dimensionamiento y métricas del pool de conexiones
+"""
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+
+
+def engine_connections(asyncpg: bool = False) -> int:
+    """
+    Máximo de conexiones del engine síncrono o del asíncrono en este proceso.
+    
+    Cada worker recibe una parte igual de DB_MAX_CONNECTIONS. Sin DB_ASYNC toda
+    la parte es del engine síncrono. Con DB_ASYNC se reparte: el síncrono, que
+    siguen usando la importación y el hilo de refresco de vistas
+    materializadas, se queda con DB_SYNC_MAX_CONNECTIONS y el asíncrono con el
+    resto. La sesión del hilo de refresco sale del engine síncrono, así que
+    cuenta dentro de la parte del worker.
+    """
+    por_worker = settings.DB_MAX_CONNECTIONS // max(1, settings.WORKERS)
+    if not settings.DB_ASYNC:
+        return max(1, por_worker)
+    if por_worker < 2:
+        raise ValueError(
+            "Con DB_ASYNC cada worker necesita al menos 2 conexiones (una por engine): "
+            f"DB_MAX_CONNECTIONS={settings.DB_MAX_CONNECTIONS}, WORKERS={settings.WORKERS}"
+        )
+    sync = max(1, min(settings.DB_SYNC_MAX_CONNECTIONS, por_worker - 1))
+    return por_worker - sync if asyncpg else sync
+
+
+def pool_limits(asyncpg: bool = False) -> tuple[int, int]:
+    """
+    Calcular (pool_size, max_overflow) de un engine de este proceso.
+    
+    pool_size + max_overflow no excede engine_connections(), de modo que la
+    suma de los pools de todos los engines y workers nunca excede
+    DB_MAX_CONNECTIONS.
+    """
+    limite = engine_connections(asyncpg)
+    pool_size = max(1, min(settings.DB_POOL_SIZE, limite))
+    max_overflow = max(0, min(settings.DB_MAX_OVERFLOW, limite - pool_size))
+    return pool_size, max_overflow
+
+
+def engine_options(asyncpg: bool = False) -> dict:
+    """Opciones comunes de create_engine / create_async_engine"""
+    pool_size, max_overflow = pool_limits(asyncpg)
+    options = {
+        "pool_pre_ping": True,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "poolclass": InstrumentedAsyncQueuePool if asyncpg else InstrumentedQueuePool,
+        "echo": settings.ENVIRONMENT == "development",
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if asyncpg:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+class PoolWaitStats:
+    """Acumulado del tiempo de espera para obtener una conexión del pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, elapsed: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total_ms": round(self.wait_total * 1000, 3),
+                "wait_avg_ms": round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+class _WaitTimingMixin:
+    """Mide cuánto tarda cada checkout del pool (espera + conexión)"""
+
+    wait_stats: PoolWaitStats
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    """QueuePool con métricas de espera"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool con métricas de espera"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+
+def get_pool_status(pool) -> dict:
+    """Estado actual de un pool: tamaño, conexiones en uso, overflow y esperas"""
+    status = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(wait_stats.snapshot())
+    return status
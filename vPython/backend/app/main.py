@@ -1,28 +1,54 @@
 """
 Aplicación principal de FastAPI
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-import time
 
 from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.prometheus import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from app.core.response_cache import response_cache
+from app.db.base import get_pools_status
+from app.db.materialized_views import mv_refresher
 from app.middleware.error_handler import (
     catch_exceptions_middleware,
     validation_exception_handler,
     database_exception_handler
 )
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.etag import etag_middleware
+from app.middleware.profiling import sql_profiling_middleware
+from app.middleware.request_logging import log_requests_middleware
 from app.api.routes import gastos, balance, deudas, catalogos, dashboard
+from app.api.controllers.gastos_search import init_trigram
+
+# Logging no bloqueante (cola + hilo escritor)
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicialización y tareas en segundo plano de cada worker"""
+    await init_trigram()
+    if settings.MV_REFRESH_ENABLED:
+        mv_refresher.start()
+    yield
+    mv_refresher.stop()
+
 
 # Crear instancia de FastAPI
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="API para gestión de gastos personales"
+    description="API para gestión de gastos personales",
+    lifespan=lifespan
 )
 
 # Guardar settings en app state
@@ -40,6 +66,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
 # Exception handlers
@@ -49,19 +76,25 @@ app.add_exception_handler(SQLAlchemyError, database_exception_handler)
 # Middleware global de errores
 app.middleware("http")(catch_exceptions_middleware)
 
+# ETag de las lecturas condicionales (ver app/api/dependencies.py)
+app.middleware("http")(etag_middleware)
+
+# Perfil SQL opt-in y Server-Timing (ver app/core/profiling.py)
+app.middleware("http")(sql_profiling_middleware)
+
+# Compresión negociada (brotli/gzip); envuelve a los middlewares anteriores,
+# así que comprime la respuesta ya completa (con ETag y Server-Timing)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+)
+
 
-# Middleware de logging
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Middleware para logging de requests"""
-    start_time = time.time()
-    
-    response = await call_next(request)
-    
-    process_time = time.time() - start_time
-    print(f"{request.method} {request.url.path} - {response.status_code} - {process_time:.2f}s")
-    
-    return response
+# Logging estructurado y latencia por ruta de cada petición; se registra al
+# final para ser la capa más externa: la latencia incluye la compresión
+app.middleware("http")(log_requests_middleware)
 
 
 # Health check
@@ -77,6 +110,34 @@ async def health_check(request: Request):
     }
 
 
+@app.get("/api/health/pool")
+async def pool_status():
+    """Métricas del pool de conexiones de este worker"""
+    return {"success": True, "data": get_pools_status()}
+
+
+@app.get("/api/health/cache")
+async def cache_status():
+    """Aciertos y fallos de la caché de respuestas de este worker"""
+    return {"success": True, "data": response_cache.stats()}
+
+
+@app.get("/api/health/views")
+async def views_status():
+    """Estado del refresco de vistas materializadas de este worker"""
+    return {"success": True, "data": mv_refresher.stats()}
+
+
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas de este worker en formato de texto de Prometheus"""
+    return Response(
+        content=render_metrics(get_pools_status(), mv_refresher.stats()),
+        media_type=METRICS_CONTENT_TYPE,
+        headers={"Cache-Control": "no-store"}
+    )
+
+
 # Incluir routers
 app.include_router(gastos.router, prefix="/api")
 app.include_router(balance.router, prefix="/api")
@@ -0,0 +1,180 @@
+"""
+Middleware de compresión de respuestas (brotli / gzip)
+
+Se negocia con Accept-Encoding: brotli si el cliente lo acepta y el paquete
+`brotli` está instalado, si no gzip. Sólo se comprimen respuestas de al menos
+`minimum_size` bytes; las respuestas en streaming (exportación) se comprimen
+por bloque. Los bloques grandes se comprimen en un hilo para no bloquear el
+event loop.
+"""
+import zlib
+from typing import Optional
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+# Tipos que ya vienen comprimidos o que no conviene comprimir
+EXCLUDED_CONTENT_TYPES = ("image/", "audio/", "video/", "application/zip", "application/gzip", "text/event-stream")
+
+# Bloques a partir de este tamaño se comprimen fuera del event loop
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Elegir 'br' o 'gzip' según Accept-Encoding (respeta q=0)"""
+    aceptadas = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            aceptadas[name] = q
+    
+    comodin = aceptadas.get("*", 0.0)
+    candidatas = ["br", "gzip"] if brotli is not None else ["gzip"]
+    for encoding in candidatas:
+        if aceptadas.get(encoding, comodin) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    """Compresor incremental con la misma interfaz para gzip y brotli"""
+    
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gzip.compress(data)
+        return out + self._gzip.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI de compresión negociada con umbral de tamaño"""
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+    
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+    
+        await _CompressionResponder(self, encoding)(scope, receive, send)
+
+
+class _CompressionResponder:
+    """Estado de una respuesta: decide al ver el primer bloque si comprime"""
+    
+    def __init__(self, middleware: CompressionMiddleware, encoding: str):
+        self.app = middleware.app
+        self.minimum_size = middleware.minimum_size
+        self.encoding = encoding
+        self.gzip_level = middleware.gzip_level
+        self.brotli_quality = middleware.brotli_quality
+        self.compressor: Optional[_Compressor] = None
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.pending = b""
+        self.passthrough = False
+        self.compressing = False
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+    
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if self.compressor is None:
+            self.compressor = _Compressor(self.encoding, self.gzip_level, self.brotli_quality)
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.compressor.compress, body, final)
+        return self.compressor.compress(body, final)
+    
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+    
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+    
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+    
+        if self.start_message is not None:
+            # Acumular hasta saber si se alcanza el umbral: las respuestas que
+            # pasan por BaseHTTPMiddleware llegan en varios bloques aunque sean
+            # pequeñas
+            self.pending += body
+            if more_body and len(self.pending) < self.minimum_size:
+                return
+            body, self.pending = self.pending, b""
+    
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) < self.minimum_size:
+                # Respuesta pequeña: no vale la pena comprimir
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+    
+            self.compressing = True
+            headers["Content-Encoding"] = self.encoding
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # La representación comprimida no es idéntica byte a byte
+                headers["ETag"] = "W/" + headers["etag"]
+            body = await self._compress(body, final=not more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+    
+        if self.compressing:
+            body = await self._compress(body, final=not more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
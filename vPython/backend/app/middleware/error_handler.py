@@ -5,7 +5,7 @@ from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
-import traceback
+from app.core.logger import logger
 
 
 async def catch_exceptions_middleware(request: Request, call_next):
@@ -13,8 +13,10 @@ async def catch_exceptions_middleware(request: Request, call_next):
     try:
         return await call_next(request)
     except Exception as exc:
-        print(f"Error no manejado: {exc}")
-        print(traceback.format_exc())
+        logger.exception(
+            "Error no manejado",
+            extra={"fields": {"method": request.method, "path": request.url.path}}
+        )
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
@@ -25,15 +27,21 @@ async def catch_exceptions_middleware(request: Request, call_next):
         )
 
 
-async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    """Handler para errores de validación de Pydantic"""
-    errors = []
-    for error in exc.errors():
-        errors.append({
+def format_validation_errors(errors: list) -> list:
+    """Convertir errores de Pydantic al formato de respuesta de la API"""
+    return [
+        {
             "field": ".".join(str(x) for x in error["loc"]),
             "message": error["msg"],
             "type": error["type"]
-        })
+        }
+        for error in errors
+    ]
+
+
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """Handler para errores de validación de Pydantic"""
+    errors = format_validation_errors(exc.errors())
     
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -47,8 +55,11 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 async def database_exception_handler(request: Request, exc: SQLAlchemyError):
     """Handler para errores de base de datos"""
-    print(f"Error de base de datos: {exc}")
-    print(traceback.format_exc())
+    logger.error(
+        "Error de base de datos",
+        exc_info=exc,
+        extra={"fields": {"method": request.method, "path": request.url.path}}
+    )
     
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
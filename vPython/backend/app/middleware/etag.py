@@ -0,0 +1,19 @@
+"""
+Middleware de ETag
+"""
+from fastapi import Request
+
+
+async def etag_middleware(request: Request, call_next):
+    """
+    Agregar el ETag calculado por conditional_get a las respuestas 200.
+    
+    Cache-Control: no-cache hace que el navegador revalide con If-None-Match
+    en cada uso en lugar de descargar de nuevo el contenido.
+    """
+    response = await call_next(request)
+    etag = getattr(request.state, "etag", None)
+    if etag and response.status_code == 200:
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Cache-Control", "no-cache")
+    return response
@@ -0,0 +1,44 @@
+"""
+Middleware de perfil SQL por petición (ver app/core/profiling.py)
+"""
+import time
+from fastapi import Request
+from app.core.config import settings
+from app.core.logger import sql_logger
+from app.core.profiling import PROFILE_HEADER, start_profile
+
+
+def profiling_requested(request: Request) -> bool:
+    """Perfilar si está activo para todas las peticiones o se pidió por cabecera"""
+    if settings.SQL_PROFILING:
+        return True
+    return settings.SQL_PROFILING_HEADER and request.headers.get(PROFILE_HEADER) == "1"
+
+
+async def sql_profiling_middleware(request: Request, call_next):
+    """Perfilar la petición: sentencias al log y desglose en Server-Timing"""
+    if not profiling_requested(request):
+        return await call_next(request)
+    
+    profile = start_profile()
+    response = await call_next(request)
+    total = time.perf_counter() - profile.start
+    
+    response.headers["Server-Timing"] = profile.server_timing(total)
+    sql_logger.info(
+        "Perfil SQL %s %s",
+        request.method,
+        request.url.path,
+        extra={"fields": {
+            "method": request.method,
+            "path": request.url.path,
+            "query": request.url.query,
+            "status": response.status_code,
+            "statements": profile.count,
+            "db_ms": round(profile.db_seconds * 1000, 3),
+            "serialize_ms": round(profile.serialize_seconds * 1000, 3),
+            "total_ms": round(total * 1000, 3),
+            "detalle": profile.statements,
+        }}
+    )
+    return response
@@ -0,0 +1,44 @@
+"""
+Middleware de logging y métricas de peticiones
+"""
+import time
+from fastapi import Request
+from app.core.logger import log_request
+from app.core.metrics import request_metrics
+
+# Ruta usada para peticiones que no coinciden con ninguna (evita una serie por URL)
+SIN_RUTA = "<sin ruta>"
+
+
+def route_template(request: Request) -> str:
+    """
+    Plantilla de la ruta que atendió la petición (p. ej. /api/gastos/{gasto_id}).
+    
+    La ruta resuelta sólo conoce su plantilla dentro del router; el prefijo con
+    que se incluyó se recupera de la URL quitando la parte ya resuelta.
+    """
+    route = request.scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return SIN_RUTA
+    
+    resuelta = template
+    for name, value in request.path_params.items():
+        resuelta = resuelta.replace(f"{{{name}}}", str(value)).replace(f"{{{name}:path}}", str(value))
+    path = request.url.path
+    if path.endswith(resuelta):
+        return path[:len(path) - len(resuelta)] + template
+    return template
+
+
+async def log_requests_middleware(request: Request, call_next):
+    """Medir la petición con perf_counter, registrar su latencia y loguearla"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    
+    route_path = route_template(request)
+    request_metrics.observe(request.method, route_path, response.status_code, elapsed)
+    log_request(request.method, request.url.path, route_path, response.status_code, elapsed)
+    
+    return response
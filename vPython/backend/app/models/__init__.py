@@ -4,5 +4,8 @@ Modelos de la aplicación
 from app.models.gasto import Gasto
 from app.models.balance import Balance
 from app.models.deuda import Deuda
+from app.models.gasto_rollup import GastoRollup
+from app.models.table_version import TableVersion
+from app.models.materialized_view_refresh import MaterializedViewRefresh
 
-__all__ = ["Gasto", "Balance", "Deuda"]
+__all__ = ["Gasto", "Balance", "Deuda", "GastoRollup", "TableVersion", "MaterializedViewRefresh"]
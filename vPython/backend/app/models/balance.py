@@ -3,15 +3,37 @@ Modelo de Balance
 """
 from sqlalchemy import Column, Integer, String, Numeric, DateTime
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
+from app.core.constants import TIPOS_BALANCE
 from app.db.base import Base
 
+# Conversión entre la clave corta almacenada y la etiqueta larga de la API
+TIPO_A_LARGO = dict(TIPOS_BALANCE)
+TIPO_A_CORTO = {largo: corto for corto, largo in TIPOS_BALANCE.items()}
+
+
+class TipoBalance(TypeDecorator):
+    """
+    Tipo de balance: se guarda corto ('D', 'I') y se lee largo ('Débito', 'Inversión').
+    
+    Acepta ambas formas al escribir o filtrar; valores desconocidos pasan sin cambio.
+    """
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return TIPO_A_CORTO.get(value, value)
+
+    def process_result_value(self, value, dialect):
+        return TIPO_A_LARGO.get(value, value)
+
 
 class Balance(Base):
     """Modelo de balance de cuentas"""
     __tablename__ = "balance"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    tipo = Column(String, nullable=False)  # D = Debe, C = Crédito
+    tipo = Column(TipoBalance, nullable=False)  # D = Débito, I = Inversión
     concepto = Column(String, nullable=False)
     monto = Column(Numeric(10, 2), nullable=False)
     deben_ser = Column(Numeric(10, 2), default=0)
@@ -1,10 +1,59 @@
 """
 Modelo de Gasto
 """
-from sqlalchemy import Column, Integer, String, Boolean, Numeric, Date, DateTime
+from sqlalchemy import Column, Computed, Integer, String, Boolean, Numeric, Date, DateTime, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
+from app.core.constants import MESES
 from app.db.base import Base
 
+# Tipos de gasto que se pagan a meses (índice parcial ix_gastos_msi_mci_fecha_cargo)
+TIPOS_A_PAGOS = ('MSI', 'MCI')
+
+# Huella de un gasto (concepto, monto, fecha_cargo, forma_pago, ocurrencia) para
+# deduplicar. ocurrencia distingue compras reales repetidas el mismo día (1, 2,
+# 3...). La expresión de una columna generada debe ser IMMUTABLE: date::text
+# depende de DateStyle, por eso la fecha se representa como días desde 2000-01-01.
+FINGERPRINT_SQL = (
+    "md5(concepto || '|' || monto::text || '|' || "
+    "(fecha_cargo - DATE '2000-01-01')::text || '|' || forma_pago || '|' || ocurrencia::text)"
+)
+
+# Periodo contable anio * 100 + número de mes (202501 = Enero de 2025); ordena
+# cronológicamente y permite rangos indexados. NULL si el mes no es válido.
+PERIODO_SQL = "anio * 100 + CASE mes " + " ".join(
+    f"WHEN '{nombre}' THEN {numero}" for numero, nombre in enumerate(MESES, start=1)
+) + " END"
+
+# Búsqueda por concepto (app/api/controllers/gastos_search.py): configuración
+# de texto explícita para que to_tsvector sea IMMUTABLE
+SEARCH_CONFIG = "spanish"
+CONCEPTO_TSV_SQL = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, concepto)"
+
+# Índice de trigramas sobre concepto: la migración e8d24b7c9f51 sólo lo crea si
+# pg_trgm está disponible, por eso no se declara aquí (alembic/env.py lo ignora)
+CONCEPTO_TRGM_INDEX = 'ix_gastos_concepto_trgm'
+
+# Índice único de la huella: su violación es un gasto duplicado
+FINGERPRINT_INDEX = 'ux_gastos_fingerprint'
+
+# Clave de autocompletado de concepto: minúsculas y sin acentos. translate se
+# aplica también a las mayúsculas acentuadas porque lower() no las convierte
+# con LC_CTYPE=C; normalize_concepto hace lo mismo en Python.
+ACENTOS = "áéíóúüñÁÉÍÓÚÜÑ"
+SIN_ACENTOS = "aeiouunaeiouun"
+_SIN_ACENTOS = str.maketrans(ACENTOS, SIN_ACENTOS)
+
+
+def concepto_clave(concepto):
+    """Expresión SQL de la clave de autocompletado (índice ix_gastos_concepto_clave)"""
+    return func.translate(func.lower(concepto), ACENTOS, SIN_ACENTOS)
+
+
+def normalize_concepto(concepto: str) -> str:
+    """Clave de autocompletado en Python (misma transformación que concepto_clave)"""
+    return concepto.lower().translate(_SIN_ACENTOS)
+
 
 class Gasto(Base):
     """Modelo de gastos - Equivalente a la tabla gastos"""
@@ -26,8 +75,45 @@ class Gasto(Base):
     tag = Column(String, default="NA")
     se_divide = Column(Boolean, default=False)
     gasto_x_mes = Column(String, default="NA")
+    ocurrencia = Column(Integer, nullable=False, default=1, server_default="1")
+    fingerprint = Column(String(32), Computed(FINGERPRINT_SQL, persisted=True), nullable=False)
+    periodo = Column(Integer, Computed(PERIODO_SQL, persisted=True))
+    concepto_tsv = Column(TSVECTOR, Computed(CONCEPTO_TSV_SQL, persisted=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     def __repr__(self):
         return f"<Gasto(id={self.id}, concepto='{self.concepto}', monto={self.monto})>"
+
+
+# Un gasto con la misma huella no se vuelve a insertar (migración 0f3a9c51d2e8)
+Index(FINGERPRINT_INDEX, Gasto.fingerprint, unique=True)
+
+# Series de /api/dashboard/series por rango de periodo (migración 9b6e3d2a41c7)
+Index('ix_gastos_periodo', Gasto.periodo, postgresql_include=['monto'])
+
+# Búsqueda por palabras de /api/gastos?q= (migración e8d24b7c9f51)
+Index('ix_gastos_concepto_tsv', Gasto.concepto_tsv, postgresql_using='gin')
+
+# Autocompletado de /api/gastos/suggest por prefijo (migración 3f9a6c1d7e28)
+Index(
+    'ix_gastos_concepto_clave',
+    concepto_clave(Gasto.concepto).label('concepto_clave'),
+    postgresql_ops={'concepto_clave': 'text_pattern_ops'}
+)
+
+# Índices para los filtros y el orden de /api/gastos (migración 6a0d927e76ec)
+Index('ix_gastos_fecha_cargo_id', Gasto.fecha_cargo.desc(), Gasto.id.desc())
+Index('ix_gastos_anio_mes', Gasto.anio, Gasto.mes)
+Index('ix_gastos_tipo_gasto_fecha_cargo', Gasto.tipo_gasto, Gasto.fecha_cargo.desc())
+Index('ix_gastos_categoria_fecha_cargo', Gasto.categoria, Gasto.fecha_cargo.desc())
+Index('ix_gastos_forma_pago_fecha_cargo', Gasto.forma_pago, Gasto.fecha_cargo.desc())
+Index('ix_gastos_tag_fecha_cargo', Gasto.tag, Gasto.fecha_cargo.desc())
+Index('ix_gastos_a_pagos_fecha_cargo', Gasto.fecha_cargo.desc(), postgresql_where=Gasto.a_pagos)
+Index('ix_gastos_se_divide_fecha_cargo', Gasto.fecha_cargo.desc(), postgresql_where=Gasto.se_divide)
+Index(
+    'ix_gastos_msi_mci_fecha_cargo',
+    Gasto.fecha_cargo.desc(),
+    Gasto.id.desc(),
+    postgresql_where=Gasto.tipo_gasto.in_(TIPOS_A_PAGOS)
+)
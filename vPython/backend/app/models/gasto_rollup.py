@@ -0,0 +1,29 @@
+"""
+Modelo de resumen mensual de Gastos
+"""
+from sqlalchemy import Column, Integer, String, Numeric
+from app.db.base import Base
+
+
+class GastoRollup(Base):
+    """
+    Suma y conteo de gastos por (anio, mes, tipo_gasto, categoria, forma_pago).
+    
+    Se mantiene de forma incremental desde el controlador de gastos y alimenta
+    el dashboard sin recorrer la tabla gastos.
+    """
+    __tablename__ = "gastos_rollup"
+
+    anio = Column(Integer, primary_key=True)
+    mes = Column(String, primary_key=True)
+    tipo_gasto = Column(String, primary_key=True)
+    categoria = Column(String, primary_key=True)
+    forma_pago = Column(String, primary_key=True)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+    cantidad = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"<GastoRollup(anio={self.anio}, mes='{self.mes}', "
+            f"tipo_gasto='{self.tipo_gasto}', total={self.total})>"
+        )
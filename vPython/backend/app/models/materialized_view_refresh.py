@@ -0,0 +1,24 @@
+"""
+Modelo de refrescos de vistas materializadas
+"""
+from sqlalchemy import Column, BigInteger, DateTime, Integer, String
+from app.db.base import Base
+
+
+class MaterializedViewRefresh(Base):
+    """
+    Último refresco de cada vista materializada de reportes.
+    
+    `gastos_version` es la versión de gastos (table_versions) leída antes del
+    refresco: si la versión actual es mayor, la vista no refleja las últimas
+    escrituras. `refreshed_at` se devuelve como stale_as_of en los reportes.
+    """
+    __tablename__ = "materialized_view_refreshes"
+
+    vista = Column(String, primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+    gastos_version = Column(BigInteger, nullable=False)
+    duracion_ms = Column(Integer)
+
+    def __repr__(self):
+        return f"<MaterializedViewRefresh(vista='{self.vista}', refreshed_at={self.refreshed_at})>"
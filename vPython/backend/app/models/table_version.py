@@ -0,0 +1,26 @@
+"""
+Modelo de versiones de tabla
+"""
+from sqlalchemy import Column, BigInteger, String
+from app.db.base import Base
+
+# Tablas cuya versión mantienen los triggers de la migración 5d2b8e4f7a13
+VERSIONED_TABLES = ("gastos", "balance", "deudas")
+
+
+class TableVersion(Base):
+    """
+    Contador de cambios por tabla.
+    
+    Un trigger por sentencia (AFTER INSERT/UPDATE/DELETE/TRUNCATE) incrementa
+    la versión en la misma transacción de la escritura, así que también cubre
+    importaciones y cambios hechos fuera de la API. Alimenta los ETag y forma
+    parte de la llave de la caché de respuestas y de la de totales de gastos.
+    """
+    __tablename__ = "table_versions"
+
+    tabla = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TableVersion(tabla='{self.tabla}', version={self.version})>"
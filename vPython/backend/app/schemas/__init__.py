@@ -1,13 +1,14 @@
 """
 Schemas de la aplicación
 """
-from app.schemas.gasto import GastoCreate, GastoUpdate, GastoResponse, GastoInDB
+from app.schemas.gasto import GastoCreate, GastoUpdate, GastoBulkUpdate, GastoResponse, GastoInDB
 from app.schemas.balance import BalanceCreate, BalanceUpdate, BalanceResponse, BalanceInDB
 from app.schemas.deuda import DeudaCreate, DeudaUpdate, DeudaResponse, DeudaInDB
 
 __all__ = [
     "GastoCreate",
     "GastoUpdate",
+    "GastoBulkUpdate",
     "GastoResponse",
     "GastoInDB",
     "BalanceCreate",
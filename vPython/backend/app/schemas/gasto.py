@@ -2,10 +2,11 @@
 Schemas de Gasto (Pydantic models para validación)
 """
 from datetime import date, datetime
-from decimal import Decimal
-from typing import Optional
-from pydantic import BaseModel, Field, validator
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator, validator
 from app.core.constants import TipoGasto, Categoria, FormaPago, Mes, TIPOS_GASTO, CATEGORIAS, FORMAS_PAGO, MESES
+from app.core.constants import FORMAS_PAGO_HEREDADAS
 
 
 class GastoBase(BaseModel):
@@ -25,6 +26,8 @@ class GastoBase(BaseModel):
     tag: str = Field(default="NA", max_length=50)
     se_divide: bool = False
     gasto_x_mes: str = Field(default="NA", max_length=20)
+    # 2, 3... para registrar la misma compra repetida el mismo día (huella distinta)
+    ocurrencia: int = Field(default=1, ge=1)
 
 
 class GastoCreate(GastoBase):
@@ -32,6 +35,35 @@ class GastoCreate(GastoBase):
     pass
 
 
+class GastoImport(GastoCreate):
+    """
+    Schema de una fila importada (CSV o libro heredado).
+    
+    Acepta los datos como los guarda la tabla: montos negativos (devoluciones)
+    y con más decimales, que se redondean a centavos como Numeric(10, 2). Sin
+    fecha_pago se usa fecha_cargo, y las formas de pago heredadas se traducen
+    al catálogo.
+    """
+    monto: Decimal = Field(..., gt=-Decimal("1e8"), lt=Decimal("1e8"))
+    fecha_pago: Optional[date] = None
+    
+    @field_validator("monto")
+    @classmethod
+    def redondear_monto(cls, value: Decimal) -> Decimal:
+        return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    
+    @field_validator("forma_pago", mode="before")
+    @classmethod
+    def traducir_forma_pago(cls, value: Any) -> Any:
+        return FORMAS_PAGO_HEREDADAS.get(value, value) if isinstance(value, str) else value
+    
+    @model_validator(mode="after")
+    def fecha_pago_por_defecto(self) -> "GastoImport":
+        if self.fecha_pago is None:
+            self.fecha_pago = self.fecha_cargo
+        return self
+
+
 class GastoUpdate(BaseModel):
     """Schema para actualizar un gasto"""
     concepto: Optional[str] = Field(None, min_length=1, max_length=255)
@@ -49,6 +81,20 @@ class GastoUpdate(BaseModel):
     tag: Optional[str] = Field(None, max_length=50)
     se_divide: Optional[bool] = None
     gasto_x_mes: Optional[str] = Field(None, max_length=20)
+    ocurrencia: Optional[int] = Field(None, ge=1)
+    
+    @field_validator("*")
+    @classmethod
+    def rechazar_null(cls, value: Any) -> Any:
+        # Los campos omitidos no se validan: sólo un null explícito llega aquí
+        if value is None:
+            raise ValueError("El campo no admite null")
+        return value
+
+
+class GastoBulkUpdate(GastoUpdate):
+    """Schema para actualizar un gasto dentro de una operación masiva"""
+    id: int
 
 
 class GastoInDB(BaseModel):
@@ -69,6 +115,7 @@ class GastoInDB(BaseModel):
     tag: str
     se_divide: bool
     gasto_x_mes: str
+    ocurrencia: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,7 @@
+"""
+Benchmarks del backend (python -m benchmarks.<benchmark>)
+
+Sin base de datos: serialization, compression. Con datos generados por
+benchmarks.datagen: controllers, http_load. benchmarks.suite los ejecuta
+todos y guarda JSON; benchmarks.compare compara dos resultados.
+"""
@@ -0,0 +1,90 @@
+"""
+Comparar dos resultados de benchmarks.suite
+
+Para cada escenario presente en ambos archivos compara las métricas
+principales (mediana y p95 en ms, req/s, µs por fila, bytes) y marca como
+regresión los cambios peores que --threshold por ciento. Termina con código
+1 si hay regresiones, para usarse en CI.
+
+Uso:
+    python -m benchmarks.compare base.json nuevo.json [--threshold 10]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Métrica -> True si un valor menor es mejor
+METRICS = {
+    "median_ms": True,
+    "p95_ms": True,
+    "rps": False,
+    "after_us_per_row": True,
+    "cpu_us": True,
+    "bytes": True,
+    "bytes_per_request": True,
+}
+
+
+def load(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare(base: dict, nuevo: dict, threshold: float) -> list[dict]:
+    """Filas de comparación por (benchmark, escenario, métrica)"""
+    filas = []
+    for benchmark, resultados in nuevo["results"].items():
+        anteriores = {r["name"]: r for r in base["results"].get(benchmark, [])}
+        for resultado in resultados:
+            anterior = anteriores.get(resultado["name"])
+            if anterior is None:
+                continue
+            for metrica, menor_es_mejor in METRICS.items():
+                antes, despues = anterior.get(metrica), resultado.get(metrica)
+                if not antes or despues is None:
+                    continue
+                cambio = (despues - antes) / antes * 100
+                peor = cambio if menor_es_mejor else -cambio
+                filas.append({
+                    "benchmark": benchmark,
+                    "name": resultado["name"],
+                    "metric": metrica,
+                    "base": antes,
+                    "new": despues,
+                    "change_pct": round(cambio, 1),
+                    "regression": peor > threshold,
+                    "improvement": peor < -threshold,
+                })
+    return filas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("nuevo")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Cambio en %% que se reporta")
+    parser.add_argument("--all", action="store_true", help="Mostrar también los cambios dentro del umbral")
+    args = parser.parse_args()
+
+    base, nuevo = load(args.base), load(args.nuevo)
+    if base["meta"].get("dataset") != nuevo["meta"].get("dataset"):
+        print("Aviso: los datos de prueba son distintos en ambos archivos", file=sys.stderr)
+    print(f"base: {base['meta'].get('commit')}  nuevo: {nuevo['meta'].get('commit')}")
+
+    filas = compare(base, nuevo, args.threshold)
+    for fila in filas:
+        if not (args.all or fila["regression"] or fila["improvement"]):
+            continue
+        marca = "REGRESIÓN" if fila["regression"] else "mejora" if fila["improvement"] else ""
+        print(
+            f"{fila['benchmark']:<13} {fila['name']:<42} {fila['metric']:<18} "
+            f"{fila['base']:>10} -> {fila['new']:>10} {fila['change_pct']:>+7}% {marca}"
+        )
+
+    regresiones = sum(fila["regression"] for fila in filas)
+    print(f"{len(filas)} métricas comparadas, {regresiones} regresiones (umbral {args.threshold}%)")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark de compresión de respuestas
+
+Para páginas típicas de /api/gastos (20 y 100 filas) y listados grandes sin
+paginar (/api/gastos/msi-mci, exportación) mide los bytes enviados y el
+tiempo de CPU de gzip y brotli en distintos niveles, usando el mismo
+compresor que CompressionMiddleware. No requiere base de datos.
+
+Uso:
+    python -m benchmarks.compression [--rows 20 100 1000 5000] [--repeat 20]
+"""
+import argparse
+import json
+import time
+from app.middleware.compression import _Compressor, brotli
+from benchmarks.serialization import make_rows, serialize_rows
+
+# (encoding, nivel) a comparar; los valores por defecto de Settings son gzip-6 y br-4
+VARIANTES = [("gzip", 1), ("gzip", 6), ("gzip", 9), ("br", 1), ("br", 4), ("br", 6), ("br", 11)]
+
+
+def compress(encoding: str, level: int, body: bytes) -> bytes:
+    """Comprimir un cuerpo completo como lo hace el middleware"""
+    return _Compressor(encoding, gzip_level=level, brotli_quality=level).compress(body, final=True)
+
+
+def timeit(encoding: str, level: int, body: bytes, repeat: int) -> float:
+    """Mejor tiempo (segundos) de `repeat` compresiones"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compress(encoding, level, body)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: list[int], repeat: int) -> list[dict]:
+    """Ejecutar el benchmark para cada tamaño de respuesta"""
+    variantes = [v for v in VARIANTES if v[0] == "gzip" or brotli is not None]
+    results = []
+    for n in sizes:
+        body = serialize_rows(make_rows(n))
+        for encoding, level in variantes:
+            compressed = compress(encoding, level, body)
+            seconds = timeit(encoding, level, body, repeat)
+            results.append({
+                "rows": n,
+                "raw_bytes": len(body),
+                "encoding": f"{encoding}-{level}",
+                "bytes": len(compressed),
+                "ratio": round(len(body) / len(compressed), 1),
+                "cpu_us": round(seconds * 1e6, 1),
+                "mb_per_s": round(len(body) / seconds / 1e6, 1),
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'filas':>6} {'bytes':>9} {'codificación':>13} {'comprimido':>11} {'ratio':>6} {'CPU µs':>10} {'MB/s':>7}")
+    for r in results:
+        print(
+            f"{r['rows']:>6} {r['raw_bytes']:>9} {r['encoding']:>13} {r['bytes']:>11} "
+            f"{r['ratio']:>5}x {r['cpu_us']:>10} {r['mb_per_s']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Micro-benchmarks de controladores contra la base de datos
+
+Mide los controladores de gastos, dashboard, balance y deudas con distintas
+combinaciones de filtros sobre los datos cargados con benchmarks.datagen.
+Antes de cada repetición se vacían las cachés de la aplicación, así que se
+mide el trabajo completo en la base de datos (salvo en los escenarios
+marcados "caché").
+
+Uso:
+    python -m benchmarks.controllers [--repeat 20] [--json]
+"""
+import argparse
+import json
+from datetime import date
+from typing import Callable
+from sqlalchemy.orm import Session
+from app.db.base import SessionLocal
+from app.api.controllers import balance as balance_controller
+from app.api.controllers import dashboard as dashboard_controller
+from app.api.controllers import deudas as deudas_controller
+from app.api.controllers import gastos as gastos_controller
+from app.api.controllers import gastos_suggest
+from benchmarks.timing import measure
+
+# Filtros representativos de la pantalla de gastos
+FILTROS = {
+    "sin filtros": {},
+    "categoria": {"categoria": ["E"]},
+    "tipo MSI/MCI": {"tipo_gasto": ["MSI", "MCI"]},
+    "forma de pago": {"forma_pago": ["BBVA Oro", "TDC NU"]},
+    "anio + mes": {"anio": 2024, "mes": ["Enero", "Febrero"]},
+    "rango de fechas": {"fecha_desde": "2025-01-01", "fecha_hasta": "2025-03-31"},
+    "tag": {"tag": "D"},
+    "búsqueda": {"q": "netfl"},
+    "combinado": {"categoria": ["E"], "tipo_gasto": ["Variable"], "forma_pago": ["Efectivo"], "anio": 2025},
+}
+
+
+def scenarios(db: Session) -> list[tuple[str, Callable[[], object], bool]]:
+    """(nombre, función, vaciar cachés antes de cada repetición)"""
+    casos = []
+    for nombre, filtros in FILTROS.items():
+        casos.append((
+            f"gastos offset p1 {nombre}",
+            lambda f=filtros: gastos_controller.get_gastos_by_filters(db, 0, 20, **f),
+            True,
+        ))
+        casos.append((
+            f"gastos cursor p1 {nombre}",
+            lambda f=filtros: gastos_controller.get_gastos_by_cursor(db, None, 20, **f),
+            True,
+        ))
+    casos += [
+        ("gastos offset p1 sin filtros (caché)", lambda: gastos_controller.get_gastos_by_filters(db, 0, 20), False),
+        ("gastos offset p500", lambda: gastos_controller.get_gastos_by_filters(db, 10_000, 20), False),
+        ("gastos suggest (índice en memoria)", lambda: gastos_suggest.suggest_conceptos(db, "su"), False),
+        ("gastos suggest (reconstrucción)", lambda: gastos_suggest.suggest_conceptos(db, "su"), True),
+        ("gastos msi-mci", lambda: gastos_controller.get_gastos_msi_mci(db), True),
+        ("dashboard", lambda: dashboard_controller.get_dashboard_data(db), True),
+        ("dashboard anio", lambda: dashboard_controller.get_dashboard_data(db, anio=2024), True),
+        (
+            "dashboard rango de fechas",
+            lambda: dashboard_controller.get_dashboard_data(db, fecha_desde="2025-01-01", fecha_hasta="2025-03-31"),
+            True,
+        ),
+        (
+            "dashboard series 10 años",
+            lambda: dashboard_controller.get_dashboard_series(db, desde=date(2016, 1, 1), hasta=date(2025, 12, 31)),
+            True,
+        ),
+        (
+            "dashboard series semanal",
+            lambda: dashboard_controller.get_dashboard_series(db, "semana", date(2025, 1, 1), date(2025, 12, 31)),
+            True,
+        ),
+        ("balance", lambda: balance_controller.get_all_balance(db), True),
+        ("deudas", lambda: deudas_controller.get_all_deudas(db), True),
+    ]
+    return casos
+
+
+def run(repeat: int = 20, warmup: int = 2) -> list[dict]:
+    """Ejecutar todos los escenarios; cada repetición termina su transacción"""
+    db = SessionLocal()
+    try:
+        results = []
+        for nombre, fn, sin_cache in scenarios(db):
+            def ejecutar(fn=fn):
+                fn()
+                db.rollback()
+            before = gastos_controller.invalidate_caches if sin_cache else None
+            results.append({"name": nombre, **measure(ejecutar, repeat, warmup, before)})
+        return results
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'escenario':<42} {'mediana ms':>11} {'p95 ms':>9} {'mín ms':>9}")
+    for r in results:
+        print(f"{r['name']:<42} {r['median_ms']:>11} {r['p95_ms']:>9} {r['min_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Generador de datos sintéticos para benchmarks
+
+Genera gastos, balance y deudas realistas (conceptos, montos y formas de pago
+coherentes con los catálogos de app.core.constants) a la escala pedida y los
+carga con COPY. La generación es determinista: con la misma semilla y --reset
+se obtienen los mismos datos y los mismos ids, de modo que los resultados de
+distintos commits son comparables.
+
+Los gastos pasan por una tabla temporal y se insertan con ON CONFLICT DO
+NOTHING: las filas que repiten una huella ya registrada se omiten. Con
+--reset los índices secundarios de gastos se eliminan durante la carga y se
+recrean al final (crear un índice sobre la tabla llena es mucho más rápido
+que mantenerlo fila por fila). Al final se reconstruye gastos_rollup, se
+refrescan las vistas materializadas y se ejecuta ANALYZE.
+
+Uso:
+    python -m benchmarks.datagen --rows 100000 [--seed 0] [--years 5] [--reset]
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import date, timedelta
+from typing import Iterator, Sequence
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.constants import FORMAS_PAGO, GASTO_X_MES, MESES
+from app.db.base import SessionLocal
+from app.db.materialized_views import refresh_materialized_views
+from app.models.balance import Balance
+from app.models.deuda import Deuda
+from app.models.gasto import Gasto
+from app.schemas.gasto import GastoCreate
+from app.api.controllers.gastos_rollup import rebuild_rollup
+
+# Columnas de gastos que se generan (las de GastoCreate, en su orden)
+GASTO_FIELDS = tuple(GastoCreate.model_fields)
+BALANCE_FIELDS = ("tipo", "concepto", "monto", "deben_ser", "diferencia", "comentarios")
+DEUDA_FIELDS = ("tipo", "item", "monto", "fecha")
+
+# Última fecha generada (fija para que los datos no dependan del día en que se generan)
+FECHA_FINAL = date(2025, 12, 31)
+
+CHUNK_SIZE = 100_000
+
+# (concepto, categoría, tipo de gasto, monto mínimo, monto máximo, peso)
+CONCEPTOS = [
+    ("Oxxo", "E", "Variable", 20, 400, 14),
+    ("Súper Walmart", "E", "Variable", 200, 3500, 12),
+    ("Gasolina", "E", "Variable", 300, 1500, 8),
+    ("Uber", "E", "Variable", 60, 450, 8),
+    ("Restaurante", "E", "Variable", 150, 2500, 8),
+    ("Amazon", "E", "Variable", 150, 6000, 6),
+    ("Farmacia", "E", "Variable", 80, 1200, 4),
+    ("Starbucks", "E", "Variable", 60, 250, 4),
+    ("Cine", "E", "Variable", 90, 600, 2),
+    ("Netflix", "E", "Fijo", 219, 299, 1),
+    ("Spotify", "E", "Fijo", 129, 199, 1),
+    ("Renta", "E", "Fijo", 9000, 15000, 1),
+    ("CFE", "E", "Fijo", 300, 1500, 1),
+    ("Telcel", "E", "Fijo", 300, 700, 1),
+    ("Internet", "E", "Fijo", 400, 800, 1),
+    ("Gimnasio", "E", "Fijo", 500, 1200, 1),
+    ("Liverpool", "E", "MSI", 1500, 25000, 2),
+    ("Mercado Libre", "E", "MSI", 800, 12000, 2),
+    ("Préstamo personal", "E", "MCI", 3000, 30000, 1),
+    ("Nómina", "I", "Fijo", 15000, 45000, 2),
+    ("Freelance", "I", "Variable", 2000, 20000, 1),
+]
+TARJETAS_CREDITO = ["BBVA Oro", "Klar Platino", "TDC NU", "Santander Free"]
+PLAZOS = [3, 6, 9, 12, 18]
+TAGS_PESOS = (("NA", 90), ("D", 5), ("MD", 5))
+
+BALANCE_CONCEPTOS = [("D", "Cuenta de nómina"), ("D", "Ahorro"), ("D", "Efectivo"), ("I", "CETES"), ("I", "Fondo")]
+DEUDA_ITEMS = [("T", "Tarjeta"), ("O", "Préstamo"), ("O", "Amigo")]
+
+
+def _monto(rnd: random.Random, minimo: int, maximo: int) -> str:
+    centavos = rnd.randint(minimo * 100, maximo * 100)
+    return f"{centavos // 100}.{centavos % 100:02d}"
+
+
+def generate_gastos(
+    rows: int,
+    seed: int = 0,
+    years: int = 5,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[list[tuple]]:
+    """
+    Generar `rows` gastos en lotes de tuplas en el orden de GASTO_FIELDS.
+
+    Las elecciones de catálogo se hacen por columna y por lote con
+    random.choices, que es mucho más rápido que elegir fila por fila.
+    """
+    rnd = random.Random(seed)
+    dias = 365 * years
+    conceptos = [c[:5] for c in CONCEPTOS]
+    pesos = [c[5] for c in CONCEPTOS]
+    tags, tag_pesos = zip(*TAGS_PESOS)
+
+    generadas = 0
+    while generadas < rows:
+        n = min(chunk_size, rows - generadas)
+        elegidos = rnd.choices(conceptos, weights=pesos, k=n)
+        formas = rnd.choices(FORMAS_PAGO, k=n)
+        lote = []
+        for (concepto, categoria, tipo, minimo, maximo), forma, tag in zip(
+            elegidos, formas, rnd.choices(tags, weights=tag_pesos, k=n)
+        ):
+            fecha = FECHA_FINAL - timedelta(days=rnd.randrange(dias))
+            a_pagos = tipo in ("MSI", "MCI")
+            if categoria == "I":
+                forma = "Transferencia"
+            elif a_pagos:
+                forma = rnd.choice(TARJETAS_CREDITO)
+            total_meses = rnd.choice(PLAZOS) if a_pagos else 0
+            lote.append((
+                concepto,
+                _monto(rnd, minimo, maximo),
+                tipo,
+                forma,
+                MESES[fecha.month - 1],
+                fecha.year,
+                fecha,
+                fecha + timedelta(days=20) if forma in TARJETAS_CREDITO else fecha,
+                categoria,
+                a_pagos,
+                rnd.randint(1, total_meses) if a_pagos else 0,
+                total_meses,
+                tag,
+                rnd.random() < 0.05,
+                GASTO_X_MES[fecha.month - 1] if a_pagos else "NA",
+            ))
+        generadas += n
+        yield lote
+
+
+def generate_balance(rows: int, seed: int = 0) -> list[tuple]:
+    """Generar cuentas de balance en el orden de BALANCE_FIELDS"""
+    rnd = random.Random(seed + 1)
+    filas = []
+    for i in range(rows):
+        tipo, concepto = BALANCE_CONCEPTOS[i % len(BALANCE_CONCEPTOS)]
+        monto = rnd.randint(100_000, 20_000_000)
+        deben_ser = rnd.randint(100_000, 20_000_000)
+        filas.append((
+            tipo,
+            f"{concepto} {i + 1}",
+            f"{monto / 100:.2f}",
+            f"{deben_ser / 100:.2f}",
+            f"{(monto - deben_ser) / 100:.2f}",
+            None,
+        ))
+    return filas
+
+
+def generate_deudas(rows: int, seed: int = 0, years: int = 5) -> list[tuple]:
+    """Generar deudas en el orden de DEUDA_FIELDS"""
+    rnd = random.Random(seed + 2)
+    filas = []
+    for i in range(rows):
+        tipo, item = DEUDA_ITEMS[i % len(DEUDA_ITEMS)]
+        filas.append((
+            tipo,
+            f"{item} {i + 1}",
+            _monto(rnd, 500, 50000),
+            FECHA_FINAL - timedelta(days=rnd.randrange(365 * years)),
+        ))
+    return filas
+
+
+def _copy_rows(db: Session, tabla: str, fields: Sequence[str], rows: Sequence[tuple]) -> None:
+    """Enviar filas con COPY en la transacción de la sesión"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [("" if v is None else v.isoformat() if isinstance(v, date) else v) for v in row]
+        for row in rows
+    )
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {tabla} ({', '.join(fields)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def drop_secondary_indexes(db: Session, tabla: str) -> list[str]:
+    """
+    Eliminar los índices no únicos de una tabla y devolver sus definiciones.
+
+    Los únicos (llave primaria y huella) se conservan porque ON CONFLICT los
+    necesita. Al ser DDL dentro de la transacción, un error deja todo igual.
+    """
+    definiciones = db.execute(text(
+        "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) "
+        "FROM pg_index i WHERE i.indrelid = CAST(:tabla AS regclass) AND NOT i.indisunique"
+    ), {"tabla": tabla}).all()
+    for nombre, _ in definiciones:
+        db.execute(text(f"DROP INDEX {nombre}"))
+    return [definicion for _, definicion in definiciones]
+
+
+def reset_tables(db: Session) -> None:
+    """Vaciar gastos, balance y deudas y reiniciar sus ids"""
+    tablas = ", ".join(t.__tablename__ for t in (Gasto, Balance, Deuda))
+    db.execute(text(f"TRUNCATE {tablas} RESTART IDENTITY"))
+
+
+def load(
+    db: Session,
+    rows: int,
+    seed: int = 0,
+    years: int = 5,
+    reset: bool = False,
+    chunk_size: int = CHUNK_SIZE
+) -> dict:
+    """
+    Generar y cargar los datos en una transacción.
+
+    Balance y deudas se escalan con los gastos (una cuenta y una deuda por
+    cada 1000 gastos, mínimo 20). Devuelve el reporte con conteos y tiempos.
+    """
+    inicio = time.perf_counter()
+    indices = []
+    if reset:
+        reset_tables(db)
+        indices = drop_secondary_indexes(db, Gasto.__tablename__)
+
+    staging = "bench_gastos_staging"
+    db.execute(text(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {', '.join(GASTO_FIELDS)} FROM {Gasto.__tablename__} WITH NO DATA"
+    ))
+    for lote in generate_gastos(rows, seed, years, chunk_size):
+        _copy_rows(db, staging, GASTO_FIELDS, lote)
+    generado = time.perf_counter()
+
+    columnas = ", ".join(GASTO_FIELDS)
+    insertados = db.execute(text(
+        f"INSERT INTO {Gasto.__tablename__} ({columnas}) SELECT {columnas} FROM {staging} "
+        f"ON CONFLICT (fingerprint) DO NOTHING"
+    )).rowcount
+    for definicion in indices:
+        db.execute(text(definicion))
+
+    auxiliares = max(20, rows // 1000)
+    _copy_rows(db, Balance.__tablename__, BALANCE_FIELDS, generate_balance(auxiliares, seed))
+    _copy_rows(db, Deuda.__tablename__, DEUDA_FIELDS, generate_deudas(auxiliares, seed, years))
+    db.commit()
+    cargado = time.perf_counter()
+
+    rebuild_rollup(db)
+    refresh_materialized_views(db, concurrently=False)
+    for tabla in (Gasto, Balance, Deuda):
+        db.execute(text(f"ANALYZE {tabla.__tablename__}"))
+    db.commit()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "gastos_generados": rows,
+        "gastos_insertados": insertados,
+        "balance": auxiliares,
+        "deudas": auxiliares,
+        "segundos_generacion": round(generado - inicio, 2),
+        "segundos_carga": round(cargado - generado, 2),
+        "segundos": round(segundos, 2),
+        "filas_por_segundo": round(rows / segundos) if segundos else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Gastos a generar (10k-10M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--years", type=int, default=5, help="Años hacia atrás desde 2025-12-31")
+    parser.add_argument("--reset", action="store_true", help="Vaciar gastos, balance y deudas antes de cargar")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        reporte = load(db, args.rows, args.seed, args.years, args.reset)
+    finally:
+        db.close()
+    print(
+        f"Gastos: {reporte['gastos_insertados']}/{reporte['gastos_generados']} insertados | "
+        f"balance: {reporte['balance']} | deudas: {reporte['deudas']} | "
+        f"{reporte['segundos']} s ({reporte['filas_por_segundo']} filas/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Escenarios de carga HTTP contra la aplicación en el mismo proceso
+
+Cada escenario envía `--requests` peticiones con `--concurrency` clientes
+simultáneos a través de httpx.ASGITransport (sin red ni servidor), de modo
+que se mide la pila completa: middlewares, dependencias, consultas,
+serialización y compresión. El cliente comparte el event loop con la
+aplicación, así que las cifras sirven para comparar commits, no como
+capacidad absoluta de un despliegue.
+
+Los logs de petición se escriben en stderr; redirigirlo para no mezclar la
+salida (2>/dev/null).
+
+Uso:
+    python -m benchmarks.http_load [--requests 500] [--concurrency 10] [--json]
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+import httpx
+from app.main import app
+from benchmarks.timing import summarize_ms
+
+# (nombre, ruta) de cada escenario
+ESCENARIOS = [
+    ("catalogos", "/api/catalogos/"),
+    ("gastos p1", "/api/gastos/?limit=20"),
+    ("gastos p1 filtros", "/api/gastos/?limit=20&categoria=E&tipo_gasto=Variable&anio=2025"),
+    ("gastos búsqueda", "/api/gastos/?limit=20&q=amazon"),
+    ("gastos suggest", "/api/gastos/suggest?prefix=su"),
+    ("gastos cursor", "/api/gastos/?limit=20&paginacion=cursor"),
+    ("gastos 100", "/api/gastos/?limit=100"),
+    ("gastos msi-mci", "/api/gastos/msi-mci"),
+    ("dashboard", "/api/dashboard/"),
+    ("dashboard anio", "/api/dashboard/?anio=2024"),
+    ("dashboard series", "/api/dashboard/series?desde=2016-01-01&hasta=2025-12-31"),
+    ("dashboard formas-pago", "/api/dashboard/formas-pago?anio=2025"),
+    ("balance", "/api/balance/"),
+    ("deudas", "/api/deudas/"),
+]
+
+
+async def run_scenario(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> dict:
+    """Enviar `requests` GET a `path` con `concurrency` clientes"""
+    latencias = []
+    estados = Counter()
+    bytes_recibidos = 0
+    pendientes = iter(range(requests))
+
+    async def cliente():
+        nonlocal bytes_recibidos
+        for _ in pendientes:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencias.append(time.perf_counter() - start)
+            estados[response.status_code] += 1
+            bytes_recibidos += response.num_bytes_downloaded
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concurrency)))
+    segundos = time.perf_counter() - inicio
+    return {
+        "rps": round(requests / segundos, 1),
+        "errors": sum(n for status, n in estados.items() if status >= 400),
+        "status": {str(status): n for status, n in sorted(estados.items())},
+        "bytes_per_request": round(bytes_recibidos / requests),  # ya comprimidos
+        **summarize_ms(latencias),
+    }
+
+
+async def run_async(requests: int, concurrency: int, escenarios=ESCENARIOS) -> list[dict]:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Accept-Encoding": "br, gzip"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        results = []
+        for nombre, path in escenarios:
+            # Calentamiento: conexiones del pool, cachés y planes preparados
+            await run_scenario(client, path, min(requests, concurrency * 2), concurrency)
+            results.append({"name": nombre, "path": path, **await run_scenario(client, path, requests, concurrency)})
+        return results
+
+
+def run(requests: int = 500, concurrency: int = 10) -> list[dict]:
+    """Ejecutar todos los escenarios y devolver un resultado por escenario"""
+    return asyncio.run(run_async(requests, concurrency))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    results = run(args.requests, args.concurrency)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'escenario':<20} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'errores':>8} {'bytes':>8}")
+    for r in results:
+        print(
+            f"{r['name']:<20} {r['rps']:>8} {r['median_ms']:>9} {r['p95_ms']:>9} "
+            f"{r['errors']:>8} {r['bytes_per_request']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
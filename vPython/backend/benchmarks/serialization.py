@@ -0,0 +1,113 @@
+"""
+Benchmark de serialización de listados
+
+Compara el costo por fila de la ruta anterior (objeto ORM ->
+GastoResponse.model_validate -> jsonable_encoder -> json.dumps) contra la ruta
+rápida (fila de columnas -> dict -> pydantic_core.to_json). No requiere base de
+datos: las filas se generan en memoria.
+
+Uso:
+    python -m benchmarks.serialization [--rows 20 100 1000] [--repeat 50]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from app.api.controllers.gastos import GASTO_KEYS
+from app.core.constants import TIPOS_GASTO, CATEGORIAS, FORMAS_PAGO, MESES
+from app.core.serialization import FastJSONResponse, rows_to_dicts
+from app.models.gasto import Gasto
+from app.schemas.gasto import GastoResponse
+
+
+def make_rows(n: int, seed: int = 0) -> list[tuple]:
+    """Generar n filas de gastos en el orden de GASTO_KEYS"""
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        fecha = date(2024, 1, 1) + timedelta(days=rnd.randint(0, 700))
+        values = {
+            "id": i + 1,
+            "concepto": f"Concepto {rnd.randint(1, 500)}",
+            "monto": Decimal(rnd.randint(100, 500000)) / 100,
+            "tipo_gasto": rnd.choice(TIPOS_GASTO),
+            "forma_pago": rnd.choice(FORMAS_PAGO),
+            "mes": MESES[fecha.month - 1],
+            "anio": fecha.year,
+            "fecha_cargo": fecha,
+            "fecha_pago": fecha + timedelta(days=20),
+            "categoria": rnd.choice(CATEGORIAS),
+            "a_pagos": False,
+            "no_mens": 0,
+            "total_meses": 0,
+            "tag": "NA",
+            "se_divide": False,
+            "gasto_x_mes": "NA",
+            "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+            "updated_at": None,
+        }
+        rows.append(tuple(values[key] for key in GASTO_KEYS))
+    return rows
+
+
+def serialize_orm(gastos: list[Gasto]) -> bytes:
+    """Ruta anterior: schema por objeto ORM y jsonable_encoder de FastAPI"""
+    data = [GastoResponse.model_validate(gasto) for gasto in gastos]
+    content = jsonable_encoder({"success": True, "data": data})
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def serialize_rows(rows: list[tuple]) -> bytes:
+    """Ruta rápida: filas de columnas serializadas con pydantic-core"""
+    return FastJSONResponse({"success": True, "data": rows_to_dicts(rows, GASTO_KEYS)}).body
+
+
+def timeit(fn, arg, repeat: int) -> float:
+    """Mejor tiempo (segundos) de `repeat` ejecuciones"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: list[int], repeat: int) -> list[dict]:
+    """Ejecutar el benchmark para cada tamaño de página"""
+    results = []
+    for n in sizes:
+        rows = make_rows(n)
+        gastos = [Gasto(**dict(zip(GASTO_KEYS, row))) for row in rows]
+        assert json.loads(serialize_orm(gastos)) == json.loads(serialize_rows(rows))
+        before = timeit(serialize_orm, gastos, repeat)
+        after = timeit(serialize_rows, rows, repeat)
+        results.append({
+            "rows": n,
+            "before_us_per_row": round(before / n * 1e6, 2),
+            "after_us_per_row": round(after / n * 1e6, 2),
+            "speedup": round(before / after, 1),
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'filas':>6} {'antes µs/fila':>14} {'después µs/fila':>16} {'mejora':>7}")
+    for r in results:
+        print(f"{r['rows']:>6} {r['before_us_per_row']:>14} {r['after_us_per_row']:>16} {r['speedup']:>6}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Suite completa de benchmarks con resultados en JSON
+
+Ejecuta los micro-benchmarks sin base de datos (serialización, compresión),
+los de controladores y los escenarios HTTP en el mismo proceso, y guarda un
+JSON con los resultados y los metadatos necesarios para comparar (commit,
+tamaño de los datos, versión de Postgres, DB_ASYNC). Se compara con
+benchmarks.compare.
+
+Flujo típico:
+    python -m benchmarks.datagen --rows 1000000 --reset
+    python -m benchmarks.suite --output resultados/base.json 2>/dev/null
+    (cambios)
+    python -m benchmarks.suite --output resultados/nuevo.json 2>/dev/null
+    python -m benchmarks.compare resultados/base.json resultados/nuevo.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import func, text
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.balance import Balance
+from app.models.deuda import Deuda
+from app.models.gasto import Gasto
+from benchmarks import compression, controllers, http_load, serialization
+
+BENCHMARKS = ("serialization", "compression", "controllers", "http")
+
+
+def git_commit() -> Optional[str]:
+    """Commit actual (con sufijo -dirty si hay cambios sin confirmar)"""
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"]) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def dataset_info() -> dict:
+    """Filas por tabla y versión de Postgres de la base de datos de prueba"""
+    db = SessionLocal()
+    try:
+        info = {
+            tabla.__tablename__: db.query(func.count()).select_from(tabla).scalar()
+            for tabla in (Gasto, Balance, Deuda)
+        }
+        info["postgres"] = db.execute(text("SHOW server_version")).scalar()
+        return info
+    finally:
+        db.close()
+
+
+def run(benchmarks: tuple, quick: bool = False) -> dict:
+    """Ejecutar los benchmarks pedidos y devolver el documento de resultados"""
+    repeat = 5 if quick else 20
+    results = {}
+    if "serialization" in benchmarks:
+        results["serialization"] = [
+            {"name": f"rows={r['rows']}", **r}
+            for r in serialization.run([20, 100, 1000], repeat * 2)
+        ]
+    if "compression" in benchmarks:
+        results["compression"] = [
+            {"name": f"rows={r['rows']} {r['encoding']}", **r}
+            for r in compression.run([20, 100, 1000], repeat)
+        ]
+    if "controllers" in benchmarks:
+        results["controllers"] = controllers.run(repeat)
+    if "http" in benchmarks:
+        results["http"] = http_load.run(requests=100 if quick else 500, concurrency=10)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "db_async": settings.DB_ASYNC,
+            "quick": quick,
+            "dataset": dataset_info() if {"controllers", "http"} & set(benchmarks) else None,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", "-o", help="Archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="Menos repeticiones (para probar la suite)")
+    args = parser.parse_args()
+
+    documento = json.dumps(run(tuple(args.only), args.quick), indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(documento + "\n", encoding="utf-8")
+        print(f"Resultados en {args.output}")
+    else:
+        print(documento)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Utilidades de medición compartidas por los benchmarks
+"""
+import statistics
+import time
+from typing import Callable, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Percentil q (0-1) por el método del rango más cercano"""
+    ordenados = sorted(values)
+    if not ordenados:
+        return 0.0
+    index = max(0, min(len(ordenados) - 1, round(q * len(ordenados) + 0.5) - 1))
+    return ordenados[index]
+
+
+def summarize_ms(seconds: Sequence[float]) -> dict:
+    """Resumen en milisegundos de una serie de duraciones"""
+    return {
+        "n": len(seconds),
+        "min_ms": round(min(seconds) * 1000, 3),
+        "median_ms": round(statistics.median(seconds) * 1000, 3),
+        "mean_ms": round(statistics.fmean(seconds) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 0.95) * 1000, 3),
+        "max_ms": round(max(seconds) * 1000, 3),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 2, before: Callable[[], object] = None) -> dict:
+    """
+    Ejecutar `fn` `warmup` + `repeat` veces y resumir las mediciones.
+
+    `before` se ejecuta antes de cada repetición, fuera de la medición (por
+    ejemplo para vaciar cachés).
+    """
+    for _ in range(warmup):
+        if before:
+            before()
+        fn()
+    tiempos = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - start)
+    return summarize_ms(tiempos)
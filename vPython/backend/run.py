@@ -1,15 +1,21 @@
 #!/usr/bin/env python
 """
 Script para ejecutar el servidor
+
+En desarrollo se ejecuta un solo proceso con recarga automática; en cualquier
+otro entorno se levantan settings.WORKERS procesos. Cada worker dimensiona sus
+pools con DB_MAX_CONNECTIONS / WORKERS (ver app/db/pool.py).
 """
 import uvicorn
 from app.core.config import settings
 
 if __name__ == "__main__":
+    development = settings.ENVIRONMENT == "development"
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.ENVIRONMENT == "development",
+        reload=development,
+        workers=1 if development else settings.WORKERS,
         log_level="info"
     )
@@ -0,0 +1,12 @@
+"""
+Configuración de las pruebas
+
+Las pruebas con base de datos usan TEST_DATABASE_URL, nunca la base de
+DATABASE_URL: algunas vacían tablas dentro de una transacción que se revierte
+y las bloquean mientras corren. Sin TEST_DATABASE_URL esas pruebas se omiten.
+"""
+import os
+
+if os.getenv("TEST_DATABASE_URL"):
+    # Antes de importar app: el engine se crea con settings.DATABASE_URL
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
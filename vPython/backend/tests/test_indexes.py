@@ -0,0 +1,128 @@
+"""
+Uso de los índices de gastos por el planificador (migración 6a0d927e76ec)
+
+Ejecuta las consultas reales de los controladores de /api/gastos y revisa con
+EXPLAIN que el plan usa el índice esperado para cada filtro.
+
+El plan depende de los datos, así que cada prueba corre en una transacción
+que vacía gastos (TRUNCATE), carga un conjunto fijo en el que cada valor
+filtrado es poco frecuente, ejecuta ANALYZE y al final se revierte. TRUNCATE
+bloquea la tabla mientras dura la prueba, por eso sólo corre contra la base
+de pruebas de TEST_DATABASE_URL (ver tests/conftest.py), migrada con
+alembic upgrade head.
+"""
+import os
+import pytest
+
+if not os.getenv("TEST_DATABASE_URL"):
+    pytest.skip("Se requiere TEST_DATABASE_URL con una base de pruebas migrada", allow_module_level=True)
+
+from sqlalchemy import event, text
+from app.core.constants import MESES
+from app.db.base import SessionLocal, engine
+from app.api.controllers import gastos as controller
+
+# Gastos del conjunto de prueba; cada valor filtrado aparece en 1 de cada 200
+FILAS = 20000
+
+DATOS_SQL = f"""
+INSERT INTO gastos (
+    concepto, monto, tipo_gasto, forma_pago, mes, anio, fecha_cargo, fecha_pago,
+    categoria, a_pagos, no_mens, total_meses, tag, se_divide, gasto_x_mes
+)
+SELECT
+    'explain ' || i,
+    1 + i % 500,
+    CASE i % 200 WHEN 0 THEN 'MSI' WHEN 1 THEN 'MCI' WHEN 2 THEN 'Fijo' ELSE 'Variable' END,
+    CASE i % 200 WHEN 4 THEN 'Efectivo' ELSE 'BBVA Oro' END,
+    (ARRAY{list(MESES)})[1 + i % 12],
+    CASE i % 200 WHEN 7 THEN 2019 ELSE 2020 + i % 4 END,
+    DATE '2020-01-01' + i % 1500,
+    DATE '2020-01-01' + i % 1500,
+    CASE i % 200 WHEN 3 THEN 'I' ELSE 'E' END,
+    i % 200 IN (0, 1),
+    0,
+    0,
+    CASE i % 200 WHEN 5 THEN 'D' ELSE 'NA' END,
+    i % 200 = 6,
+    'NA'
+FROM generate_series(1, {FILAS}) AS i
+"""
+
+# Filtros de /api/gastos -> índice que debe aparecer en el plan
+CASOS_FILTROS = [
+    ({}, "ix_gastos_fecha_cargo_id"),
+    ({"fecha_desde": "2025-01-01", "fecha_hasta": "2025-03-31"}, "ix_gastos_fecha_cargo_id"),
+    ({"anio": 2019, "mes": ["Enero", "Septiembre"]}, "ix_gastos_anio_mes"),
+    ({"tipo_gasto": ["Fijo"]}, "ix_gastos_tipo_gasto_fecha_cargo"),
+    ({"categoria": ["I"]}, "ix_gastos_categoria_fecha_cargo"),
+    ({"forma_pago": ["Efectivo"]}, "ix_gastos_forma_pago_fecha_cargo"),
+    ({"tag": "D"}, "ix_gastos_tag_fecha_cargo"),
+    ({"a_pagos": True}, "ix_gastos_a_pagos_fecha_cargo"),
+    ({"se_divide": True}, "ix_gastos_se_divide_fecha_cargo"),
+]
+
+
+@pytest.fixture
+def db():
+    """Sesión con el conjunto de prueba cargado en una transacción que se revierte"""
+    session = SessionLocal()
+    session.execute(text("TRUNCATE gastos"))
+    session.execute(text(DATOS_SQL))
+    session.execute(text("ANALYZE gastos"))
+    yield session
+    session.rollback()
+    # ANALYZE actualiza reltuples fuera de la transacción: volver a calcularlo
+    session.execute(text("ANALYZE gastos"))
+    session.commit()
+    session.close()
+
+
+def _index_names(plan: dict) -> set:
+    """Índices usados por un nodo del plan y sus hijos"""
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for hijo in plan.get("Plans", []):
+        names |= _index_names(hijo)
+    return names
+
+
+def planned_indexes(db, consulta) -> set:
+    """Ejecutar `consulta(db)` y devolver los índices del plan de sus SELECT"""
+    sentencias = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            sentencias.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        consulta(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+
+    indices = set()
+    for statement, parameters in sentencias:
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        indices |= _index_names(plan[0]["Plan"])
+    return indices
+
+
+@pytest.mark.parametrize("filtros, indice", CASOS_FILTROS, ids=[indice for _, indice in CASOS_FILTROS])
+def test_filtros_usan_indice(db, filtros, indice):
+    indices = planned_indexes(
+        db,
+        lambda s: controller.get_gastos_by_filters(s, 0, 20, include_total=False, **filtros)
+    )
+    assert indice in indices
+
+
+def test_cursor_usa_indice_de_orden(db):
+    indices = planned_indexes(db, lambda s: controller.get_gastos_by_cursor(s, limit=20))
+    assert "ix_gastos_fecha_cargo_id" in indices
+
+
+def test_msi_mci_usa_indice(db):
+    # Sin LIMIT el planificador puede preferir el índice compuesto y ordenar en
+    # memoria en vez del índice parcial; cualquiera de los dos evita el seq scan
+    indices = planned_indexes(db, controller.get_gastos_msi_mci)
+    assert indices & {"ix_gastos_msi_mci_fecha_cargo", "ix_gastos_tipo_gasto_fecha_cargo"}